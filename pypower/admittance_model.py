@@ -0,0 +1,162 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Implements the admittance model object, which holds the bus and branch
+admittance matrices and updates them in place.
+"""
+
+from numpy import ones, conj, exp, pi, r_, arange, unique, bincount, \
+    cumsum, asarray, atleast_1d, add
+from scipy.sparse import csr_matrix
+
+from pypower.idx_bus import GS, BS
+from pypower.idx_brch import F_BUS, T_BUS, BR_R, BR_X, BR_B, BR_STATUS, \
+    SHIFT, TAP
+
+
+class admittance_model(object):
+    """This class holds the bus admittance matrix C{Ybus} and the branch
+    admittance matrices C{Yf} and C{Yt} of a case, as built by
+    L{makeYbus}, along with the connection matrices C{Cf} and C{Ct}.
+
+    The sparsity structure of the matrices includes every branch,
+    in-service or not, and every diagonal element, so that changes of
+    branch status, tap ratio, phase shift or impedance and of bus shunts
+    are applied by patching only the affected nonzeros, using
+    L{update_branch} and L{update_bus}. The matrices are updated in place,
+    i.e. the C{Ybus}, C{Yf} and C{Yt} objects stay the same.
+
+    Example::
+        am = admittance_model(baseMVA, bus, branch)
+        am.update_branch(7, status=0)       ## take branch 7 out
+        am.update_branch([3, 4], tap=1.05)  ## change taps of 3 and 4
+        Ybus = am.Ybus
+    """
+
+    def __init__(self, baseMVA, bus, branch):
+        nb = bus.shape[0]          ## number of buses
+        nl = branch.shape[0]       ## number of lines
+
+        #: system MVA base
+        self.baseMVA = baseMVA
+        #: copy of the branch data, kept up to date by L{update_branch}
+        self.branch = branch.copy()
+        #: copy of the bus data, kept up to date by L{update_bus}
+        self.bus = bus.copy()
+
+        f = branch[:, F_BUS].astype(int)       ## list of "from" buses
+        t = branch[:, T_BUS].astype(int)       ## list of "to" buses
+        il = arange(nl)
+        ib = arange(nb)
+
+        ## connection matrices for line & from/to buses
+        self.Cf = csr_matrix((ones(nl), (il, f)), (nl, nb))
+        self.Ct = csr_matrix((ones(nl), (il, t)), (nl, nb))
+
+        Yff, Yft, Ytf, Ytt = self._branch_admittances(il)
+        Ysh = self._shunt_admittances(ib)
+
+        ## Yf and Yt, with the positions in their data of the elements
+        ## of each branch
+        self.Yf, pos = _csr(r_[il, il], r_[f, t], r_[Yff, Yft], (nl, nb))
+        self._f_ff, self._f_ft = pos[:nl], pos[nl:]
+        self.Yt, pos = _csr(r_[il, il], r_[f, t], r_[Ytf, Ytt], (nl, nb))
+        self._t_tf, self._t_tt = pos[:nl], pos[nl:]
+
+        ## Ybus = Cf' * Yf + Ct' * Yt + diag(Ysh)
+        self.Ybus, pos = _csr(r_[f, f, t, t, ib], r_[f, t, f, t, ib],
+                              r_[Yff, Yft, Ytf, Ytt, Ysh], (nb, nb))
+        self._ff, self._ft = pos[:nl], pos[nl:2 * nl]
+        self._tf, self._tt = pos[2 * nl:3 * nl], pos[3 * nl:4 * nl]
+        self._sh = pos[4 * nl:]
+
+        ## current values, to compute the deltas of updates
+        self._Ybr = [Yff, Yft, Ytf, Ytt]
+        self._Ysh = Ysh
+
+
+    def _branch_admittances(self, idx):
+        """Elements of the 2 x 2 admittance matrices of branches C{idx}.
+        """
+        br = self.branch[idx, :]
+        stat = br[:, BR_STATUS]                  ## ones at in-service branches
+        Ys = stat / (br[:, BR_R] + 1j * br[:, BR_X])  ## series admittance
+        Bc = stat * br[:, BR_B]                  ## line charging susceptance
+        tap = ones(len(idx), complex)            ## default tap ratio = 1
+        i = br[:, TAP] != 0                      ## non-zero tap ratios
+        tap[i] = br[i, TAP]                      ## assign non-zero tap ratios
+        tap = tap * exp(1j * pi / 180 * br[:, SHIFT]) ## add phase shifters
+
+        Ytt = Ys + 1j * Bc / 2
+        Yff = Ytt / (tap * conj(tap))
+        Yft = - Ys / conj(tap)
+        Ytf = - Ys / tap
+
+        return Yff, Yft, Ytf, Ytt
+
+
+    def _shunt_admittances(self, idx):
+        """Shunt admittances of buses C{idx}.
+        """
+        return (self.bus[idx, GS] + 1j * self.bus[idx, BS]) / self.baseMVA
+
+
+    def update_branch(self, idx, status=None, r=None, x=None, b=None,
+                      tap=None, shift=None):
+        """Changes the parameters of branches C{idx}.
+
+        Any of C{status}, C{r}, C{x}, C{b}, C{tap} and C{shift} that is
+        given (scalar or one value per branch) replaces the corresponding
+        column of the branch data, after which only the nonzeros of the
+        admittance matrices belonging to these branches are updated.
+        """
+        idx = atleast_1d(asarray(idx, int))
+        for col, val in [(BR_STATUS, status), (BR_R, r), (BR_X, x),
+                         (BR_B, b), (TAP, tap), (SHIFT, shift)]:
+            if val is not None:
+                self.branch[idx, col] = val
+
+        new = self._branch_admittances(idx)
+        old = [Y[idx] for Y in self._Ybr]
+        for Y, Yk in zip(self._Ybr, new):
+            Y[idx] = Yk
+        Yff, Yft, Ytf, Ytt = new
+
+        self.Yf.data[self._f_ff[idx]] = Yff
+        self.Yf.data[self._f_ft[idx]] = Yft
+        self.Yt.data[self._t_tf[idx]] = Ytf
+        self.Yt.data[self._t_tt[idx]] = Ytt
+
+        ## parallel branches share elements of Ybus, so accumulate deltas
+        data = self.Ybus.data
+        for pos, Yk, Yk0 in zip([self._ff, self._ft, self._tf, self._tt],
+                                new, old):
+            add.at(data, pos[idx], Yk - Yk0)
+
+
+    def update_bus(self, idx, gs=None, bs=None):
+        """Changes the shunt conductance C{gs} and/or susceptance C{bs}
+        (in MW and MVAr demanded at V = 1.0 p.u.) of buses C{idx}.
+        """
+        idx = atleast_1d(asarray(idx, int))
+        if gs is not None:
+            self.bus[idx, GS] = gs
+        if bs is not None:
+            self.bus[idx, BS] = bs
+
+        Ysh = self._shunt_admittances(idx)
+        self.Ybus.data[self._sh[idx]] += Ysh - self._Ysh[idx]
+        self._Ysh[idx] = Ysh
+
+
+def _csr(i, j, v, shape):
+    """Builds a CSR matrix from triplets, summing duplicates but keeping
+    zero elements, and returns it with the position in its data of each
+    triplet.
+    """
+    key, pos = unique(i * shape[1] + j, return_inverse=True)
+    data = bincount(pos, v.real, len(key)) + 1j * bincount(pos, v.imag, len(key))
+    indptr = r_[0, cumsum(bincount(key // shape[1], minlength=shape[0]))]
+
+    return csr_matrix((data, key % shape[1], indptr), shape), pos
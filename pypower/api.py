@@ -13,6 +13,7 @@ example::
 from __future__ import absolute_import
 
 from .add_userfcn import add_userfcn
+from .admittance_model import admittance_model
 from .bustypes import bustypes
 from .case118 import case118
 from .case14 import case14
@@ -28,21 +29,24 @@ from .case6ww import case6ww
 from .case9 import case9
 from .case9Q import case9Q
 from .cplex_options import cplex_options
+from .cpf import cpf
 from .d2AIbr_dV2 import d2AIbr_dV2
 from .d2ASbr_dV2 import d2ASbr_dV2
 from .d2Ibr_dV2 import d2Ibr_dV2
 from .d2Sbr_dV2 import d2Sbr_dV2
 from .d2Sbus_dV2 import d2Sbus_dV2
 from .dAbr_dV import dAbr_dV
+from .dc_factors import dc_factors, get_dc_factors
 from .dcopf import dcopf
 from .dcopf_solver import dcopf_solver
 from .dcpf import dcpf
+from .dcscreen import dcscreen
 from .dIbr_dV import dIbr_dV
 from .dSbr_dV import dSbr_dV
 from .dSbus_dV import dSbus_dV
 from .ext2int import ext2int
 from .fairmax import fairmax
-from .fdpf import fdpf
+from .fdpf import fdpf, fdpf_qlim
 from .gausspf import gausspf
 from .get_reorder import get_reorder
 from .hasPQcap import hasPQcap
@@ -63,18 +67,26 @@ from .makeSbus import makeSbus
 from .makeYbus import makeYbus
 from .modcost import modcost
 from .mosek_options import mosek_options
-from .newtonpf import newtonpf
+from .mpopf import mpopf
+from .newtonpf import newtonpf, newtonpf_qlim
+from .newtonpf_batch import newtonpf_batch
+from .newtonpf_I_cart import newtonpf_I_cart
 from .opf_args import opf_args
 from .opf_consfcn import opf_consfcn
+from .opf_consjac import opf_consjac
 from .opf_costfcn import opf_costfcn
 from .opf_execute import opf_execute
 from .opf_hessfcn import opf_hessfcn
+from .opf_hessian import opf_hessian
 from .opf_model import opf_model
 from .opf import opf
 from .opf_setup import opf_setup
 from .pfsoln import pfsoln
+from .pf_jacobian import pf_jacobian
+from .pf_linsolver import get_linsolver
 from .pipsopf_solver import pipsopf_solver
 from .pips import pips
+from .pips_kkt import pips_kkt
 from .pipsver import pipsver
 from .poly2pwl import poly2pwl
 from .polycost import polycost
@@ -82,22 +94,27 @@ from .ppoption import ppoption
 from .ppver import ppver
 from .pqcost import pqcost
 from .printpf import printpf
+from .qlim_switch import qlim_switch
 from .qps_cplex import qps_cplex
 from .qps_ipopt import qps_ipopt
 from .qps_mosek import qps_mosek
 from .qps_pips import qps_pips
 from .qps_pypower import qps_pypower
 from .remove_userfcn import remove_userfcn
+from .runcpf import runcpf
+from .runcont import runcont
 from .rundcopf import rundcopf
 from .rundcpf import rundcpf
 from .runduopf import runduopf
 from .runopf import runopf
 from .runopf_w_res import runopf_w_res
 from .runpf import runpf
+from .runtspf import runtspf
 from .runuopf import runuopf
 from .run_userfcn import run_userfcn
 from .savecase import savecase
 from .scale_load import scale_load
+from .scdcopf import scdcopf
 from .set_reorder import set_reorder
 from .toggle_iflims import toggle_iflims
 from .toggle_reserves import toggle_reserves
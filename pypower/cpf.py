@@ -0,0 +1,224 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Traces the power flow solution curve using continuation.
+"""
+
+import sys
+
+from numpy import angle, exp, conj, r_, zeros, dot, argmax, array, \
+    linalg, Inf
+from scipy.sparse import bmat, csr_matrix as sparse
+from scipy.sparse.linalg import spsolve
+
+from pypower.pf_jacobian import pf_jacobian
+from pypower.ppoption import ppoption
+
+
+def cpf(Ybus, Sbusb, Sbust, V0, ref, pv, pq, ppopt=None):
+    """Traces the power flow solution curve using continuation.
+
+    Traces the solutions of the power flow equations for the complex bus
+    power injections::
+
+        Sbus(lam) = Sbusb + lam * (Sbust - Sbusb)
+
+    from the base injections C{Sbusb} (C{lam = 0}) towards the target
+    injections C{Sbust} (C{lam = 1}) and beyond, up to the maximum
+    loading point (nose of the PV curves). C{V0} must be the solved
+    voltages of the base case. The other arguments are as for
+    L{newtonpf}.
+
+    Each step predicts the next point along the tangent of the curve and
+    corrects it with Newton's method on the power flow mismatch augmented
+    with a parameterization equation, selected by the
+    C{CPF_PARAMETERIZATION} option (1 - natural, 2 - arc length, 3 -
+    pseudo arc length). The natural parameterization cannot pass the
+    nose, it ends with a failed corrector close to it. The Jacobian is
+    assembled by a single L{pf_jacobian} object for all steps.
+
+    Steps are of length C{CPF_STEP}. When the tangent shows that the nose
+    has been passed (with C{CPF_STOP_AT} 'NOSE' or 'TARGET'), or the
+    corrector fails, the step is retried with half its length, down to
+    C{CPF_STEP_MIN}, so the nose is located to within that distance. With
+    C{CPF_STOP_AT} 'FULL' the curve is traced back down to C{lam = 0}, and
+    with 'TARGET' it stops at C{lam = 1}, if reached before the nose.
+
+    Returns a dict with::
+        V          - C{nb x np} complex voltages of the points of the curve
+        lam        - the C{np} values of lam at these points
+        max_lam    - maximum lam reached, the loading limit
+        V_max      - voltages at C{max_lam}
+        steps      - number of continuation steps taken
+        iterations - total number of corrector iterations
+        success    - C{True} unless the trace ended with a failed
+                     corrector away from the nose (where the tangent
+                     shows lam still increasing), or after
+                     C{CPF_MAX_STEPS} steps
+
+    @see: L{runcpf}, L{newtonpf}
+    """
+    ## default arguments
+    if ppopt is None:
+        ppopt = ppoption()
+
+    ## options
+    tol       = ppopt['PF_TOL']
+    max_it    = ppopt['PF_MAX_IT']
+    verbose   = ppopt['VERBOSE']
+    param     = ppopt['CPF_PARAMETERIZATION']
+    stop_at   = ppopt['CPF_STOP_AT'].upper()
+    step0     = ppopt['CPF_STEP']
+    step_min  = ppopt['CPF_STEP_MIN']
+    max_steps = ppopt['CPF_MAX_STEPS']
+
+    ## set up indexing, x = [Va(pvpq); Vm(pq); lam]
+    pvpq = r_[pv, pq]
+    npvpq = len(pvpq)
+    nx = npvpq + len(pq) + 1
+    Va0 = angle(V0)
+    Vm0 = abs(V0)
+
+    ## derivative of the mismatch with respect to lam
+    Sxfr = Sbust - Sbusb
+    dF_dlam = sparse(-r_[Sxfr[pvpq].real, Sxfr[pq].imag][:, None])
+
+    ## Jacobian structure, values are refilled at each evaluation
+    jac = pf_jacobian(Ybus, pv, pq)
+
+    def x2V(x):
+        Va = Va0.copy()
+        Vm = Vm0.copy()
+        Va[pvpq] = x[:npvpq]
+        Vm[pq] = x[npvpq:-1]
+        return Vm * exp(1j * Va)
+
+    def mismatch(V, lam):
+        mis = V * conj(Ybus * V) - Sbusb - lam * Sxfr
+        return r_[mis[pvpq].real, mis[pq].imag]
+
+    def solve_augmented(V, dP, rhs):
+        J = bmat([[jac.update(V), dF_dlam],
+                  [sparse(dP[None, :-1]), sparse(dP[None, -1:])]],
+                 format='csc')
+        return spsolve(J, rhs)
+
+    def tangent(V, z):
+        rhs = zeros(nx)
+        rhs[-1] = 1
+        zn = solve_augmented(V, z, rhs)
+        return zn / linalg.norm(zn)
+
+    def corrector(xprv, z, step, natural):
+        x = xprv + step * z
+        for i in range(max_it + 1):
+            V = x2V(x)
+            if natural:             ## lam fixed at lamprv + step
+                P = x[-1] - xprv[-1] - step
+                dP = zeros(nx)
+                dP[-1] = 1
+            elif param == 2:        ## arc length
+                P = dot(x - xprv, x - xprv) - step**2
+                dP = 2 * (x - xprv)
+            else:                   ## pseudo arc length
+                P = dot(z, x - xprv) - step
+                dP = z
+            F = r_[mismatch(V, x[-1]), P]
+            if linalg.norm(F, Inf) < tol:
+                return x, V, True, i
+            if i < max_it:
+                x = x - solve_augmented(V, dP, F)
+        return x, V, False, i
+
+    ## initial point and tangent
+    x = r_[Va0[pvpq], Vm0[pq], 0]
+    V = V0
+    z = zeros(nx)
+    z[-1] = 1
+    z = tangent(V, z)
+
+    Vs = [V]
+    lams = [0.0]
+    step = step0
+    steps = 0
+    iterations = 0
+    success = True
+    near_nose = False
+    if verbose > 1:
+        sys.stdout.write('\nstep     lambda    iterations   step size')
+        sys.stdout.write('\n----  -----------  ----------  -----------')
+
+    while True:
+        if steps >= max_steps:
+            success = False
+            break
+
+        xn, Vn, ok, i = corrector(x, z, step, param == 1)
+        iterations = iterations + i
+        if not ok:
+            ## corrector failed, retry a shorter step
+            if step / 2 >= step_min:
+                step = step / 2
+                continue
+            ## expected only at the nose, where the tangent at the
+            ## predicted point (a step in lam for natural) turns back
+            dlam = z[-1]
+            if dlam > 0 and not near_nose:
+                xp = x + step * z / (dlam if param == 1 else 1)
+                dlam = tangent(x2V(xp), z)[-1]
+            success = near_nose or dlam <= 0
+            break
+
+        lam = xn[-1]
+        zn = tangent(Vn, z)
+
+        ## passed the target, solve for lam = 1 exactly
+        if stop_at == 'TARGET' and lam > 1 and zn[-1] > 0:
+            xn, Vn, ok, i = corrector(x, z * 0, 1 - x[-1], True)
+            iterations = iterations + i
+            if not ok:
+                success = False
+                break
+            lam = 1.0
+            zn = z
+
+        ## passed the nose?
+        if zn[-1] < 0 and stop_at != 'FULL':
+            near_nose = True
+            if step / 2 >= step_min:
+                step = step / 2
+                continue
+            break
+
+        ## back down to lam = 0
+        if stop_at == 'FULL' and lam < 0:
+            break
+
+        ## accept the point
+        x, z, V = xn, zn, Vn
+        Vs.append(V)
+        lams.append(lam)
+        steps = steps + 1
+        if verbose > 1:
+            sys.stdout.write('\n%3d   %10.6f   %7d      %10.3e' %
+                             (steps, lam, i, step))
+
+        if stop_at == 'TARGET' and lam == 1:
+            break
+
+        ## restore the step length after corrector failures
+        if not near_nose:
+            step = min(2 * step, step0)
+
+    lams = array(lams)
+    Vs = array(Vs).T
+    k = argmax(lams)
+    if verbose:
+        sys.stdout.write('\nContinuation power flow %s after %d steps, '
+                         'max lambda = %.6f.\n' %
+                         ('completed' if success else 'failed', steps,
+                          lams[k]))
+
+    return {'V': Vs, 'lam': lams, 'max_lam': lams[k], 'V_max': Vs[:, k],
+            'steps': steps, 'iterations': iterations, 'success': success}
@@ -5,7 +5,8 @@
 """Computes 2nd derivatives of power injection w.r.t. voltage.
 """
 
-from numpy import ones, conj, arange
+from numpy import conj, arange, diff, zeros, bincount, searchsorted, r_
+from numpy import flatnonzero as find
 from scipy.sparse import csr_matrix as sparse
 
 
@@ -18,6 +19,10 @@ def d2Sbus_dV2(Ybus, V, lam):
     admittance matrix C{Ybus}, voltage vector C{V} and C{nb x 1} vector of
     multipliers C{lam}. Output matrices are sparse.
 
+    The matrices are computed elementwise by L{d2Sbus_dV2_nz}, on the
+    structure of C{Ybus + Ybus.T} with all diagonal elements, which they
+    share.
+
     For more details on the derivations behind the derivative code used
     in PYPOWER information, see:
 
@@ -28,23 +33,71 @@ def d2Sbus_dV2(Ybus, V, lam):
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
+    row, col, y, d, tp, indptr = _sym_pattern(Ybus)
     nb = len(V)
-    ib = arange(nb)
-    Ibus = Ybus * V
-    diaglam = sparse((lam, (ib, ib)))
-    diagV = sparse((V, (ib, ib)))
-
-    A = sparse((lam * V, (ib, ib)))
-    B = Ybus * diagV
-    C = A * conj(B)
-    D = Ybus.H * diagV
-    E = diagV.conj() * (D * diaglam - sparse((D * lam, (ib, ib))))
-    F = C - A * sparse((conj(Ibus), (ib, ib)))
-    G = sparse((ones(nb) / abs(V), (ib, ib)))
+
+    return tuple(sparse((G, col, indptr), (nb, nb))
+                 for G in d2Sbus_dV2_nz(row, col, y, d, tp, V, lam))
+
+
+def d2Sbus_dV2_nz(row, col, y, d, tp, V, lam):
+    """Computes 2nd derivatives of power injection w.r.t. voltage, on the
+    nonzeros of a structurally symmetric pattern of C{Ybus}.
+
+    C{row}, C{col} and C{y} are the row and column indices and values of
+    the nonzeros, including every diagonal element, C{d} the positions of
+    the diagonal elements in bus order and C{tp} the position of the
+    transpose of each nonzero, as returned by L{_sym_pattern}. Returns the
+    values of C{Gaa}, C{Gav}, C{Gva} and C{Gvv} of L{d2Sbus_dV2} on these
+    nonzeros. With::
+
+        C(i, k) = lam(i) * V(i) * conj(Ybus(i, k) * V(k))
+
+    whose row sums are C{lam * V * conj(Ibus)}, the matrices are::
+
+        E = C.T - diag(C.T * 1)
+        F = C - diag(C * 1)
+        Gaa = E + F
+        Gva = j * diag(1 / abs(V)) * (E - F)
+        Gav = Gva.T
+        Gvv = diag(1 / abs(V)) * (C + C.T) * diag(1 / abs(V))
+    """
+    Vm = abs(V)
+    C = lam[row] * V[row] * conj(y * V[col])
+    Ct = C[tp]
+
+    E = Ct.copy()
+    F = C.copy()
+    E[d] -= bincount(row, Ct.real) + 1j * bincount(row, Ct.imag)
+    F[d] -= bincount(row, C.real) + 1j * bincount(row, C.imag)
 
     Gaa = E + F
-    Gva = 1j * G * (E - F)
-    Gav = Gva.T
-    Gvv = G * (C + C.T) * G
+    Gva = 1j * (E - F) / Vm[row]
+    Gav = Gva[tp]
+    Gvv = (C + Ct) / (Vm[row] * Vm[col])
 
     return Gaa, Gav, Gva, Gvv
+
+
+def _sym_pattern(Ybus):
+    """Structurally symmetric pattern of C{Ybus} with all diagonal elements.
+
+    Returns the row and column indices of its nonzeros in CSR order, the
+    values of C{Ybus} on them (explicit zeros where C{Ybus} has none), the
+    positions of the diagonal elements, the position of the transpose of
+    each nonzero and the CSR row pointers.
+    """
+    Yc = Ybus.tocoo()
+    nb = Ybus.shape[0]
+    ib = arange(nb)
+    nz = zeros(len(Yc.data) + nb)
+    P = sparse((r_[Yc.data, nz], (r_[Yc.row, Yc.col, ib], r_[Yc.col, Yc.row, ib])),
+               (nb, nb))
+    P.sum_duplicates()
+
+    row = ib.repeat(diff(P.indptr))
+    col = P.indices
+    key = row * nb + col
+    tp = searchsorted(key, col * nb + row)
+
+    return row, col, P.data, find(row == col), tp, P.indptr
@@ -5,7 +5,8 @@
 """Computes partial derivatives of power injection w.r.t. voltage.
 """
 
-from numpy import conj, diag, asmatrix, asarray
+from numpy import conj, diag, asmatrix, asarray, arange, diff, zeros, r_
+from numpy import flatnonzero as find
 from scipy.sparse import issparse, csr_matrix as sparse
 
 
@@ -40,6 +41,11 @@ def dSbus_dV(Ybus, V):
                                         + conj(diag(Ibus)) * j * diag(V)
                = j * diag(V) * conj(diag(Ibus) - Ybus * diag(V))
 
+    If C{Ybus} is sparse, both matrices are computed directly on its
+    nonzeros by L{dSbus_dV_nz} and are returned in CSR format with the
+    same structure as C{Ybus} (with explicit zeros added on any missing
+    diagonal, see L{dSbus_dV_with_diag}).
+
     For more details on the derivations behind the derivative code used
     in PYPOWER information, see:
 
@@ -50,22 +56,78 @@ def dSbus_dV(Ybus, V):
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
-    ib = range(len(V))
-
     if issparse(Ybus):
-        Ibus = Ybus * V
+        Ybus, row, d = dSbus_dV_with_diag(Ybus)
+        nb = Ybus.shape[0]
+        dS_dVm, dS_dVa = dSbus_dV_nz(row, Ybus.indices, Ybus.data, d, V,
+                                     Ybus * V)
 
-        diagV = sparse((V, (ib, ib)))
-        diagIbus = sparse((Ibus, (ib, ib)))
-        diagVnorm = sparse((V / abs(V), (ib, ib)))
-    else:
-        Ibus = Ybus * asmatrix(V).T
+        return sparse((dS_dVm, Ybus.indices, Ybus.indptr), (nb, nb)), \
+            sparse((dS_dVa, Ybus.indices, Ybus.indptr), (nb, nb))
 
-        diagV = asmatrix(diag(V))
-        diagIbus = asmatrix(diag( asarray(Ibus).flatten() ))
-        diagVnorm = asmatrix(diag(V / abs(V)))
+    Ibus = Ybus * asmatrix(V).T
+
+    diagV = asmatrix(diag(V))
+    diagIbus = asmatrix(diag( asarray(Ibus).flatten() ))
+    diagVnorm = asmatrix(diag(V / abs(V)))
 
     dS_dVm = diagV * conj(Ybus * diagVnorm) + conj(diagIbus) * diagVnorm
     dS_dVa = 1j * diagV * conj(diagIbus - Ybus * diagV)
 
     return dS_dVm, dS_dVa
+
+
+def dSbus_dV_nz(row, col, y, d, V, Ibus):
+    """Partial derivatives of power injection w.r.t. voltage, on the
+    nonzeros of C{Ybus}.
+
+    C{row}, C{col} and C{y} are the row and column indices and the values
+    of the nonzeros of C{Ybus}, which must include every diagonal element,
+    C{d} the positions of the diagonal elements in bus order and C{Ibus}
+    the bus current injections C{Ybus * V}. Returns the values of
+    C{dS/dVm} and C{dS/dVa} on these nonzeros, see L{dSbus_dV}::
+
+        dS/dVm(i, k) = V(i) * conj(Ybus(i, k) * V(k)) / abs(V(k))
+                                + (i == k) * conj(Ibus(i)) * V(i) / abs(V(i))
+        dS/dVa(i, k) = -j * V(i) * conj(Ybus(i, k) * V(k))
+                                + (i == k) * j * V(i) * conj(Ibus(i))
+    """
+    Vm = abs(V)
+    VYV = V[row] * conj(y * V[col])
+    dS_dVm = VYV / Vm[col]
+    dS_dVa = -1j * VYV
+    dS_dVm[d] += conj(Ibus) * V / Vm
+    dS_dVa[d] += 1j * V * conj(Ibus)
+
+    return dS_dVm, dS_dVa
+
+
+def dSbus_dV_with_diag(Ybus):
+    """Prepares C{Ybus} for L{dSbus_dV_nz}.
+
+    Returns C{Ybus} in canonical CSR format, with explicit zeros added on
+    its missing diagonal elements, if any, the row indices of its nonzeros
+    and the positions of its diagonal elements in bus order. The
+    derivatives computed by L{dSbus_dV_nz} have exactly the sparsity
+    structure of the returned matrix, so callers which evaluate them
+    repeatedly can set up their sparsity patterns once from it.
+
+    @see: L{dSbus_dV}, L{pf_jacobian}
+    """
+    Ybus = Ybus.tocsr()
+    if not Ybus.has_canonical_format:
+        Ybus = Ybus.copy()
+        Ybus.sum_duplicates()
+    nb = Ybus.shape[0]
+    row = arange(nb).repeat(diff(Ybus.indptr))
+    d = find(row == Ybus.indices)
+    if len(d) < nb:
+        ib = arange(nb)
+        Yc = Ybus.tocoo()
+        Ybus = sparse((r_[Yc.data, zeros(nb)],
+                       (r_[Yc.row, ib], r_[Yc.col, ib])), (nb, nb))
+        Ybus.sum_duplicates()
+        row = ib.repeat(diff(Ybus.indptr))
+        d = find(row == Ybus.indices)
+
+    return Ybus, row, d
@@ -0,0 +1,311 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Implements the DC sensitivity factors object, which computes selected
+rows and columns of the DC power transfer and line outage distribution
+factors from a sparse factorization of the B matrix.
+"""
+
+from sys import stderr
+
+from collections import OrderedDict
+from hashlib import sha1
+
+from numpy import arange, zeros, ones, asarray, atleast_1d, isscalar, \
+    ascontiguousarray, unique, nan, r_
+from numpy import flatnonzero as find
+from scipy.sparse import csr_matrix as sparse
+from scipy.sparse.linalg import splu
+
+from pypower.makeBdc import makeBdc
+
+from pypower.idx_bus import BUS_TYPE, REF, BUS_I
+from pypower.idx_brch import F_BUS, T_BUS, BR_X, TAP, BR_STATUS
+
+
+## factors kept per network and slack, most recently used last
+_cache = OrderedDict()
+_CACHE_SIZE = 8
+
+
+class dc_factors(object):
+    """This class computes DC sensitivity factors of a network from a
+    sparse LU factorization of its reduced C{Bbus} matrix (see
+    L{makeBdc}), computed once when the object is created.
+
+    Unlike L{makePTDF} and L{makeLODF}, which build full dense matrices,
+    L{ptdf}, L{tdf} and L{lodf} compute only the requested rows or columns
+    of the power transfer and line outage distribution factor matrices, at
+    the cost of one sparse forward and back substitution per row or
+    column.
+
+    The C{slack} is a bus index or a vector of weights specifying the
+    proportion of the slack taken up at each bus, as for L{makePTDF}, and
+    defaults to the reference bus. Expects the buses to be numbered
+    consecutively (internal indexing). Use L{get_dc_factors} to reuse the
+    factorization for the same network.
+
+    Example::
+        dcf = dc_factors(baseMVA, bus, branch)
+        H = dcf.ptdf(branches=[2, 5])   ## PTDF[[2, 5], :]
+        L = dcf.lodf([3, 7])            ## LODF[:, [3, 7]]
+
+    @see: L{makePTDF}, L{makeLODF}, L{dcscreen}
+    """
+
+    #: tolerance on C{1 - PTDF[k, k]} below which the outage of branch
+    #: C{k} is considered to island the network
+    island_tol = 1e-8
+
+    def __init__(self, baseMVA, bus, branch, slack=None):
+        nb = bus.shape[0]
+        nl = branch.shape[0]
+
+        ## check that bus numbers are equal to indices to bus
+        if any(bus[:, BUS_I] != arange(nb)):
+            stderr.write('dc_factors: buses must be numbered consecutively')
+
+        ## use reference bus for slack by default, and as angle reference
+        ## for a distributed slack
+        ref = find(bus[:, BUS_TYPE] == REF)[0]
+        if slack is None:
+            slack = ref
+        if isscalar(slack):
+            weights = None
+        else:
+            weights = asarray(slack, float) / sum(slack)
+            slack = ref
+
+        Bbus, Bf, _, _ = makeBdc(baseMVA, bus, branch)
+
+        #: number of buses and branches
+        self.nb, self.nl = nb, nl
+        #: slack bus, also used as the angle reference
+        self.slack = slack
+        #: slack distribution weights, C{None} for a single slack bus
+        self.weights = weights
+        #: buses other than the slack
+        self.noslack = find(arange(nb) != slack)
+        #: branch flows as a function of voltage angles
+        self.Bf = Bf.tocsr()
+        #: LU factors of the reduced Bbus
+        self.lu = splu(Bbus.tocsc()[self.noslack, :][:, self.noslack])
+        #: branch-bus incidence matrix, +1 at "from" and -1 at "to" buses
+        self.Cft = sparse((r_[ones(nl), -ones(nl)],
+                           (r_[arange(nl), arange(nl)],
+                            r_[branch[:, F_BUS], branch[:, T_BUS]])),
+                          (nl, nb))
+
+
+    def angles(self, P):
+        """Voltage angles for the bus injections C{P} (C{nb x m}, one
+        column per injection pattern), with the slack angle at zero.
+        """
+        P = asarray(P, float)
+        Va = zeros(P.shape)
+        Va[self.noslack] = self.lu.solve(P[self.noslack])
+        return Va
+
+
+    def ptdf(self, branches=None, buses=None, threshold=0):
+        """Returns the rows C{branches} and columns C{buses} of the PTDF
+        matrix, all of them by default.
+
+        The factors are computed by rows (one solve with the transposed
+        factors per branch) if fewer branches than buses are requested,
+        and by columns otherwise. If C{threshold} is positive, factors
+        smaller in magnitude are dropped and a sparse matrix is returned.
+        """
+        nb = self.nb
+        ns = self.noslack
+        if branches is not None:
+            branches = atleast_1d(asarray(branches, int))
+        if buses is not None:
+            buses = atleast_1d(asarray(buses, int))
+
+        if branches is not None and (buses is None or
+                                     len(branches) <= len(buses)):
+            ## by rows: H[branches, :] = Bf[branches, :] * inv(Bbus)
+            H = zeros((len(branches), nb))
+            if len(branches):
+                Bfr = self.Bf[branches, :][:, ns].T.toarray()
+                H[:, ns] = self.lu.solve(ascontiguousarray(Bfr),
+                                         trans='T').T
+            if self.weights is not None:
+                H = H - H.dot(self.weights)[:, None]
+            if buses is not None:
+                H = H[:, buses]
+        else:
+            ## by columns, flows for unit injections at the buses
+            if buses is None:
+                buses = arange(nb)
+            E = zeros((nb, len(buses)))
+            E[buses, arange(len(buses))] = 1
+            H = self.Bf * self.angles(E)
+            if self.weights is not None:
+                H = H - (self.Bf * self.angles(self.weights))[:, None]
+            if branches is not None:
+                H = H[branches, :]
+
+        if threshold > 0:
+            H[abs(H) < threshold] = 0
+            H = sparse(H)
+
+        return H
+
+
+    def tdf(self, transfers, branches=None):
+        """Returns the transfer distribution factors of the branches
+        C{branches} (all by default), as a C{nl x nt} matrix for the
+        C{nt} transfers given by the rows of C{transfers}, each a pair of
+        the bus injecting and the bus withdrawing the power.
+
+        These factors do not depend on the slack.
+        """
+        transfers = asarray(transfers, int).reshape((-1, 2))
+        nt = transfers.shape[0]
+        E = sparse((r_[ones(nt), -ones(nt)],
+                    (r_[transfers[:, 0], transfers[:, 1]],
+                     r_[arange(nt), arange(nt)])), (self.nb, nt))
+        H = self.Bf * self.angles(E.toarray())
+        if branches is not None:
+            H = H[branches, :]
+
+        return H
+
+
+    def lodf(self, outages, branches=None):
+        """Returns the columns C{outages} of the line outage distribution
+        factor matrix, as a dense C{nl x len(outages)} matrix, or only its
+        rows C{branches} if given.
+
+        Column C{j} gives the change of the flows on all branches, per
+        unit flow on branch C{outages[j]} before its outage, with -1 at
+        the outaged branch itself. The columns of outages which island
+        the network are C{nan}.
+        """
+        outages = atleast_1d(asarray(outages, int))
+        if branches is None:
+            branches = arange(self.nl)
+
+        return self._lodf_rows(branches, outages, *self._lodf_cols(outages))
+
+
+    def lodf_blocks(self, size=1024, outages=None, branches=None):
+        """Generates the line outage distribution factor matrix by tiles.
+
+        Yields a tuple C{(rows, cols, L)} for each tile, where C{L} is the
+        C{LODF[rows, cols]} block, of at most C{size x size} elements, of
+        the rows C{branches} and columns C{outages} (all by default) of
+        the matrix. Tiles are generated column block by column block, so
+        apart from the tile itself only the C{nb x size} angles of the
+        current column block are kept in memory.
+        """
+        if outages is None:
+            outages = arange(self.nl)
+        if branches is None:
+            branches = arange(self.nl)
+        outages = atleast_1d(asarray(outages, int))
+        branches = atleast_1d(asarray(branches, int))
+
+        for j in range(0, len(outages), size):
+            cols = outages[j:j + size]
+            Va, den, island = self._lodf_cols(cols)
+            for i in range(0, len(branches), size):
+                rows = branches[i:i + size]
+                yield rows, cols, self._lodf_rows(rows, cols, Va, den, island)
+
+
+    def lodf2(self, pairs, branches=None):
+        """Returns the distribution factors of double branch outages.
+
+        For each row C{[k, m]} of C{pairs}, the flows after the
+        simultaneous outage of branches C{k} and C{m} are::
+
+            Pf_post = Pf + Lk[:, j] * Pf[k] + Lm[:, j] * Pf[m]
+
+        Returns C{Lk} and C{Lm}, C{nl x len(pairs)} matrices (or only their
+        rows C{branches}), computed from the single outage LODF columns of
+        C{k} and C{m}. The columns of pairs which island the network are
+        C{nan}.
+        """
+        pairs = asarray(pairs, int).reshape((-1, 2))
+        if branches is None:
+            branches = arange(self.nl)
+        branches = atleast_1d(asarray(branches, int))
+
+        ## single outage columns, each outaged branch computed once
+        out, pos = unique(pairs, return_inverse=True)
+        pos = pos.reshape(pairs.shape)
+        rows = r_[branches, out]
+        L = self.lodf(out, rows)
+        Lr, Lo = L[:len(branches)], L[len(branches):]
+        k, m = pos[:, 0], pos[:, 1]
+        Lkm = Lo[m, k]           ## LODF[m, k], flow on m per flow on k
+        Lmk = Lo[k, m]           ## LODF[k, m]
+
+        ## solve for the flows of k and m after the double outage
+        ##   [1, -LODF[k, m]; -LODF[m, k], 1] * [Fk'; Fm'] = [Pf[k]; Pf[m]]
+        det = 1 - Lmk * Lkm
+        island = ~(abs(det) >= self.island_tol)     ## also catches nan
+        det[island] = 1
+        Lk = (Lr[:, k] + Lr[:, m] * Lkm) / det
+        Lm = (Lr[:, k] * Lmk + Lr[:, m]) / det
+        Lk[:, island] = nan
+        Lm[:, island] = nan
+
+        return Lk, Lm
+
+
+    def _lodf_cols(self, outages):
+        """Angles for a unit transfer between the ends of each of the
+        C{outages}, with the denominators of their LODF columns and a
+        flag for those islanding the network.
+        """
+        Va = self.angles(self.Cft[outages, :].T.toarray())
+        hkk = asarray(self.Bf[outages, :].multiply(Va.T).sum(1)).ravel()
+
+        ## islanding outages have no flow left through the rest of the network
+        island = abs(1 - hkk) < self.island_tol
+        den = 1 - hkk
+        den[island] = 1
+
+        return Va, den, island
+
+
+    def _lodf_rows(self, rows, cols, Va, den, island):
+        """Rows C{rows} of the LODF columns C{cols}, given the output of
+        L{_lodf_cols}.
+        """
+        L = (self.Bf[rows, :] * Va) / den
+        i, j = (rows[:, None] == cols[None, :]).nonzero()
+        L[i, j] = -1
+        L[:, island] = nan
+
+        return L
+
+
+def get_dc_factors(baseMVA, bus, branch, slack=None):
+    """Returns the L{dc_factors} object of a network.
+
+    Objects are cached by the branch connections, reactances, tap ratios
+    and statuses and the slack, so repeated calls for the same topology
+    reuse the factorization.
+    """
+    h = sha1(ascontiguousarray(
+        branch[:, [F_BUS, T_BUS, BR_X, TAP, BR_STATUS]], float).tobytes())
+    h.update(ascontiguousarray(bus[:, BUS_TYPE], float).tobytes())
+    if slack is not None:
+        h.update(ascontiguousarray(slack, float).tobytes())
+    key = h.hexdigest()
+
+    if key in _cache:
+        dcf = _cache.pop(key)
+    else:
+        dcf = dc_factors(baseMVA, bus, branch, slack)
+        if len(_cache) >= _CACHE_SIZE:
+            _cache.popitem(last=False)
+    _cache[key] = dcf
+
+    return dcf
@@ -17,7 +17,7 @@ from numpy import flatnonzero as find
 from scipy.sparse import vstack, hstack, csr_matrix as sparse
 
 from pypower.idx_bus import BUS_TYPE, REF, VA, LAM_P, LAM_Q, MU_VMAX, MU_VMIN
-from pypower.idx_gen import PG, MU_PMAX, MU_PMIN, MU_QMAX, MU_QMIN
+from pypower.idx_gen import GEN_BUS, PG, MU_PMAX, MU_PMIN, MU_QMAX, MU_QMIN
 from pypower.idx_brch import PF, PT, QF, QT, RATE_A, MU_SF, MU_ST
 from pypower.idx_cost import MODEL, POLYNOMIAL, PW_LINEAR, NCOST, COST
 
@@ -27,6 +27,7 @@ from pypower.cplex_options import cplex_options
 from pypower.mosek_options import mosek_options
 from pypower.gurobi_options import gurobi_options
 from pypower.qps_pypower import qps_pypower
+from pypower.dc_factors import get_dc_factors
 
 
 def dcopf_solver(om, ppopt, out_opt=None):
@@ -103,6 +104,7 @@ def dcopf_solver(om, ppopt, out_opt=None):
     ipwl = find(gencost[:, MODEL] == PW_LINEAR)  ## piece-wise linear costs
     nb = bus.shape[0]              ## number of buses
     nl = branch.shape[0]           ## number of branches
+    ng = gen.shape[0]              ## number of generators
     nw = N.shape[0]                ## number of general cost vars, w
     ny = om.getN('var', 'y')       ## number of piece-wise linear costs
     nxyz = om.getN('var')          ## total number of control vars of all types
@@ -191,7 +193,8 @@ def dcopf_solver(om, ppopt, out_opt=None):
         ub[xmax ==  Inf] =  1e10
         x0 = (lb + ub) / 2;
         # angles set to first reference angle
-        x0[vv["i1"]["Va"]:vv["iN"]["Va"]] = Varefs[0]
+        if om.getN('var', 'Va'):
+            x0[vv["i1"]["Va"]:vv["iN"]["Va"]] = Varefs[0]
         if ny > 0:
             ipwl = find(gencost[:, MODEL] == PW_LINEAR)
             # largest y-value in CCV data
@@ -214,7 +217,11 @@ def dcopf_solver(om, ppopt, out_opt=None):
                              'costtol': costtol,
                              'max_it':  max_it,
                              'max_red': max_red,
+                             'linsolver': ppopt['PDIPM_LIN_SOLVER'],
                              'cost_mult': 1  }
+        ## blocks of variables, e.g. periods of a multi-period OPF
+        if len(om.userdata('blocks')) == nxyz:
+            opt["pips_opt"]['blocks'] = om.userdata('blocks')
     elif alg == 400:
         opt['ipopt_opt'] = ipopt_options([], ppopt)
     elif alg == 500:
@@ -234,8 +241,15 @@ def dcopf_solver(om, ppopt, out_opt=None):
     ##-----  calculate return values  -----
     if not any(isnan(x)):
         ## update solution data
-        Va = x[vv["i1"]["Va"]:vv["iN"]["Va"]]
         Pg = x[vv["i1"]["Pg"]:vv["iN"]["Pg"]]
+        if om.getN('var', 'Va'):
+            Va = x[vv["i1"]["Va"]:vv["iN"]["Va"]]
+        else:
+            ## PTDF formulation, angles of the bus injections
+            Cg = sparse((ones(ng), (gen[:, GEN_BUS], arange(ng))), (nb, ng))
+            P = Cg * Pg + om.userdata('Pbus0')
+            Va = get_dc_factors(baseMVA, bus, branch).angles(P) + \
+                bus[bus[:, BUS_TYPE] == REF, VA][0] * (pi / 180.0)
         f = f + C0
 
         ## update voltages & generator outputs
@@ -258,8 +272,17 @@ def dcopf_solver(om, ppopt, out_opt=None):
     bus[:, [LAM_P, LAM_Q, MU_VMIN, MU_VMAX]] = zeros((nb, 4))
     gen[:, [MU_PMIN, MU_PMAX, MU_QMIN, MU_QMAX]] = zeros((gen.shape[0], 4))
     branch[:, [MU_SF, MU_ST]] = zeros((nl, 2))
-    bus[:, LAM_P]       = (mu_u[ll["i1"]["Pmis"]:ll["iN"]["Pmis"]] -
+    if om.getN('var', 'Va'):
+        bus[:, LAM_P]   = (mu_u[ll["i1"]["Pmis"]:ll["iN"]["Pmis"]] -
                            mu_l[ll["i1"]["Pmis"]:ll["iN"]["Pmis"]]) / baseMVA
+    else:
+        ## PTDF formulation, system lambda less the congestion component,
+        ## PTDF[il, :]' * muF = inv(Bbus) * Bf[il, :]' * muF
+        lam = mu_u[ll["i1"]["Pbal"]] - mu_l[ll["i1"]["Pbal"]]
+        muF = mu_u[ll["i1"]["Pf"]:ll["iN"]["Pf"]] - \
+              mu_u[ll["i1"]["Pt"]:ll["iN"]["Pt"]]
+        bus[:, LAM_P]   = (lam - get_dc_factors(baseMVA, bus, branch).angles(
+                           Bf[il, :].T * muF)) / baseMVA
     branch[il, MU_SF]   = mu_u[ll["i1"]["Pf"]:ll["iN"]["Pf"]] / baseMVA
     branch[il, MU_ST]   = mu_u[ll["i1"]["Pt"]:ll["iN"]["Pt"]] / baseMVA
     gen[:, MU_PMIN]     = muLB[vv["i1"]["Pg"]:vv["iN"]["Pg"]] / baseMVA
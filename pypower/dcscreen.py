@@ -0,0 +1,103 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Screens branch outages for post-contingency overloads using DC line
+outage distribution factors.
+"""
+
+from numpy import arange, ones, zeros, asarray, isnan, argsort, r_, c_
+from numpy import flatnonzero as find
+
+from pypower.dc_factors import get_dc_factors
+
+from pypower.idx_brch import BR_STATUS, RATE_A
+
+
+def dcscreen(baseMVA, bus, branch, Pf, outages=None, monitored=None,
+             rate=None, chunk=256):
+    """Screens branch outages for post-contingency overloads using DC line
+    outage distribution factors.
+
+    Estimates the flows on the C{monitored} branches after the outage of
+    each of the branches in C{outages}, from the pre-outage real power
+    flows C{Pf} (in MW, e.g. from L{rundcpf} or L{runpf}) as::
+
+        Pf_post[l] = Pf[l] + LODF[l, k] * Pf[k]
+
+    and reports those exceeding C{rate} (in MW, default C{RATE_A}). If
+    C{outages} is an C{n x 2} matrix, the double outages of the pairs of
+    branches in its rows are screened instead, using the factors of
+    L{dc_factors.lodf2}. By default all in-service branches are outaged
+    and all branches are monitored, except those with a zero rating,
+    which are unlimited. The LODF columns are computed by the
+    L{dc_factors} object of the network (see L{get_dc_factors}), C{chunk}
+    outages at a time, so memory use is bounded by C{nl x chunk}. C{bus}
+    and C{branch} must use internal indexing.
+
+    Returns the overloads, as rows C{[k, l, Pf_post, loading]} with the
+    outaged branch C{k} (or C{[k, m, l, Pf_post, loading]} with the
+    outaged pair C{k, m}), monitored branch C{l}, its post-contingency
+    flow and its loading in percent of its rating, sorted by decreasing
+    loading, and the outages which island the network (which are not
+    screened).
+
+    Example::
+        r = rundcpf(ppc)
+        _, bus, gen, branch = ext2int1(r['bus'], r['gen'], r['branch'])
+        overloads, islands = dcscreen(r['baseMVA'], bus, branch,
+                                      branch[:, PF])
+
+    @see: L{dc_factors}, L{makeLODF}
+    """
+    nl = branch.shape[0]
+    Pf = asarray(Pf, float)
+    if rate is None:
+        rate = branch[:, RATE_A]
+    rate = asarray(rate, float) * ones(nl)
+    if outages is None:
+        outages = find(branch[:, BR_STATUS] > 0)
+    if monitored is None:
+        monitored = arange(nl)
+    outages = asarray(outages, int)
+    double = outages.ndim == 2
+    monitored = asarray(monitored, int)
+    monitored = monitored[rate[monitored] > 0]
+
+    dcf = get_dc_factors(baseMVA, bus, branch)
+    rows = r_[monitored, 0]     ## extra row, all columns nan if islanding
+
+    ovl = []
+    islands = []
+    for j in range(0, len(outages), chunk):
+        out = outages[j:j + chunk]
+        if double:
+            Lk, Lm = dcf.lodf2(out, rows)
+            isl = isnan(Lk[-1])
+            k, m = out[~isl, 0], out[~isl, 1]
+            dPf = Lk[:-1, ~isl] * Pf[k] + Lm[:-1, ~isl] * Pf[m]
+            cont = c_[k, m]
+        else:
+            L = dcf.lodf(out, rows)
+            isl = isnan(L[-1])
+            k = out[~isl]
+            dPf = L[:-1, ~isl] * Pf[k]
+            cont = k[:, None]
+
+        ## outages islanding the network
+        islands.append(out[isl])
+
+        ## post-contingency flows on the monitored branches
+        Ppost = Pf[monitored][:, None] + dPf
+        loading = 100 * abs(Ppost) / rate[monitored][:, None]
+        i, c = (loading > 100).nonzero()
+        ovl.append(c_[cont[c], monitored[i], Ppost[i, c], loading[i, c]])
+
+    ovl = r_[tuple(ovl)] if ovl else zeros((0, 4 + double))
+    ovl = ovl[argsort(-ovl[:, -1], kind='mergesort')]
+    if islands:
+        islands = r_[tuple(islands)].astype(int)
+    else:
+        islands = zeros((0, 2) if double else 0, int)
+
+    return ovl, islands
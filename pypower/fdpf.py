@@ -11,6 +11,7 @@ from numpy import array, angle, exp, linalg, conj, r_, Inf
 from scipy.sparse.linalg import splu
 
 from pypower.ppoption import ppoption
+from pypower.qlim_switch import qlim_switch
 
 
 def fdpf(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt=None):
@@ -30,10 +31,31 @@ def fdpf(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt=None):
     final complex voltages, a flag which indicates whether it converged
     or not, and the number of iterations performed.
 
+    To enforce generator reactive power limits inside the solver, use
+    L{fdpf_qlim}.
+
     @see: L{runpf}
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
+    V, converged, i, _ = fdpf_qlim(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq,
+                                   ppopt)
+
+    return V, converged, i
+
+
+def fdpf_qlim(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt=None, qlim=None):
+    """Solves the power flow using a fast decoupled method, enforcing
+    generator reactive power limits.
+
+    Same as L{fdpf}, except that if C{qlim} is given, generator reactive
+    power limits are enforced inside the solver by switching bus types as
+    in L{newtonpf_qlim}, after which C{B prime} and C{B double prime} are
+    reduced and factored again. Always returns the number of bus type
+    switches as a fourth value, zero without C{qlim}.
+
+    @see: L{fdpf}, L{runpf}
+    """
     if ppopt is None:
         ppopt = ppoption()
 
@@ -45,9 +67,14 @@ def fdpf(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt=None):
     ## initialize
     converged = 0
     i = 0
+    niq = 0         ## number of Q iterations at convergence
     V = V0
     Va = angle(V)
     Vm = abs(V)
+    nswitch = 0
+    if qlim is not None:
+        qlim_tol = max(ppopt['PF_QLIM_TOL'], tol)
+        Sbus = Sbus.copy()
 
     ## set up indexing for updating V
     #npv = len(pv)
@@ -73,15 +100,43 @@ def fdpf(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt=None):
             sys.stdout.write('\nConverged!\n')
 
     ## reduce B matrices
-    Bp = Bp[array([pvpq]).T, pvpq].tocsc() # splu requires a CSC matrix
-    Bpp = Bpp[array([pq]).T, pq].tocsc()
+    Bp0, Bpp0 = Bp, Bpp
+    Bp = Bp0[array([pvpq]).T, pvpq].tocsc() # splu requires a CSC matrix
+    Bpp = Bpp0[array([pq]).T, pq].tocsc()
 
     ## factor B matrices
     Bp_solver = splu(Bp)
     Bpp_solver = splu(Bpp)
 
     ## do P and Q iterations
-    while (not converged and i < max_it):
+    while True:
+        ## enforce Q limits, continuing from the current voltages
+        if qlim is not None and normP < qlim_tol and normQ < qlim_tol:
+            V, Sbus, pv, pq, n = qlim_switch(Ybus, V, Sbus, pv, pq, qlim,
+                                             verbose)
+            if n:
+                nswitch = nswitch + n
+                Vm = abs(V)
+                Va = angle(V)
+
+                ## new bus types, reduce and factor B matrices again
+                pvpq = r_[pv, pq]
+                Bp_solver = splu(Bp0[array([pvpq]).T, pvpq].tocsc())
+                Bpp_solver = splu(Bpp0[array([pq]).T, pq].tocsc())
+
+                mis = (V * conj(Ybus * V) - Sbus) / Vm
+                P = mis[pvpq].real
+                Q = mis[pq].imag
+                normP = linalg.norm(P, Inf)
+                normQ = linalg.norm(Q, Inf)
+                converged = normP < tol and normQ < tol
+                if verbose > 1:
+                    sys.stdout.write('\n  -  %3d   %10.3e   %10.3e   (%d bus '
+                                     'types switched)' % (i, normP, normQ, n))
+
+        if converged or i >= max_it:
+            break
+
         ## update iteration counter
         i = i + 1
 
@@ -101,14 +156,12 @@ def fdpf(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt=None):
         normP = linalg.norm(P, Inf)
         normQ = linalg.norm(Q, Inf)
         if verbose > 1:
-            sys.stdout.write("\n  %s  %3d   %10.3e   %10.3e" %
-                             (type,i, normP, normQ))
+            sys.stdout.write("\n  P  %3d   %10.3e   %10.3e" %
+                             (i, normP, normQ))
         if normP < tol and normQ < tol:
             converged = 1
-            if verbose:
-                sys.stdout.write('\nFast-decoupled power flow converged in %d '
-                    'P-iterations and %d Q-iterations.\n' % (i, i - 1))
-            break
+            niq = i - 1     ## converged after the P iteration
+            continue
 
         ##-----  do Q iteration, update Vm  -----
         dVm = -Bpp_solver.solve(Q)
@@ -129,14 +182,17 @@ def fdpf(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt=None):
             sys.stdout.write('\n  Q  %3d   %10.3e   %10.3e' % (i, normP, normQ))
         if normP < tol and normQ < tol:
             converged = 1
-            if verbose:
-                sys.stdout.write('\nFast-decoupled power flow converged in %d '
-                    'P-iterations and %d Q-iterations.\n' % (i, i))
-            break
+            niq = i
 
     if verbose:
         if not converged:
             sys.stdout.write('\nFast-decoupled power flow did not converge in '
                              '%d iterations.' % i)
-
-    return V, converged, i
+        elif i > 0:
+            sys.stdout.write('\nFast-decoupled power flow converged in %d '
+                             'P-iterations and %d Q-iterations.\n' % (i, niq))
+        if qlim is not None:
+            sys.stdout.write('%d bus type switches to enforce Q limits.\n' %
+                             nswitch)
+
+    return V, converged, i, nswitch
@@ -7,7 +7,7 @@
 
 import sys
 
-from numpy import linalg, conj, r_, Inf, asscalar
+from numpy import linalg, conj, r_, Inf
 
 from pypower.ppoption import ppoption
 
@@ -29,6 +29,13 @@ def gausspf(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
     a flag which indicates whether it converged or not, and the number
     of iterations performed.
 
+    The C{PF_GS_ALG} option selects the update scheme: C{'gs'} for
+    Gauss-Seidel, C{'sor'} for successive over-relaxation of the
+    Gauss-Seidel update by the factor C{PF_SOR_OMEGA}, or C{'jacobi'} for
+    the Jacobi method, which updates all buses at once from the voltages
+    of the previous iteration. Row products are computed directly from
+    the CSR arrays of C{Ybus}.
+
     @see: L{runpf}
 
     @author: Ray Zimmerman (PSERC Cornell)
@@ -42,19 +49,37 @@ def gausspf(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
     tol     = ppopt['PF_TOL']
     max_it  = ppopt['PF_MAX_IT_GS']
     verbose = ppopt['VERBOSE']
+    alg     = ppopt['PF_GS_ALG']
+
+    if alg == 'gs':
+        omega = 1.0
+    elif alg == 'sor':
+        omega = ppopt['PF_SOR_OMEGA']
+    elif alg != 'jacobi':
+        raise ValueError('gausspf: unknown PF_GS_ALG \'%s\'' % alg)
 
     ## initialize
     converged = 0
     i = 0
     V = V0.copy()
+    Sbus = Sbus.copy()
     #Va = angle(V)
     Vm = abs(V)
 
     ## set up indexing for updating V
     npv = len(pv)
-    npq = len(pq)
     pvpq = r_[pv, pq]
 
+    ## rows of Ybus as (values, column indices) slices of the CSR arrays
+    Ybus = Ybus.tocsr()
+    Ydiag = Ybus.diagonal()
+    if alg != 'jacobi':
+        ptr, ind, dat = Ybus.indptr, Ybus.indices, Ybus.data
+        rows = [(dat[ptr[k]:ptr[k + 1]], ind[ptr[k]:ptr[k + 1]])
+                for k in range(Ybus.shape[0])]
+        pq_list = pq.tolist()
+        pv_list = pv.tolist()
+
     ## evaluate F(x0)
     mis = V * conj(Ybus * V) - Sbus
     F = r_[  mis[pvpq].real,
@@ -76,20 +101,30 @@ def gausspf(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
         ## update iteration counter
         i = i + 1
 
-        ## update voltage
-        ## at PQ buses
-        for k in pq[list(range(npq))]:
-            tmp = (conj(Sbus[k] / V[k]) - Ybus[k, :] * V) / Ybus[k, k]
-            V[k] = V[k] + asscalar(tmp)
+        if alg == 'jacobi':
+            ## update all voltages from those of the previous iteration
+            Ibus = Ybus * V
+            if npv:
+                Sbus[pv] = Sbus[pv].real + 1j * (V[pv] * conj(Ibus[pv])).imag
+            V[pvpq] = V[pvpq] + (conj(Sbus[pvpq] / V[pvpq]) - Ibus[pvpq]) / \
+                Ydiag[pvpq]
+        else:
+            ## update voltage
+            ## at PQ buses
+            for k in pq_list:
+                y, c = rows[k]
+                tmp = (conj(Sbus[k] / V[k]) - y.dot(V[c])) / Ydiag[k]
+                V[k] = V[k] + omega * tmp
+
+            ## at PV buses
+            for k in pv_list:
+                y, c = rows[k]
+                Ik = y.dot(V[c])
+                Sbus[k] = Sbus[k].real + 1j * (V[k] * conj(Ik)).imag
+                tmp = (conj(Sbus[k] / V[k]) - Ik) / Ydiag[k]
+                V[k] = V[k] + omega * tmp
 
-        ## at PV buses
         if npv:
-            for k in pv[list(range(npv))]:
-                tmp = (V[k] * conj(Ybus[k,:] * V)).imag
-                Sbus[k] = Sbus[k].real + 1j * asscalar(tmp)
-                tmp = (conj(Sbus[k] / V[k]) - Ybus[k, :] * V) / Ybus[k, k]
-                V[k] = V[k] + asscalar(tmp)
-#               V[k] = Vm[k] * V[k] / abs(V[k])
             V[pv] = Vm[pv] * V[pv] / abs(V[pv])
 
         ## evalute F(x)
@@ -368,7 +368,7 @@ def eval_g(x, user_data=None):
     il    = user_data['il']
     A     = user_data['A']
 
-    hn, gn, _, _ = opf_consfcn(x, om, Ybus, Yf, Yt, ppopt, il)
+    hn, gn, _, _ = opf_consfcn(x, om, Ybus, Yf, Yt, ppopt, il, True)
 
     if A is not None and issparse(A):
         c = r_[gn, hn, A * x]
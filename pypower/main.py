@@ -36,7 +36,7 @@ CASES = {'case4gs': case4gs, 'case6ww': case6ww, 'case9': case9,
 
 
 def option_callback(option, opt, value, parser, *args, **kw_args):
-    if isinstance(value, str):
+    if isinstance(value, str) and option.choices is not None:
         if value in AFFIRMATIVE:
             value = True
         elif value in NEGATIVE:
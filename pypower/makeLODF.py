@@ -5,7 +5,7 @@
 """Builds the line outage distribution factor matrix.
 """
 
-from numpy import ones, diag, eye, r_, arange
+from numpy import ones, diag, fill_diagonal, r_, arange
 from scipy.sparse import csr_matrix as sparse
 
 from pypower.idx_brch import F_BUS, T_BUS
@@ -21,7 +21,10 @@ def makeLODF(branch, PTDF):
         H = makePTDF(baseMVA, bus, branch)
         LODF = makeLODF(branch, H)
 
-    @see: L{makePTDF}
+    For large networks, use L{dc_factors} to compute only selected columns
+    or tiles of the matrix.
+
+    @see: L{makePTDF}, L{dc_factors}
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
@@ -32,8 +35,11 @@ def makeLODF(branch, PTDF):
                       (r_[f, t], r_[arange(nl), arange(nl)])), (nb, nl))
 
     H = PTDF * Cft
-    h = diag(H, 0)
-    LODF = H / (ones((nl, nl)) - ones((nl, 1)) * h.T)
-    LODF = LODF - diag(diag(LODF)) - eye(nl, nl)
+    h = diag(H, 0).copy()
+
+    ## divide each column in place, no nl x nl temporaries
+    H /= 1 - h
+    LODF = H
+    fill_diagonal(LODF, -1)
 
     return LODF
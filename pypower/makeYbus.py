@@ -82,5 +82,6 @@ def makeYbus(baseMVA, bus, branch):
     ## build Ybus
     Ybus = Cf.T * Yf + Ct.T * Yt + \
         csr_matrix((Ysh, (range(nb), range(nb))), (nb, nb))
+    Ybus.sort_indices()     ## canonical format, shared by the derivatives
 
     return Ybus, Yf, Yt
@@ -0,0 +1,242 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Solves a multi-period optimal power flow with ramp limits.
+"""
+
+from os.path import dirname, join
+
+from numpy import zeros, ones, arange, tile, repeat, asarray, Inf, r_, \
+    flatnonzero as find
+from scipy.sparse import csr_matrix as sparse
+
+from pypower.loadcase import loadcase
+from pypower.ppoption import ppoption
+from pypower.opf import opf
+from pypower.totcost import totcost
+from pypower.add_userfcn import add_userfcn
+from pypower.e2i_field import e2i_field
+from pypower.i2e_field import i2e_field
+
+from pypower.idx_bus import BUS_I, PD, QD
+from pypower.idx_gen import GEN_BUS, PG, QG, PMAX, GEN_STATUS, RAMP_30
+from pypower.idx_brch import F_BUS, T_BUS
+from pypower.idx_cost import MODEL, PW_LINEAR
+
+
+def mpopf(casedata=None, pd=None, qd=None, pmax=None, ramp=None,
+          ppopt=None):
+    """Solves a multi-period optimal power flow with ramp limits.
+
+    Solves the OPF of one period per row of the profile matrices C{pd} and
+    C{qd} (C{nt x nb}, real and reactive load in MW and MVAr of each bus of
+    the case, in the order of the rows of its C{bus} matrix) and C{pmax}
+    (C{nt x ng}, maximum real power output in MW of each generator, in the
+    order of the rows of its C{gen} matrix) as a single problem, where the
+    real power output of each generator may change by at most C{ramp} MW
+    from one period to the next. Any profile which is not given is held at
+    the value of the case. C{ramp} (C{ng}, in the order of the rows of
+    C{gen}) defaults to twice the C{RAMP_30} column of C{gen}, i.e. to
+    hourly periods, and generators with a zero or infinite ramp limit are
+    not limited.
+
+    The network of the case is replicated once per period, with the buses
+    of period C{t} numbered after those of period C{t-1}, and the ramp
+    limits are added as linear constraints on C{Pg} by userfcn callbacks
+    (see L{add_userfcn}). The resulting case is solved by L{opf}, AC or DC
+    depending on C{PF_DC}, with any of its solvers. Its constraint matrices
+    are block diagonal, one block per period, coupled only by the ramp
+    rows, so the sparse factorizations of the solvers take time nearly
+    linear in the number of periods.
+
+    Returns the C{results} dict of L{opf} for the replicated case, with
+    the additional fields:
+        - C{periods}   list of the C{nt} results of each period, dicts with
+          the C{baseMVA}, C{bus}, C{gen}, C{branch} and C{gencost} of the
+          case and the cost C{f} of the period
+        - C{ramp}      dict with the ramp limits and their shadow prices
+            - C{lim}       C{ng}, ramp limits (MW)
+            - C{mu}
+                - C{l}     C{ng x nt-1}, on the lower ramp limits from
+                  period C{t} to C{t+1} ($/MW)
+                - C{u}     C{ng x nt-1}, on the upper ramp limits ($/MW)
+
+    @see: L{opf}, L{runtspf}
+    """
+    ## default arguments
+    if casedata is None:
+        casedata = join(dirname(__file__), 'case9')
+    ppopt = ppoption(ppopt)
+
+    ## read data
+    ppc = loadcase(casedata)
+    baseMVA, bus, gen, branch, gencost = ppc['baseMVA'], ppc['bus'], \
+        ppc['gen'], ppc['branch'], ppc['gencost']
+    nb, ng, nl = bus.shape[0], gen.shape[0], branch.shape[0]
+
+    ## number of periods
+    nt = [p.shape[0] for p in (pd, qd, pmax) if p is not None]
+    if not nt:
+        raise ValueError('mpopf: no profile given')
+    nt = nt[0]
+
+    ## ramp limits
+    if ramp is None:
+        ramp = 2 * gen[:, RAMP_30] if gen.shape[1] > RAMP_30 else zeros(ng)
+    ramp = asarray(ramp, float)
+    lim = ramp.copy()
+    lim[lim <= 0] = Inf
+
+    ##-----  replicate the network  -----
+    off = int(bus[:, BUS_I].max()) + 1  ## bus number offset of each period
+    bus_t = tile(bus, (nt, 1))
+    gen_t = tile(gen, (nt, 1))
+    branch_t = tile(branch, (nt, 1))
+    bus_t[:, BUS_I] += repeat(arange(nt) * off, nb)
+    gen_t[:, GEN_BUS] += repeat(arange(nt) * off, ng)
+    branch_t[:, F_BUS] += repeat(arange(nt) * off, nl)
+    branch_t[:, T_BUS] += repeat(arange(nt) * off, nl)
+    if pd is not None:
+        bus_t[:, PD] = asarray(pd, float).ravel()
+    if qd is not None:
+        bus_t[:, QD] = asarray(qd, float).ravel()
+    if pmax is not None:
+        gen_t[:, PMAX] = asarray(pmax, float).ravel()
+
+    ## real power costs of all periods, then reactive power costs
+    gencost_t = tile(gencost[:ng], (nt, 1))
+    if gencost.shape[0] == 2 * ng:
+        gencost_t = r_[gencost_t, tile(gencost[ng:], (nt, 1))]
+
+    mpc = {'version': '2', 'baseMVA': baseMVA, 'bus': bus_t, 'gen': gen_t,
+           'branch': branch_t, 'gencost': gencost_t,
+           'mpopf': {'nt': nt, 'ng': ng,
+                     'period': repeat(arange(nt), ng),
+                     'gen': tile(arange(ng), nt),
+                     'ramp': tile(lim, nt)}}
+    mpc = add_userfcn(mpc, 'ext2int', userfcn_mpopf_ext2int)
+    mpc = add_userfcn(mpc, 'formulation', userfcn_mpopf_formulation)
+    mpc = add_userfcn(mpc, 'int2ext', userfcn_mpopf_int2ext)
+
+    ##-----  solve all periods at once  -----
+    results = opf(mpc, ppopt)
+
+    ##-----  split the results by period  -----
+    periods = []
+    for t in range(nt):
+        b = results['bus'][t * nb:(t + 1) * nb].copy()
+        g = results['gen'][t * ng:(t + 1) * ng].copy()
+        br = results['branch'][t * nl:(t + 1) * nl].copy()
+        b[:, BUS_I] -= t * off
+        g[:, GEN_BUS] -= t * off
+        br[:, F_BUS] -= t * off
+        br[:, T_BUS] -= t * off
+
+        ## cost of the in-service generators
+        on = find(g[:, GEN_STATUS] > 0)
+        f = sum(totcost(gencost[on], g[on, PG]))
+        if gencost.shape[0] == 2 * ng:
+            f += sum(totcost(gencost[ng + on], g[on, QG]))
+
+        periods.append({'baseMVA': baseMVA, 'bus': b, 'gen': g,
+                        'branch': br, 'gencost': gencost.copy(), 'f': f})
+
+    results['periods'] = periods
+    results['ramp']['lim'] = ramp
+
+    return results
+
+
+def userfcn_mpopf_ext2int(ppc, *args):
+    """This is the 'ext2int' stage userfcn callback that converts the
+    period, index in the period and ramp limit of each generator of the
+    replicated case, in C{ppc['mpopf']}, to internal indexing. The
+    optional args are not currently used.
+    """
+    ppc = e2i_field(ppc, ['mpopf', 'period'], 'gen')
+    ppc = e2i_field(ppc, ['mpopf', 'gen'], 'gen')
+    ppc = e2i_field(ppc, ['mpopf', 'ramp'], 'gen')
+
+    return ppc
+
+
+def userfcn_mpopf_formulation(om, *args):
+    """This is the 'formulation' stage userfcn callback that adds the ramp
+    limits between the real power outputs of each generator in consecutive
+    periods, as the linear constraints 'ramp'. Generators which are out of
+    service in either period are not limited. The period and generator of
+    each constraint are saved as the 'ramp' userdata of C{om}, and the
+    period of each variable as its 'blocks' userdata, for the solver to
+    factorize the problem period by period (see L{pips_kkt}). The optional
+    args are not currently used.
+    """
+    ppc = om.get_ppc()
+    r = ppc['mpopf']
+    ng = ppc['gen'].shape[0]    ## number of on-line gens of all periods
+    nt, ng0 = r['nt'], r['ng']
+    period = r['period'].astype(int)
+    vv, _, _, _ = om.get_idx()
+
+    ## period of each variable, others after all periods
+    nb0 = ppc['order']['ext']['bus'].shape[0] // nt
+    bus_period = ppc['order']['bus']['status']['on'] // nb0
+    ipwl = find(ppc['gencost'][:, MODEL] == PW_LINEAR)
+    blocks = zeros(om.var['N'], int) + nt
+    for name, p in [('Va', bus_period), ('Vm', bus_period), ('Pg', period),
+                    ('Qg', period), ('y', period[ipwl % ng])]:
+        if om.getN('var', name):
+            blocks[vv['i1'][name]:vv['iN'][name]] = p
+    om.userdata('blocks', blocks)
+
+    ## internal index of each gen of each period, -1 if out of service
+    k = period * ng0 + r['gen'].astype(int)
+    igen = -ones(nt * ng0 + ng0, int)
+    igen[k] = arange(ng)
+
+    ## pairs of on-line gens with a ramp limit in consecutive periods
+    i = find((period < nt - 1) & (r['ramp'] < Inf))
+    j = igen[k[i] + ng0]
+    i, j = i[j >= 0], j[j >= 0]
+    nr = len(i)
+    if nr == 0:
+        return om
+
+    Ar = sparse((r_[ones(nr), -ones(nr)], (r_[arange(nr), arange(nr)],
+                                           r_[j, i])), (nr, ng))
+    lr = r['ramp'][i] / ppc['baseMVA']
+    om.add_constraints('ramp', Ar, -lr, lr, ['Pg'])
+    om.userdata('ramp', {'period': period[i],
+                         'gen': r['gen'][i].astype(int)})
+
+    return om
+
+
+def userfcn_mpopf_int2ext(results, *args):
+    """This is the 'int2ext' stage userfcn callback that converts the data
+    in C{results['mpopf']} back to external indexing and saves the shadow
+    prices of the 'ramp' constraints in C{results['ramp']['mu']}. The
+    optional args are not currently used.
+    """
+    r = results['mpopf']
+    nt, ng0 = r['nt'], r['ng']
+    om = results['om']
+    _, ll, _, _ = om.get_idx()
+
+    results = i2e_field(results, ['mpopf', 'period'], ordering='gen')
+    results = i2e_field(results, ['mpopf', 'gen'], ordering='gen')
+    results = i2e_field(results, ['mpopf', 'ramp'], ordering='gen')
+
+    ## shadow prices, by generator and period
+    mu_l = zeros((ng0, max(nt - 1, 0)))
+    mu_u = zeros((ng0, max(nt - 1, 0)))
+    if om.getN('lin', 'ramp'):
+        rows = om.userdata('ramp')
+        kr = arange(ll['i1']['ramp'], ll['iN']['ramp'])
+        mu_l[rows['gen'], rows['period']] = \
+            results['mu']['lin']['l'][kr] / results['baseMVA']
+        mu_u[rows['gen'], rows['period']] = \
+            results['mu']['lin']['u'][kr] / results['baseMVA']
+    results['ramp'] = {'mu': {'l': mu_l, 'u': mu_u}}
+
+    return results
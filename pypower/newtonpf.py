@@ -7,13 +7,12 @@
 
 import sys
 
-from numpy import array, angle, exp, linalg, conj, r_, Inf
+from numpy import angle, exp, linalg, conj, r_, dot, roots, isreal, Inf
 
-from scipy.sparse import hstack, vstack
-from scipy.sparse.linalg import spsolve
-
-from pypower.dSbus_dV import dSbus_dV
+from pypower.pf_jacobian import pf_jacobian
+from pypower.pf_linsolver import get_linsolver
 from pypower.ppoption import ppoption
+from pypower.qlim_switch import qlim_switch
 
 
 def newtonpf(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
@@ -33,10 +32,52 @@ def newtonpf(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
     flag which indicates whether it converged or not, and the number of
     iterations performed.
 
+    With the C{PF_JAC_REUSE} option set, the factors of the Jacobian are
+    kept between iterations (and, if set to 2, from the previous call with
+    the same Jacobian structure) and the Jacobian is only rebuilt and
+    refactorized when the ratio of the previous to the new mismatch norm
+    falls below C{PF_JAC_REUSE_RATIO}. A step with old factors which
+    increases the mismatch is rejected and followed by a refactorization.
+    Iterations with old factors count against C{PF_MAX_IT}, so the last
+    allowed iteration always refactorizes.
+
+    The C{PF_NR_STEP} option controls the length of the steps, to help
+    heavily loaded or badly initialized cases converge. With 1, the
+    Newton step C{dx} is scaled by the Iwamoto optimal multiplier, which
+    minimizes the norm of the quadratic approximation of the mismatch
+    along C{dx} built from the mismatches at C{x} and C{x + dx}. With 2,
+    the step is shortened by backtracking, up to C{PF_NR_LS_MAX_IT}
+    times, until the 2-norm of the mismatch decreases sufficiently. The
+    multiplier costs one extra mismatch evaluation per iteration, the
+    line search one per step reduction and none when the full step is
+    accepted.
+
+    To enforce generator reactive power limits inside the solver, use
+    L{newtonpf_qlim}.
+
     @see: L{runpf}
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
+    V, converged, i, _ = newtonpf_qlim(Ybus, Sbus, V0, ref, pv, pq, ppopt)
+
+    return V, converged, i
+
+
+def newtonpf_qlim(Ybus, Sbus, V0, ref, pv, pq, ppopt=None, qlim=None):
+    """Solves the power flow using a full Newton's method, enforcing
+    generator reactive power limits.
+
+    Same as L{newtonpf}, except that if C{qlim} is given (see
+    L{qlim_buses}), generator reactive power limits are enforced inside
+    the solver: once the mismatch is below C{PF_QLIM_TOL}, PV buses
+    violating their limits are switched to PQ (and, with
+    C{PF_QLIM_BACKSWITCH}, back again, see L{qlim_switch}) and the
+    iterations continue from the current voltages. Always returns the
+    number of bus type switches as a fourth value, zero without C{qlim}.
+
+    @see: L{newtonpf}, L{runpf}
+    """
     ## default arguments
     if ppopt is None:
         ppopt = ppoption()
@@ -45,6 +86,10 @@ def newtonpf(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
     tol     = ppopt['PF_TOL']
     max_it  = ppopt['PF_MAX_IT']
     verbose = ppopt['VERBOSE']
+    reuse   = ppopt['PF_JAC_REUSE']
+    ratio   = ppopt['PF_JAC_REUSE_RATIO']
+    step_ctl  = ppopt['PF_NR_STEP']
+    ls_max_it = ppopt['PF_NR_LS_MAX_IT']
 
     ## initialize
     converged = 0
@@ -52,14 +97,19 @@ def newtonpf(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
     V = V0
     Va = angle(V)
     Vm = abs(V)
+    nswitch = 0
+    if qlim is not None:
+        qlim_tol = max(ppopt['PF_QLIM_TOL'], tol)
+        Sbus = Sbus.copy()
 
-    ## set up indexing for updating V
-    pvpq = r_[pv, pq]
-    npv = len(pv)
-    npq = len(pq)
-    j1 = 0;         j2 = npv           ## j1:j2 - V angle of pv buses
-    j3 = j2;        j4 = j2 + npq      ## j3:j4 - V angle of pq buses
-    j5 = j4;        j6 = j4 + npq      ## j5:j6 - V mag of pq buses
+    ## Jacobian structure, values are refilled on each iteration
+    jac = pf_jacobian(Ybus, pv, pq)
+    linsolver = get_linsolver(jac.J, ppopt)
+    stats0 = linsolver.stats.copy()
+
+    ## start from the factors of the previous call?
+    refactor = not (reuse > 1 and linsolver.factored)
+    skipped = 0
 
     ## evaluate F(x0)
     mis = V * conj(Ybus * V) - Sbus
@@ -73,61 +123,179 @@ def newtonpf(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
         sys.stdout.write('\n it    max P & Q mismatch (p.u.)')
         sys.stdout.write('\n----  ---------------------------')
         sys.stdout.write('\n%3d        %10.3e' % (i, normF))
-    if normF < tol:
-        converged = 1
-        if verbose > 1:
-            sys.stdout.write('\nConverged!\n')
 
     ## do Newton iterations
-    while (not converged and i < max_it):
-        ## update iteration counter
-        i = i + 1
+    while True:
+        ## enforce Q limits, continuing from the current voltages
+        if qlim is not None and normF < qlim_tol:
+            V, Sbus, pv, pq, n = qlim_switch(Ybus, V, Sbus, pv, pq, qlim,
+                                             verbose)
+            if n:
+                nswitch = nswitch + n
+                Vm = abs(V)
+                Va = angle(V)
 
-        ## evaluate Jacobian
-        dS_dVm, dS_dVa = dSbus_dV(Ybus, V)
+                ## new bus types and Jacobian structure
+                jac = pf_jacobian(Ybus, pv, pq)
+                linsolver = get_linsolver(jac.J, ppopt)
+                stats0 = linsolver.stats.copy()
+                refactor = True
 
-        J11 = dS_dVa[array([pvpq]).T, pvpq].real
-        J12 = dS_dVm[array([pvpq]).T, pq].real
-        J21 = dS_dVa[array([pq]).T, pvpq].imag
-        J22 = dS_dVm[array([pq]).T, pq].imag
+                mis = V * conj(Ybus * V) - Sbus
+                F = r_[  mis[pv].real,
+                         mis[pq].real,
+                         mis[pq].imag  ]
+                normF = linalg.norm(F, Inf)
+                if verbose > 1:
+                    sys.stdout.write('\n%3d        %10.3e   (%d bus types '
+                                     'switched)' % (i, normF, n))
 
-        J = vstack([
-                hstack([J11, J12]),
-                hstack([J21, J22])
-            ], format="csr")
+        ## check for convergence
+        if normF < tol:
+            converged = 1
+            if i == 0:
+                if verbose > 1:
+                    sys.stdout.write('\nConverged!\n')
+            elif verbose:
+                sys.stdout.write("\nNewton's method power flow converged in "
+                                 "%d iterations.\n" % i)
+            break
+        if i >= max_it:
+            break
+
+        ## update iteration counter
+        i = i + 1
+
+        ## evaluate and factor Jacobian, unless the last factors are kept
+        if refactor:
+            J = jac.update(V)
+            linsolver.factor(J)
+        else:
+            skipped = skipped + 1
 
         ## compute update step
-        dx = -1 * spsolve(J, F)
+        dx = -1 * linsolver.solve(F)
+        Vprev, Fprev, normFprev = V, F, normF
 
         ## update voltage
-        if npv:
-            Va[pv] = Va[pv] + dx[j1:j2]
-        if npq:
-            Va[pq] = Va[pq] + dx[j3:j4]
-            Vm[pq] = Vm[pq] + dx[j5:j6]
-        V = Vm * exp(1j * Va)
-        Vm = abs(V)            ## update Vm and Va again in case
-        Va = angle(V)          ## we wrapped around with a negative Vm
-
-        ## evalute F(x)
-        mis = V * conj(Ybus * V) - Sbus
-        F = r_[  mis[pv].real,
-                 mis[pq].real,
-                 mis[pq].imag  ]
+        Va0, Vm0 = Va, Vm
+        V, Va, Vm, F = _step(Ybus, Sbus, Va0, Vm0, dx, 1, pv, pq)
+        mu = 1
+
+        ## step length control, F(x + dx) is the extra mismatch evaluation
+        if step_ctl == 1:
+            ## Iwamoto optimal multiplier
+            mu = _iwamoto(Fprev, F)
+            if mu != 1:
+                V, Va, Vm, F = _step(Ybus, Sbus, Va0, Vm0, dx, mu, pv, pq)
+        elif step_ctl == 2:
+            ## backtracking on the 2-norm of the mismatch, the reduction of
+            ## the step minimizes its quadratic model, within [0.1, 0.5]
+            n0 = dot(Fprev, Fprev)
+            n1 = dot(F, F)
+            k = 0
+            while n1 > (1 - 2e-4 * mu) * n0 and k < ls_max_it:
+                mu = mu * min(max(n0 / (n0 + n1), 0.1), 0.5)
+                V, Va, Vm, F = _step(Ybus, Sbus, Va0, Vm0, dx, mu, pv, pq)
+                n1 = dot(F, F)
+                k = k + 1
 
-        ## check for convergence
         normF = linalg.norm(F, Inf)
         if verbose > 1:
             sys.stdout.write('\n%3d        %10.3e' % (i, normF))
-        if normF < tol:
-            converged = 1
-            if verbose:
-                sys.stdout.write("\nNewton's method power flow converged in "
-                                 "%d iterations.\n" % i)
+            if not refactor:
+                sys.stdout.write('   (reused J)')
+            if mu != 1:
+                sys.stdout.write('   (step %.3f)' % mu)
+
+        if reuse:
+            if not refactor and normF > normFprev:
+                ## step with old factors increased the mismatch, undo it
+                V, F, normF = Vprev, Fprev, normFprev
+                Vm = abs(V)
+                Va = angle(V)
+                if verbose > 1:
+                    sys.stdout.write(', rejected')
+                refactor = True     ## do not repeat the same step
+            else:
+                ## refactorize when mismatch reduction ratio is below
+                ## threshold, and always for the last iteration
+                refactor = normFprev < ratio * normF or i + 1 >= max_it
 
     if verbose:
         if not converged:
             sys.stdout.write("\nNewton's method power did not converge in %d "
                              "iterations.\n" % i)
+        if reuse:
+            sys.stdout.write('Jacobian reused (factorization skipped) in %d '
+                             'of %d iterations.\n' % (skipped, i))
+        if qlim is not None:
+            sys.stdout.write('%d bus type switches to enforce Q limits.\n' %
+                             nswitch)
+    if verbose > 1:
+        st = linsolver.stats
+        sys.stdout.write('Linear solver (%s): %d factorizations in %.4f s, '
+                         '%d solves in %.4f s\n' % (linsolver.name,
+            st['factor'] - stats0['factor'],
+            st['factor_time'] - stats0['factor_time'],
+            st['solve'] - stats0['solve'],
+            st['solve_time'] - stats0['solve_time']))
 
-    return V, converged, i
+    return V, converged, i, nswitch
+
+
+def _step(Ybus, Sbus, Va0, Vm0, dx, mu, pv, pq):
+    """Voltages and mismatch after a step of C{mu * dx} from C{Va0} and
+    C{Vm0}.
+    """
+    ## set up indexing for updating V
+    npv = len(pv)
+    npq = len(pq)
+    j1 = 0;         j2 = npv           ## j1:j2 - V angle of pv buses
+    j3 = j2;        j4 = j2 + npq      ## j3:j4 - V angle of pq buses
+    j5 = j4;        j6 = j4 + npq      ## j5:j6 - V mag of pq buses
+
+    ## update voltage
+    Va = Va0.copy()
+    Vm = Vm0.copy()
+    if npv:
+        Va[pv] = Va[pv] + mu * dx[j1:j2]
+    if npq:
+        Va[pq] = Va[pq] + mu * dx[j3:j4]
+        Vm[pq] = Vm[pq] + mu * dx[j5:j6]
+    V = Vm * exp(1j * Va)
+    Vm = abs(V)            ## update Vm and Va again in case
+    Va = angle(V)          ## we wrapped around with a negative Vm
+
+    ## evalute F(x)
+    mis = V * conj(Ybus * V) - Sbus
+    F = r_[  mis[pv].real,
+             mis[pq].real,
+             mis[pq].imag  ]
+
+    return V, Va, Vm, F
+
+
+def _iwamoto(a, F1):
+    """Iwamoto optimal multiplier.
+
+    With C{a} the mismatch at C{x} and C{F1} the mismatch at C{x + dx},
+    the mismatch along the Newton step is approximated by::
+
+        F(x + mu * dx) = (1 - mu) * a + mu**2 * F1
+
+    and the returned C{mu} is the root of the derivative of its squared
+    norm, a cubic, which minimizes it. Returns 1 if there is no such root
+    in C{(0, 2]}.
+    """
+    g0 = dot(a, a)
+    g1 = dot(a, F1)
+    g2 = dot(F1, F1)
+    r = roots([4 * g2, -6 * g1, 2 * g0 + 4 * g1, -2 * g0])
+    r = r[isreal(r)].real
+    r = r[(r > 0) & (r <= 2)]
+    if len(r) == 0:
+        return 1
+
+    f = (1 - r)**2 * g0 + 2 * r**2 * (1 - r) * g1 + r**4 * g2
+    return r[f.argmin()]
@@ -0,0 +1,178 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Solves the power flow using a Newton's method on the current injection
+equations in cartesian coordinates.
+"""
+
+import sys
+
+from numpy import arange, zeros, conj, r_, unique, bincount, cumsum, linalg, \
+    Inf
+from scipy.sparse import csr_matrix as sparse
+
+from pypower.pf_linsolver import get_linsolver
+from pypower.ppoption import ppoption
+
+
+def newtonpf_I_cart(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
+    """Solves the power flow using a Newton's method on the current injection
+    equations in cartesian coordinates.
+
+    Same arguments and return values as L{newtonpf}. The unknowns are the
+    real and imaginary parts C{e} and C{f} of the voltages of the PV and
+    PQ buses and the reactive power injections C{Q} of the PV buses, and
+    the equations are the real and imaginary parts of the current
+    mismatches::
+
+        dI = conj(Sbus ./ V) - Ybus * V
+
+    at the PV and PQ buses, with C{Sbus = P + j Q} at the PV buses, and
+    C{e**2 + f**2 = Vm**2} at the PV buses. The derivatives of
+    C{Ybus * V} are the constant blocks C{G} and C{B} of C{Ybus}, so the
+    Jacobian structure and its constant values are built once and each
+    iteration only updates the diagonal terms of the load currents and
+    the entries of the PV bus voltage magnitude equations and C{Q}
+    variables. The convergence test is on the power mismatch, as for
+    L{newtonpf}.
+
+    @see: L{newtonpf}, L{runpf}
+    """
+    ## default arguments
+    if ppopt is None:
+        ppopt = ppoption()
+
+    ## options
+    tol     = ppopt['PF_TOL']
+    max_it  = ppopt['PF_MAX_IT']
+    verbose = ppopt['VERBOSE']
+
+    ## set up indexing
+    Ybus = Ybus.tocsr()
+    pvpq = r_[pv, pq]
+    n = len(pvpq)
+    npv = len(pv)
+    j1 = 0;         j2 = n             ## j1:j2 - e of pv and pq buses
+    j3 = j2;        j4 = j2 + n        ## j3:j4 - f of pv and pq buses
+    j5 = j4;        j6 = j4 + npv      ## j5:j6 - Q of pv buses
+
+    ## initialize, Q of pv buses from the initial voltages
+    converged = 0
+    i = 0
+    V = V0.copy()
+    Vm2 = abs(V0[pv])**2               ## squared voltage set points
+    S = Sbus[pvpq].copy()
+    S[:npv] = S[:npv].real + 1j * (V[pv] * conj(Ybus[pv, :] * V)).imag
+
+    ## Jacobian structure with its constant values
+    J, J0, slots = _jacobian(Ybus, pv, pq)
+    linsolver = get_linsolver(J, ppopt)
+
+    ## evaluate F(x0) and the power mismatch
+    F, normF = _mismatch(Ybus, V, S, pvpq, pv, Vm2)
+
+    if verbose > 1:
+        sys.stdout.write('\n it    max P & Q mismatch (p.u.)')
+        sys.stdout.write('\n----  ---------------------------')
+        sys.stdout.write('\n%3d        %10.3e' % (i, normF))
+    if normF < tol:
+        converged = 1
+        if verbose > 1:
+            sys.stdout.write('\nConverged!\n')
+
+    ## do Newton iterations
+    while (not converged and i < max_it):
+        ## update iteration counter
+        i = i + 1
+
+        ## update the variable terms of the Jacobian
+        ##   d(conj(S ./ V))/de = -conj(S ./ V.^2),  d/df = j * conj(S ./ V.^2)
+        ##   d(conj(S ./ V))/dQ = -j ./ conj(V)      (pv buses)
+        D = -conj(S / V[pvpq]**2)
+        dQ = -1j / conj(V[pv])
+        J.data[:] = J0
+        J.data[slots] += r_[D.real, D.imag, D.imag, -D.real,
+                            dQ.real, dQ.imag,
+                            2 * V[pv].real, 2 * V[pv].imag]
+
+        ## compute update step
+        linsolver.factor(J)
+        dx = -1 * linsolver.solve(F)
+
+        ## update voltage and Q of pv buses
+        V[pvpq] = V[pvpq] + dx[j1:j2] + 1j * dx[j3:j4]
+        S[:npv] = S[:npv] + 1j * dx[j5:j6]
+
+        ## evalute F(x)
+        F, normF = _mismatch(Ybus, V, S, pvpq, pv, Vm2)
+
+        if verbose > 1:
+            sys.stdout.write('\n%3d        %10.3e' % (i, normF))
+        if normF < tol:
+            converged = 1
+            if verbose:
+                sys.stdout.write('\nNewton\'s method power flow (current '
+                                 'injection) converged in %d iterations.\n' % i)
+
+    if verbose:
+        if not converged:
+            sys.stdout.write('\nNewton\'s method power flow (current '
+                             'injection) did not converge in %d iterations.\n'
+                             % i)
+
+    return V, converged, i
+
+
+def _mismatch(Ybus, V, S, pvpq, pv, Vm2):
+    """Current mismatch equations and the max power mismatch.
+    """
+    dI = conj(S / V[pvpq]) - (Ybus * V)[pvpq]
+    dV = abs(V[pv])**2 - Vm2
+    dS = V[pvpq] * conj(dI)
+
+    return r_[dI.real, dI.imag, dV], linalg.norm(r_[dS.real, dS.imag, dV], Inf)
+
+
+def _jacobian(Ybus, pv, pq):
+    """Builds the CSR structure of the current injection Jacobian::
+
+        J = | dIr/de  dIr/df  dIr/dQ |
+            | dIi/de  dIi/df  dIi/dQ |
+            | dV/de   dV/df     0    |
+
+    Returns the Jacobian with the constant (C{Ybus}) terms as values, a
+    copy of these values and the positions in its data of the variable
+    terms, in the order of the diagonal terms of the four C{I} by C{V}
+    blocks, the C{Q} column and the C{e} and C{f} terms of the voltage
+    rows.
+    """
+    pvpq = r_[pv, pq]
+    n = len(pvpq)
+    npv = len(pv)
+    nj = 2 * n + npv
+
+    ## constant terms, -d(Ybus * V)/de = -(G + jB), -d(Ybus * V)/df = B - jG
+    Y = Ybus[pvpq, :][:, pvpq].tocoo()
+    G, B = Y.data.real, Y.data.imag
+    rows = [Y.row, Y.row, n + Y.row, n + Y.row]
+    cols = [Y.col, n + Y.col, Y.col, n + Y.col]
+    vals = [-G, B, -B, -G]
+    nc = 4 * len(Y.data)
+
+    ## variable terms
+    k = arange(n)
+    kv = arange(npv)                    ## pv buses are first in pvpq
+    rows += [k, n + k, k, n + k, kv, n + kv, 2 * n + kv, 2 * n + kv]
+    cols += [k, k, n + k, n + k, 2 * n + kv, 2 * n + kv, kv, n + kv]
+    rows, cols = r_[tuple(rows)], r_[tuple(cols)]
+    vals = r_[tuple(vals) + (zeros(len(rows) - nc),)]
+
+    ## merge duplicates into CSR order
+    key, pos = unique(rows * nj + cols, return_inverse=True)
+    r = key // nj
+    indptr = r_[0, cumsum(bincount(r, minlength=nj))]
+    J0 = bincount(pos, weights=vals, minlength=len(key))
+    J = sparse((J0.copy(), key % nj, indptr), (nj, nj))
+
+    return J, J0, pos[nc:]
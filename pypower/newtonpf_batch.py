@@ -0,0 +1,205 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Solves a batch of power flows sharing one network using Newton's method.
+"""
+
+import sys
+
+from numpy import array, angle, exp, conj, r_, c_, ix_, arange, zeros, \
+    ones, empty, asarray, newaxis, isfinite, nan, flatnonzero as find
+
+from scipy.sparse import kron, identity
+
+from pypower.pf_jacobian import pf_jacobian
+from pypower.pf_linsolver import get_linsolver
+from pypower.ppoption import ppoption
+
+
+def newtonpf_batch(Ybus, Sbus, V0, ref, pv, pq, ppopt=None):
+    """Solves a batch of power flows sharing one network using Newton's
+    method.
+
+    Same as L{newtonpf} except that C{Sbus} and C{V0} are C{nb x ns}
+    matrices whose columns define C{ns} independent scenarios on the
+    network described by the single admittance matrix C{Ybus}. Either of
+    them may also be given as a single vector, which is then used for
+    every scenario. The bus type index lists C{ref}, C{pv} and C{pq} are
+    common to all scenarios.
+
+    The scenarios which have not yet converged are stacked into one
+    block-diagonal system, so mismatches, Jacobians and Newton updates
+    are evaluated for all of them at once with a single sparse
+    factorization per iteration. Converged scenarios are dropped from the
+    stack as soon as their mismatch falls below C{PF_TOL}. If the stacked
+    Jacobian is singular, the update is computed one scenario at a time
+    instead, and scenarios with a singular Jacobian or a non-finite update
+    or mismatch are marked as failed and dropped from the stack, without
+    affecting the others.
+
+    Returns the C{nb x ns} matrix of final complex voltages, a boolean
+    vector of per-scenario convergence flags and a vector with the number
+    of iterations performed for each scenario.
+
+    @see: L{newtonpf}
+    """
+    ## default arguments
+    if ppopt is None:
+        ppopt = ppoption()
+
+    ## options
+    tol     = ppopt['PF_TOL']
+    max_it  = ppopt['PF_MAX_IT']
+    verbose = ppopt['VERBOSE']
+
+    ## scenarios as columns
+    Sbus = asarray(Sbus, dtype=complex)
+    V0 = asarray(V0, dtype=complex)
+    if Sbus.ndim == 1:
+        Sbus = Sbus[:, newaxis]
+    if V0.ndim == 1:
+        V0 = V0[:, newaxis]
+    nb = Ybus.shape[0]
+    ns = max(Sbus.shape[1], V0.shape[1])
+    Sbus = Sbus * ones((1, ns))
+    V = V0 * ones((1, ns))
+
+    ## initialize
+    i = 0
+    Va = angle(V)
+    Vm = abs(V)
+    iterations = zeros(ns, int)
+    failed = zeros(ns, bool)
+
+    ## set up indexing for updating V
+    npv = len(pv)
+    npq = len(pq)
+    j1 = 0;         j2 = npv           ## j1:j2 - V angle of pv buses
+    j3 = j2;        j4 = j2 + npq      ## j3:j4 - V angle of pq buses
+    j5 = j4;        j6 = j4 + npq      ## j5:j6 - V mag of pq buses
+    k = arange(ns)[:, newaxis]         ## scenario numbers, to index blk
+
+    ## evaluate F(x0)
+    mis = V * conj(Ybus * V) - Sbus
+    normF = _mismatch_norm(mis, pv, pq)
+
+    ## check tolerance
+    converged = normF < tol
+    if verbose > 1:
+        sys.stdout.write('\n it    max P & Q mismatch (p.u.)   converged')
+        sys.stdout.write('\n----  ---------------------------  ---------')
+        sys.stdout.write('\n%3d        %10.3e               %5d/%d' %
+                         (i, normF.max(), converged.sum(), ns))
+
+    ## do Newton iterations on the stack of unconverged scenarios
+    act = array([], int)
+    while (not (converged | failed).all() and i < max_it):
+        ## update iteration counter
+        i = i + 1
+
+        ## (re)build the stacked system when the active set changes
+        if len(act) != (~converged & ~failed).sum():
+            act = find(~converged & ~failed)
+            na = len(act)
+            blk = c_[j1 * na + npv * k[:na] + arange(npv),
+                     j3 * na + npq * k[:na] + arange(npq),
+                     j5 * na + npq * k[:na] + arange(npq)]
+            Yblk = kron(identity(na, format='csr'), Ybus, format='csr')
+            offset = nb * arange(na)
+            pv_blk = (pv[:, newaxis] + offset).ravel(order='F')
+            pq_blk = (pq[:, newaxis] + offset).ravel(order='F')
+            jac = pf_jacobian(Yblk, pv_blk, pq_blk)
+            linsolver = get_linsolver(jac.J, ppopt, cache=False)
+
+        ## evaluate stacked Jacobian
+        J = jac.update(V[:, act].ravel(order='F'))
+
+        ## stacked mismatch, same ordering as the Jacobian rows
+        misblk = mis[:, act].ravel(order='F')
+        F = r_[  misblk[pv_blk].real,
+                 misblk[pq_blk].real,
+                 misblk[pq_blk].imag  ]
+
+        ## compute update step, one scenario at a time if singular
+        try:
+            linsolver.factor(J)
+            dx = -1 * linsolver.solve(F)
+        except RuntimeError:
+            dx = None
+        if dx is None or not isfinite(dx).all():
+            dx = _solve_blocks(J, F, blk, ppopt)
+
+        ## drop scenarios without a finite update
+        dx = dx[blk]
+        ok = isfinite(dx).all(axis=1)
+        failed[act[~ok]] = True
+        a, dx = act[ok], dx[ok]
+
+        ## update voltage
+        Va[ix_(pv, a)] += dx[:, j1:j2].T
+        Va[ix_(pq, a)] += dx[:, j3:j4].T
+        Vm[ix_(pq, a)] += dx[:, j5:j6].T
+        V[:, a] = Vm[:, a] * exp(1j * Va[:, a])
+        Vm[:, a] = abs(V[:, a])     ## update Vm and Va again in case
+        Va[:, a] = angle(V[:, a])   ## we wrapped around with a negative Vm
+
+        ## evalute F(x) for the active scenarios
+        mis[:, a] = V[:, a] * conj(Ybus * V[:, a]) - Sbus[:, a]
+        normF[a] = _mismatch_norm(mis[:, a], pv, pq)
+        iterations[a] = i
+        failed[a] = ~isfinite(normF[a])     ## diverged
+
+        ## check for convergence
+        converged[a] = normF[a] < tol
+        if verbose > 1:
+            sys.stdout.write('\n%3d        %10.3e               %5d/%d' %
+                             (i, normF[a].max() if len(a) else nan,
+                              converged.sum(), ns))
+
+    if verbose:
+        if converged.all():
+            sys.stdout.write("\nNewton's method power flow converged for all "
+                             "%d scenarios in %d iterations.\n" % (ns, i))
+        else:
+            sys.stdout.write("\nNewton's method power flow did not converge "
+                             "for %d of %d scenarios in %d iterations.\n" %
+                             (ns - converged.sum(), ns, i))
+        if failed.any():
+            sys.stdout.write("Singular Jacobian or diverging update for "
+                             "%d scenarios.\n" % failed.sum())
+
+    return V, converged, iterations
+
+
+def _solve_blocks(J, F, blk, ppopt):
+    """Solves the stacked Newton update one scenario at a time.
+
+    Row C{k} of C{blk} holds the indices of the variables of the C{k}-th
+    active scenario. The update of scenarios with a singular Jacobian
+    block is C{nan}.
+    """
+    J = J.tocsr()
+    dx = empty(len(F))
+    for b in blk:
+        Jb = J[b, :][:, b]
+        try:
+            linsolver = get_linsolver(Jb, ppopt, cache=False)
+            linsolver.factor(Jb)
+            dx[b] = -1 * linsolver.solve(F[b])
+        except RuntimeError:
+            dx[b] = nan
+
+    return dx
+
+
+def _mismatch_norm(mis, pv, pq):
+    """Infinity norm of the P & Q mismatch for each column of C{mis}.
+    """
+    F = r_[  mis[pv].real,
+             mis[pq].real,
+             mis[pq].imag  ]
+    if F.shape[0] == 0:
+        return zeros(mis.shape[1])
+
+    return abs(F).max(axis=0)
@@ -54,6 +54,10 @@ def opf(*args):
     C{(1/2)*w'*H*w + Cw * w}. C{H} and C{N} should be sparse matrices and C{H}
     should also be symmetric.
 
+    The AC OPF solved with PIPS is warm started from the solution of a
+    previous OPF of a case with the same structure if the case dict has a
+    C{warm} field set to the C{raw['warm']} field of its results.
+
     The optional C{ppopt} vector specifies PYPOWER options. If the OPF
     algorithm is not explicitly set in the options PYPOWER will use the default
     solver, based on a primal-dual interior point method. For the AC OPF this
@@ -99,6 +103,8 @@ def opf(*args):
             - C{info}   solver specific termination code
             - C{output} solver specific output information
                - C{alg} algorithm code of solver used
+            - C{warm}   (PIPS only) final primal and dual point, to warm
+              start a later OPF
         - C{var}
             - C{val}    optimization variable values, by named block
                 - C{Va}     voltage angles
@@ -125,6 +131,8 @@ def opf(*args):
             - C{mu}     shadow prices on linear constraints, by named block
                 - C{l}  lower bounds
                     - C{Pmis}   real power mistmatch equations (DC only)
+                    - C{Pbal}   system real power balance equation (DC with
+                      C{OPF_DC_FORM = 'ptdf'}, instead of C{Pmis} and C{Va})
                     - C{Pf}     flow limits at "from" end of branches (DC only)
                     - C{Pt}     flow limits at "to" end of branches (DC only)
                     - C{PQh}    upper portion of gen PQ-capability curve(AC only)
@@ -5,21 +5,17 @@
 """Evaluates nonlinear constraints and their Jacobian for OPF.
 """
 
-from numpy import zeros, ones, conj, exp, r_, Inf, arange
+from numpy import zeros, conj, exp, r_, Inf, arange
 
-from scipy.sparse import lil_matrix, vstack, hstack, csr_matrix as sparse
-
-from pypower.idx_gen import GEN_BUS, PG, QG
+from pypower.idx_gen import PG, QG
 from pypower.idx_brch import F_BUS, T_BUS, RATE_A
 
 from pypower.makeSbus import makeSbus
-from pypower.dSbus_dV import dSbus_dV
-from pypower.dIbr_dV import dIbr_dV
-from pypower.dSbr_dV import dSbr_dV
-from pypower.dAbr_dV import dAbr_dV
+from pypower.opf_consjac import opf_consjac
 
 
-def opf_consfcn(x, om, Ybus, Yf, Yt, ppopt, il=None, *args):
+def opf_consfcn(x, om, Ybus, Yf, Yt, ppopt, il=None, values_only=False,
+                *args):
     """Evaluates nonlinear constraints and their Jacobian for OPF.
 
     Constraint evaluation function for AC optimal power flow, suitable
@@ -35,6 +31,8 @@ def opf_consfcn(x, om, Ybus, Yf, Yt, ppopt, il=None, *args):
     branches with flow limits (all others are assumed to be
     unconstrained). The default is C{range(nl)} (all branches).
     C{Yf} and C{Yt} contain only the rows corresponding to C{il}.
+    @param values_only: (optional) if true, the gradients are not
+    computed and C{dh} and C{dg} are returned as C{None}.
 
     @return: C{h} - vector of inequality constraint values (flow limits)
     limit^2 - flow^2, where the flow can be apparent power real power or
@@ -42,6 +40,8 @@ def opf_consfcn(x, om, Ybus, Yf, Yt, ppopt, il=None, *args):
     constrained lines). C{g} - vector of equality constraint values (power
     balances). C{dh} - (optional) inequality constraint gradients, column
     j is gradient of h(j). C{dg} - (optional) equality constraint gradients.
+    C{dh} and C{dg} have the same sparsity structure on every call for the
+    same C{om}, C{Ybus}, C{Yf}, C{Yt} and C{il} (see L{opf_consjac}).
 
     @see: L{opf_costfcn}, L{opf_hessfcn}
 
@@ -58,10 +58,7 @@ def opf_consfcn(x, om, Ybus, Yf, Yt, ppopt, il=None, *args):
     vv, _, _, _ = om.get_idx()
 
     ## problem dimensions
-    nb = bus.shape[0]          ## number of buses
     nl = branch.shape[0]       ## number of branches
-    ng = gen.shape[0]          ## number of dispatchable injections
-    nxyz = len(x)              ## total number of control vars of all types
 
     ## set default constrained lines
     if il is None:
@@ -117,59 +114,12 @@ def opf_consfcn(x, om, Ybus, Yf, Yt, ppopt, il=None, *args):
     else:
         h = zeros((0,1))
 
-    ##----- evaluate partials of constraints -----
-    ## index ranges
-    iVa = arange(vv["i1"]["Va"], vv["iN"]["Va"])
-    iVm = arange(vv["i1"]["Vm"], vv["iN"]["Vm"])
-    iPg = arange(vv["i1"]["Pg"], vv["iN"]["Pg"])
-    iQg = arange(vv["i1"]["Qg"], vv["iN"]["Qg"])
-    iVaVmPgQg = r_[iVa, iVm, iPg, iQg].T
-
-    ## compute partials of injected bus powers
-    dSbus_dVm, dSbus_dVa = dSbus_dV(Ybus, V)           ## w.r.t. V
-    ## Pbus w.r.t. Pg, Qbus w.r.t. Qg
-    neg_Cg = sparse((-ones(ng), (gen[:, GEN_BUS], range(ng))), (nb, ng))
-
-    ## construct Jacobian of equality constraints (power flow) and transpose it
-    dg = lil_matrix((2 * nb, nxyz))
-    blank = sparse((nb, ng))
-    dg[:, iVaVmPgQg] = vstack([
-            ## P mismatch w.r.t Va, Vm, Pg, Qg
-            hstack([dSbus_dVa.real, dSbus_dVm.real, neg_Cg, blank]),
-            ## Q mismatch w.r.t Va, Vm, Pg, Qg
-            hstack([dSbus_dVa.imag, dSbus_dVm.imag, blank, neg_Cg])
-        ], "csr")
-    dg = dg.T
+    if values_only:
+        return h, g, None, None
 
-    if nl2 > 0:
-        ## compute partials of Flows w.r.t. V
-        if ppopt['OPF_FLOW_LIM'] == 2:     ## current
-            dFf_dVa, dFf_dVm, dFt_dVa, dFt_dVm, Ff, Ft = \
-                    dIbr_dV(branch[il, :], Yf, Yt, V)
-        else:                  ## power
-            dFf_dVa, dFf_dVm, dFt_dVa, dFt_dVm, Ff, Ft = \
-                    dSbr_dV(branch[il, :], Yf, Yt, V)
-        if ppopt['OPF_FLOW_LIM'] == 1:     ## real part of flow (active power)
-            dFf_dVa = dFf_dVa.real
-            dFf_dVm = dFf_dVm.real
-            dFt_dVa = dFt_dVa.real
-            dFt_dVm = dFt_dVm.real
-            Ff = Ff.real
-            Ft = Ft.real
-
-        ## squared magnitude of flow (of complex power or current, or real power)
-        df_dVa, df_dVm, dt_dVa, dt_dVm = \
-                dAbr_dV(dFf_dVa, dFf_dVm, dFt_dVa, dFt_dVm, Ff, Ft)
-
-        ## construct Jacobian of inequality constraints (branch limits)
-        ## and transpose it.
-        dh = lil_matrix((2 * nl2, nxyz))
-        dh[:, r_[iVa, iVm].T] = vstack([
-                hstack([df_dVa, df_dVm]),    ## "from" flow limit
-                hstack([dt_dVa, dt_dVm])     ## "to" flow limit
-            ], "csr")
-        dh = dh.T
-    else:
-        dh = None
+    ##----- evaluate partials of constraints -----
+    ## Jacobians assembled into their fixed structures, transposed
+    jac = opf_consjac.get(om, Ybus, Yf, Yt, ppopt, il)
+    dh, dg = jac.update(V)
 
     return h, g, dh, dg
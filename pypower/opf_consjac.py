@@ -0,0 +1,178 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Implements the AC OPF nonlinear constraint Jacobian assembler object.
+"""
+
+from numpy import arange, ones, conj, asarray, array_equal, unique, \
+    bincount, cumsum, r_
+from scipy.sparse import csr_matrix as sparse
+
+from pypower.dSbus_dV import dSbus_dV_nz, dSbus_dV_with_diag
+
+from pypower.idx_gen import GEN_BUS
+from pypower.idx_brch import F_BUS, T_BUS
+
+
+class opf_consjac(object):
+    """This class assembles the (transposed) Jacobians C{dh} and C{dg} of
+    the nonlinear constraints of the AC OPF returned by L{opf_consfcn}.
+
+    The sparsity patterns of both Jacobians are computed once from the
+    structure of C{Ybus}, the generator buses and the branches with flow
+    limits C{il}, together with the positions of each term in their data
+    arrays. L{update} then computes the derivatives of the power balance
+    constraints on the nonzeros of C{Ybus} (see L{dSbus_dV_nz}) and those
+    of the branch flow constraints branch by branch, and writes them
+    directly into the data of the Jacobians. Every Jacobian returned has
+    the same structure.
+
+    Use L{get} to reuse the object stored in the cache of C{om}.
+    """
+
+    def __init__(self, om, Ybus, Yf, Yt, ppopt, il=None):
+        ppc = om.get_ppc()
+        gen, branch = ppc['gen'], ppc['branch']
+        vv, _, _, _ = om.get_idx()
+        nb = ppc['bus'].shape[0]
+        ng = gen.shape[0]
+        nx = om.var['N']
+        if il is None:
+            il = arange(branch.shape[0])
+        nl2 = len(il)
+
+        #: matrices and options defining the patterns
+        self.Ybus, self.Yf, self.Yt, self.il = Ybus, Yf, Yt, il
+        self.flow_lim = ppopt['OPF_FLOW_LIM']
+        self.nx = nx
+        self.nb, self.nl2 = nb, nl2
+        iVa = vv['i1']['Va'] + arange(nb)
+        iVm = vv['i1']['Vm'] + arange(nb)
+
+        ## Ybus with all diagonal elements
+        self.Y, self.row, self.diag = dSbus_dV_with_diag(Ybus)
+        row, col = self.row, self.Y.indices
+
+        ## power balance, P and Q rows w.r.t. Va and Vm, then Pg and Qg
+        gbus = gen[:, GEN_BUS].astype(int)
+        ig = arange(ng)
+        rows = [row, row, nb + row, nb + row, gbus, nb + gbus]
+        cols = [iVa[col], iVm[col], iVa[col], iVm[col],
+                vv['i1']['Pg'] + ig, vv['i1']['Qg'] + ig]
+        self.dg0, self.dg_pos, self.dg_indices, self.dg_indptr = \
+            _pattern(rows, cols, 2 * nb, nx, 4 * len(row))
+
+        ## branch flows, [from; to] ends w.r.t. Va(a), Va(b), Vm(a), Vm(b)
+        self.a, self.b, self.y1, self.y2 = _branch_ends(branch, il, Yf, Yt)
+        ke = arange(2 * nl2)
+        rows = [ke] * 4
+        cols = [iVa[self.a], iVa[self.b], iVm[self.a], iVm[self.b]]
+        self.dh0, self.dh_pos, self.dh_indices, self.dh_indptr = \
+            _pattern(rows, cols, 2 * nl2, nx, 8 * nl2)
+
+
+    def matches(self, Ybus, Yf, Yt, ppopt, il=None):
+        """True if the object was built for these arguments.
+        """
+        if il is None:
+            il = arange(self.a.shape[0] // 2)
+        return Ybus is self.Ybus and Yf is self.Yf and Yt is self.Yt and \
+            ppopt['OPF_FLOW_LIM'] == self.flow_lim and \
+            array_equal(il, self.il)
+
+
+    @classmethod
+    def get(cls, om, Ybus, Yf, Yt, ppopt, il=None):
+        """Returns the assembler for these arguments from the cache of the
+        OPF model C{om}, creating it if needed.
+        """
+        jac = om.cache.get('opf_consjac')
+        if jac is None or not jac.matches(Ybus, Yf, Yt, ppopt, il):
+            jac = cls(om, Ybus, Yf, Yt, ppopt, il)
+            om.cache['opf_consjac'] = jac
+
+        return jac
+
+
+    def update(self, V):
+        """Returns the transposed Jacobians C{dh} and C{dg} of the branch
+        flow limits and power balance constraints for the voltages C{V},
+        as sparse matrices with one column per constraint. C{dh} is
+        C{None} if no branch has a flow limit.
+        """
+        ## power balance
+        dS_dVm, dS_dVa = dSbus_dV_nz(self.row, self.Y.indices, self.Y.data,
+                                     self.diag, V, self.Y * V)
+        dg = self.dg0 + bincount(self.dg_pos, r_[dS_dVa.real, dS_dVm.real,
+                                                 dS_dVa.imag, dS_dVm.imag],
+                                 len(self.dg0))
+        dg = sparse((dg, self.dg_indices, self.dg_indptr),
+                    (2 * self.nb, self.nx)).T
+
+        ## branch flows, d|S|^2/dx = 2 * Re(conj(S) * dS/dx)
+        if self.nl2 == 0:
+            return None, dg
+        S, dS = _branch_flows(self.a, self.b, self.y1, self.y2, V,
+                              self.flow_lim)
+        dh = self.dh0 + bincount(self.dh_pos,
+                                 r_[tuple(2 * (conj(S) * d).real for d in dS)],
+                                 len(self.dh0))
+        dh = sparse((dh, self.dh_indices, self.dh_indptr),
+                    (2 * self.nl2, self.nx)).T
+
+        return dh, dg
+
+
+def _pattern(rows, cols, m, n, nv):
+    """CSR structure of an C{m x n} matrix with the entries C{rows, cols}.
+
+    The first C{nv} entries are variable and the others are constant and
+    equal to -1. Returns the constant part of the data, the positions of
+    the variable entries in the data and the column indices and row
+    pointers.
+    """
+    rows, cols = r_[tuple(rows)], r_[tuple(cols)]
+    key, pos = unique(rows * n + cols, return_inverse=True)
+    data = bincount(pos[nv:], -ones(len(pos) - nv), len(key)).astype(float)
+
+    return data, pos[:nv], key % n, r_[0, cumsum(bincount(key // n, minlength=m))]
+
+
+def _branch_ends(branch, il, Yf, Yt):
+    """Buses C{a}, C{b} and admittances C{y1}, C{y2} of the [from; to] ends
+    of the branches C{il}, with flows C{V(a) * conj(y1 * V(a) + y2 * V(b))}.
+    """
+    f = branch[il, F_BUS].astype(int)
+    t = branch[il, T_BUS].astype(int)
+    k = arange(len(il))
+
+    return r_[f, t], r_[t, f], \
+        r_[asarray(Yf[k, f]).ravel(), asarray(Yt[k, t]).ravel()], \
+        r_[asarray(Yf[k, t]).ravel(), asarray(Yt[k, f]).ravel()]
+
+
+def _branch_flows(a, b, y1, y2, V, flow_lim):
+    """Flows of the branch ends C{V(a) * conj(y1 * V(a) + y2 * V(b))} and
+    their derivatives w.r.t. C{Va(a), Va(b), Vm(a), Vm(b)}.
+
+    The flows are the complex powers, their real parts or the currents
+    C{y1 * V(a) + y2 * V(b)}, for C{flow_lim} 0, 1 and 2.
+    """
+    Va, Vb = V[a], V[b]
+    va, vb = abs(Va), abs(Vb)
+    if flow_lim == 2:
+        ## current
+        Ua, Ub = y1 * Va, y2 * Vb
+        return Ua + Ub, [1j * Ua, 1j * Ub, Ua / va, Ub / vb]
+
+    ## complex power, S = conj(y1) * |V(a)|^2 + W
+    W = conj(y2) * Va * conj(Vb)
+    y1c = conj(y1)
+    S = y1c * va**2 + W
+    dS = [1j * W, -1j * W, 2 * y1c * va + W / va, W / vb]
+    if flow_lim == 1:
+        ## real power
+        return S.real, [d.real for d in dS]
+
+    return S, dS
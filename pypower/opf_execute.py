@@ -132,7 +132,7 @@ def opf_execute(om, ppopt):
             del results['g']
 
         ## angle limit constraint multipliers
-        if ll['N']['ang'] > 0:
+        if om.getN('lin', 'ang') > 0:
             iang = om.userdata('iang')
             results['branch'][iang, MU_ANGMIN] = results['mu']['lin']['l'][ll['i1']['ang']:ll['iN']['ang']] * pi / 180
             results['branch'][iang, MU_ANGMAX] = results['mu']['lin']['u'][ll['i1']['ang']:ll['iN']['ang']] * pi / 180
@@ -6,20 +6,13 @@
 """
 
 from numpy import array, zeros, ones, exp, arange, r_, flatnonzero as find
-from scipy.sparse import vstack, hstack, issparse, csr_matrix as sparse
+from scipy.sparse import issparse, csr_matrix as sparse
 
 from pypower.idx_gen import PG, QG
-from pypower.idx_brch import F_BUS, T_BUS
 from pypower.idx_cost import MODEL, POLYNOMIAL
 
 from pypower.polycost import polycost
-from pypower.d2Sbus_dV2 import d2Sbus_dV2
-from pypower.dSbr_dV import dSbr_dV
-from pypower.dIbr_dV import dIbr_dV
-from pypower.d2AIbr_dV2 import d2AIbr_dV2
-from pypower.d2ASbr_dV2 import d2ASbr_dV2
-from pypower.opf_costfcn import opf_costfcn
-from pypower.opf_consfcn import opf_consfcn
+from pypower.opf_hessian import opf_hessian
 
 
 def opf_hessfcn(x, lmbda, om, Ybus, Yf, Yt, ppopt, il=None, cost_mult=1.0):
@@ -49,7 +42,9 @@ def opf_hessfcn(x, lmbda, om, Ybus, Yf, Yt, ppopt, il=None, cost_mult=1.0):
     @param cost_mult: (optional) Scale factor to be applied to the cost
     (default = 1).
 
-    @return: Hessian of the Lagrangian.
+    @return: Hessian of the Lagrangian, with the same sparsity structure
+    on every call for the same C{om}, C{Ybus}, C{Yf}, C{Yt} and C{il}
+    (see L{opf_hessian}).
 
     @see: L{opf_costfcn}, L{opf_consfcn}
 
@@ -60,23 +55,14 @@ def opf_hessfcn(x, lmbda, om, Ybus, Yf, Yt, ppopt, il=None, cost_mult=1.0):
     ##----- initialize -----
     ## unpack data
     ppc = om.get_ppc()
-    baseMVA, bus, gen, branch, gencost = \
-        ppc["baseMVA"], ppc["bus"], ppc["gen"], ppc["branch"], ppc["gencost"]
+    baseMVA, gen, gencost = ppc["baseMVA"], ppc["gen"], ppc["gencost"]
     cp = om.get_cost_params()
     N, Cw, H, dd, rh, kk, mm = \
         cp["N"], cp["Cw"], cp["H"], cp["dd"], cp["rh"], cp["kk"], cp["mm"]
     vv, _, _, _ = om.get_idx()
 
     ## unpack needed parameters
-    nb = bus.shape[0]          ## number of buses
-    nl = branch.shape[0]       ## number of branches
     ng = gen.shape[0]          ## number of dispatchable injections
-    nxyz = len(x)              ## total number of control vars of all types
-
-    ## set default constrained lines
-    if il is None:
-        il = arange(nl)            ## all lines have limits by default
-    nl2 = len(il)           ## number of constrained lines
 
     ## grab Pg & Qg
     Pg = x[vv["i1"]["Pg"]:vv["iN"]["Pg"]]  ## active generation in p.u.
@@ -90,7 +76,6 @@ def opf_hessfcn(x, lmbda, om, Ybus, Yf, Yt, ppopt, il=None, cost_mult=1.0):
     Va = x[vv["i1"]["Va"]:vv["iN"]["Va"]]
     Vm = x[vv["i1"]["Vm"]:vv["iN"]["Vm"]]
     V = Vm * exp(1j * Va)
-    nxtra = nxyz - 2 * nb
     pcost = gencost[arange(ng), :]
     if gencost.shape[0] > ng:
         qcost = gencost[arange(ng, 2 * ng), :]
@@ -107,13 +92,10 @@ def opf_hessfcn(x, lmbda, om, Ybus, Yf, Yt, ppopt, il=None, cost_mult=1.0):
         ipolq = find(qcost[:, MODEL] == POLYNOMIAL)
         d2f_dQg2[ipolq] = \
                 baseMVA**2 * polycost(qcost[ipolq, :], Qg[ipolq] * baseMVA, 2)
-    i = r_[arange(vv["i1"]["Pg"], vv["iN"]["Pg"]),
-           arange(vv["i1"]["Qg"], vv["iN"]["Qg"])]
-#    d2f = sparse((vstack([d2f_dPg2, d2f_dQg2]).toarray().flatten(),
-#                  (i, i)), shape=(nxyz, nxyz))
-    d2f = sparse((r_[d2f_dPg2, d2f_dQg2], (i, i)), (nxyz, nxyz))
+    d2f_dPQg2 = r_[d2f_dPg2, d2f_dQg2] * cost_mult
 
     ## generalized cost
+    d2f = None
     if issparse(N) and N.nnz > 0:
         nw = N.shape[0]
         r = N * x - rh                    ## Nx - rhat
@@ -136,101 +118,19 @@ def opf_hessfcn(x, lmbda, om, Ybus, Yf, Yt, ppopt, il=None, cost_mult=1.0):
         HwC = H * w + Cw
         AA = N.T * M * (LL + 2 * QQ * diagrr)
 
-        d2f = d2f + AA * H * AA.T + 2 * N.T * M * QQ * \
-                sparse((HwC, (arange(nw), arange(nw))), (nw, nw)) * N
-    d2f = d2f * cost_mult
+        d2f = (AA * H * AA.T + 2 * N.T * M * QQ *
+               sparse((HwC, (arange(nw), arange(nw))), (nw, nw)) * N) * \
+            cost_mult
 
-    ##----- evaluate Hessian of power balance constraints -----
+    ##----- multipliers of power balance and flow constraints -----
     nlam = int(len(lmbda["eqnonlin"]) / 2)
     lamP = lmbda["eqnonlin"][:nlam]
     lamQ = lmbda["eqnonlin"][nlam:nlam + nlam]
-    Gpaa, Gpav, Gpva, Gpvv = d2Sbus_dV2(Ybus, V, lamP)
-    Gqaa, Gqav, Gqva, Gqvv = d2Sbus_dV2(Ybus, V, lamQ)
-
-    d2G = vstack([
-            hstack([
-                vstack([hstack([Gpaa, Gpav]),
-                        hstack([Gpva, Gpvv])]).real +
-                vstack([hstack([Gqaa, Gqav]),
-                        hstack([Gqva, Gqvv])]).imag,
-                sparse((2 * nb, nxtra))]),
-            hstack([
-                sparse((nxtra, 2 * nb)),
-                sparse((nxtra, nxtra))
-            ])
-        ], "csr")
-
-    ##----- evaluate Hessian of flow constraints -----
     nmu = int(len(lmbda["ineqnonlin"]) / 2)
     muF = lmbda["ineqnonlin"][:nmu]
     muT = lmbda["ineqnonlin"][nmu:nmu + nmu]
-    if ppopt['OPF_FLOW_LIM'] == 2:       ## current
-        dIf_dVa, dIf_dVm, dIt_dVa, dIt_dVm, If, It = dIbr_dV(branch, Yf, Yt, V)
-        Hfaa, Hfav, Hfva, Hfvv = d2AIbr_dV2(dIf_dVa, dIf_dVm, If, Yf, V, muF)
-        Htaa, Htav, Htva, Htvv = d2AIbr_dV2(dIt_dVa, dIt_dVm, It, Yt, V, muT)
-    else:
-        f = branch[il, F_BUS].astype(int)    ## list of "from" buses
-        t = branch[il, T_BUS].astype(int)    ## list of "to" buses
-        ## connection matrix for line & from buses
-        Cf = sparse((ones(nl2), (arange(nl2), f)), (nl2, nb))
-        ## connection matrix for line & to buses
-        Ct = sparse((ones(nl2), (arange(nl2), t)), (nl2, nb))
-        dSf_dVa, dSf_dVm, dSt_dVa, dSt_dVm, Sf, St = \
-                dSbr_dV(branch[il,:], Yf, Yt, V)
-        if ppopt['OPF_FLOW_LIM'] == 1:     ## real power
-            Hfaa, Hfav, Hfva, Hfvv = d2ASbr_dV2(dSf_dVa.real, dSf_dVm.real,
-                                                Sf.real, Cf, Yf, V, muF)
-            Htaa, Htav, Htva, Htvv = d2ASbr_dV2(dSt_dVa.real, dSt_dVm.real,
-                                                St.real, Ct, Yt, V, muT)
-        else:                  ## apparent power
-            Hfaa, Hfav, Hfva, Hfvv = \
-                    d2ASbr_dV2(dSf_dVa, dSf_dVm, Sf, Cf, Yf, V, muF)
-            Htaa, Htav, Htva, Htvv = \
-                    d2ASbr_dV2(dSt_dVa, dSt_dVm, St, Ct, Yt, V, muT)
-
-    d2H = vstack([
-            hstack([
-                vstack([hstack([Hfaa, Hfav]),
-                        hstack([Hfva, Hfvv])]) +
-                vstack([hstack([Htaa, Htav]),
-                        hstack([Htva, Htvv])]),
-                sparse((2 * nb, nxtra))
-            ]),
-            hstack([
-                sparse((nxtra, 2 * nb)),
-                sparse((nxtra, nxtra))
-            ])
-        ], "csr")
-
-    ##-----  do numerical check using (central) finite differences  -----
-    if 0:
-        nx = len(x)
-        step = 1e-5
-        num_d2f = sparse((nx, nx))
-        num_d2G = sparse((nx, nx))
-        num_d2H = sparse((nx, nx))
-        for i in range(nx):
-            xp = x
-            xm = x
-            xp[i] = x[i] + step / 2
-            xm[i] = x[i] - step / 2
-            # evaluate cost & gradients
-            _, dfp = opf_costfcn(xp, om)
-            _, dfm = opf_costfcn(xm, om)
-            # evaluate constraints & gradients
-            _, _, dHp, dGp = opf_consfcn(xp, om, Ybus, Yf, Yt, ppopt, il)
-            _, _, dHm, dGm = opf_consfcn(xm, om, Ybus, Yf, Yt, ppopt, il)
-            num_d2f[:, i] = cost_mult * (dfp - dfm) / step
-            num_d2G[:, i] = (dGp - dGm) * lmbda["eqnonlin"]   / step
-            num_d2H[:, i] = (dHp - dHm) * lmbda["ineqnonlin"] / step
-        d2f_err = max(max(abs(d2f - num_d2f)))
-        d2G_err = max(max(abs(d2G - num_d2G)))
-        d2H_err = max(max(abs(d2H - num_d2H)))
-        if d2f_err > 1e-6:
-            print('Max difference in d2f: %g' % d2f_err)
-        if d2G_err > 1e-5:
-            print('Max difference in d2G: %g' % d2G_err)
-        if d2H_err > 1e-6:
-            print('Max difference in d2H: %g' % d2H_err)
-
-    return d2f + d2G + d2H
+
+    ##----- assemble Hessian into its fixed structure -----
+    hess = opf_hessian.get(om, Ybus, Yf, Yt, ppopt, il)
+
+    return hess.update(V, lamP, lamQ, muF, muT, d2f_dPQg2, d2f)
@@ -0,0 +1,185 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Implements the AC OPF Lagrangian Hessian assembler object.
+"""
+
+from numpy import arange, zeros, conj, array_equal, unique, bincount, \
+    cumsum, searchsorted, r_
+from scipy.sparse import issparse, eye, csr_matrix as sparse
+
+from pypower.d2Sbus_dV2 import d2Sbus_dV2_nz, _sym_pattern
+from pypower.opf_consjac import _branch_ends, _branch_flows
+
+
+class opf_hessian(object):
+    """This class assembles the Hessian of the Lagrangian of the AC OPF
+    returned by L{opf_hessfcn}.
+
+    The sparsity pattern of the Hessian is computed once from the
+    structure of C{Ybus}, the branches with flow limits C{il} and the
+    generalized costs of the OPF model C{om}, as the union of the
+    patterns of all its terms, together with the positions of the terms
+    in its data array. L{update} then computes the second derivatives of
+    the power balance constraints on the nonzeros of C{Ybus} (see
+    L{d2Sbus_dV2_nz}) and those of the branch flow constraints branch by
+    branch, and sums them directly into the data of the Hessian, without
+    building any intermediate sparse matrix. Every Hessian returned has
+    the same structure.
+
+    Use L{get} to reuse the object stored in the cache of C{om}.
+    """
+
+    def __init__(self, om, Ybus, Yf, Yt, ppopt, il=None):
+        ppc = om.get_ppc()
+        branch = ppc['branch']
+        vv, _, _, _ = om.get_idx()
+        nb = ppc['bus'].shape[0]
+        ng = ppc['gen'].shape[0]
+        nx = om.var['N']
+        if il is None:
+            il = arange(branch.shape[0])
+        nl2 = len(il)
+
+        #: matrices and options defining the pattern
+        self.Ybus, self.Yf, self.Yt, self.il = Ybus, Yf, Yt, il
+        self.flow_lim = ppopt['OPF_FLOW_LIM']
+        self.nx = nx
+        #: voltage angle and magnitude variables
+        self.iVa = vv['i1']['Va'] + arange(nb)
+        self.iVm = vv['i1']['Vm'] + arange(nb)
+
+        ## structurally symmetric pattern of Ybus
+        self.row, self.col, self.y, self.diag, self.tp, _ = _sym_pattern(Ybus)
+
+        ## branch ends [from; to], with flows V(a) * conj(y1 * V(a) + y2 * V(b))
+        self.a, self.b, self.y1, self.y2 = _branch_ends(branch, il, Yf, Yt)
+
+        ## entries of each term: costs of Pg and Qg, power balance
+        ## (Va-Va, Va-Vm, Vm-Va, Vm-Vm blocks) and branch flows (4 x 4 per
+        ## branch end, over Va(a), Va(b), Vm(a), Vm(b))
+        ig = r_[vv['i1']['Pg'] + arange(ng), vv['i1']['Qg'] + arange(ng)]
+        ra, rm = self.iVa[self.row], self.iVm[self.row]
+        ca, cm = self.iVa[self.col], self.iVm[self.col]
+        xb = [self.iVa[self.a], self.iVa[self.b],
+              self.iVm[self.a], self.iVm[self.b]]
+        rows = [ig, ra, ra, rm, rm] + [xb[i] for i in range(4) for j in range(4)]
+        cols = [ig, ca, cm, ca, cm] + [xb[j] for i in range(4) for j in range(4)]
+
+        ## generalized costs, pattern of N' * (|H| + I) * N
+        N, H = om.get_cost_params()['N'], om.get_cost_params()['H']
+        if issparse(N) and N.nnz > 0:
+            P = (N.T * (abs(H) + eye(N.shape[0])) * N).tocoo()
+            rows.append(P.row)
+            cols.append(P.col)
+        rows, cols = r_[tuple(rows)], r_[tuple(cols)]
+
+        ## merge into CSR order
+        key, pos = unique(rows * nx + cols, return_inverse=True)
+        #: sorted row-major keys of the nonzeros of the Hessian
+        self.key = key
+        #: CSR structure of the Hessian
+        self.indices = key % nx
+        self.indptr = r_[0, cumsum(bincount(key // nx, minlength=nx))]
+        #: positions of the cost, power balance and branch flow terms
+        n1 = 2 * ng
+        n2 = n1 + 4 * len(self.row)
+        self.pos_cost, self.pos_bus, self.pos_br = \
+            pos[:n1], pos[n1:n2], pos[n2:n2 + 32 * nl2]
+
+
+    def matches(self, Ybus, Yf, Yt, ppopt, il=None):
+        """True if the object was built for these arguments.
+        """
+        if il is None:
+            il = arange(self.a.shape[0] // 2)
+        return Ybus is self.Ybus and Yf is self.Yf and Yt is self.Yt and \
+            ppopt['OPF_FLOW_LIM'] == self.flow_lim and \
+            array_equal(il, self.il)
+
+
+    @classmethod
+    def get(cls, om, Ybus, Yf, Yt, ppopt, il=None):
+        """Returns the assembler for these arguments from the cache of the
+        OPF model C{om}, creating it if needed.
+        """
+        hess = om.cache.get('opf_hessian')
+        if hess is None or not hess.matches(Ybus, Yf, Yt, ppopt, il):
+            hess = cls(om, Ybus, Yf, Yt, ppopt, il)
+            om.cache['opf_hessian'] = hess
+
+        return hess
+
+
+    def update(self, V, lamP, lamQ, muF, muT, d2f_dPQg2, d2f=None):
+        """Returns the Hessian of the Lagrangian for the voltages C{V}.
+
+        C{lamP} and C{lamQ} are the multipliers of the real and reactive
+        power balance constraints, C{muF} and C{muT} those of the flow
+        limits at the "from" and "to" ends of the limited branches,
+        C{d2f_dPQg2} the second derivatives of the generator costs w.r.t.
+        C{[Pg; Qg]} and C{d2f}, if given, the sparse Hessian of the
+        generalized costs.
+        """
+        ## power balance
+        Gp = d2Sbus_dV2_nz(self.row, self.col, self.y, self.diag, self.tp,
+                           V, lamP)
+        Gq = d2Sbus_dV2_nz(self.row, self.col, self.y, self.diag, self.tp,
+                           V, lamQ)
+        G = r_[tuple(gp.real + gq.imag for gp, gq in zip(Gp, Gq))]
+
+        ## branch flows
+        Hbr = self._d2A_dV2(V, r_[muF, muT])
+
+        data = bincount(r_[self.pos_cost, self.pos_bus, self.pos_br],
+                        r_[d2f_dPQg2, G, Hbr], len(self.key))
+
+        ## generalized costs
+        if d2f is not None:
+            d2f = d2f.tocoo()
+            data += bincount(searchsorted(self.key,
+                                          d2f.row * self.nx + d2f.col),
+                             d2f.data, len(self.key))
+
+        return sparse((data, self.indices, self.indptr), (self.nx, self.nx))
+
+
+    def _d2A_dV2(self, V, mu):
+        """Second derivatives of C{mu} times the squared flows of the
+        branch ends, as a C{4 x 4} block per branch end over
+        C{Va(a), Va(b), Vm(a), Vm(b)}, flattened row by row.
+
+        The squared flow C{|S|^2} of each end, of real power, apparent
+        power or current depending on C{OPF_FLOW_LIM}, has the derivatives::
+
+            d2|S|^2/dx_i dx_j = 2 * Re(dS/dx_i * conj(dS/dx_j)
+                                       + conj(S) * d2S/dx_i dx_j)
+        """
+        Va, Vb = V[self.a], V[self.b]
+        va, vb = abs(Va), abs(Vb)
+        z = zeros(len(Va))
+        S, dS = _branch_flows(self.a, self.b, self.y1, self.y2, V,
+                              self.flow_lim)
+        if self.flow_lim == 2:
+            ## current, I = y1 * V(a) + y2 * V(b)
+            Ua, Ub = self.y1 * Va, self.y2 * Vb
+            d2S = [[-Ua, z, 1j * Ua / va, z],
+                   [z, -Ub, z, 1j * Ub / vb],
+                   [1j * Ua / va, z, z, z],
+                   [z, 1j * Ub / vb, z, z]]
+        else:
+            ## complex power, S = conj(y1) * |V(a)|^2 + W
+            W = conj(self.y2) * Va * conj(Vb)
+            y1c = conj(self.y1)
+            d2S = [[-W, W, 1j * W / va, 1j * W / vb],
+                   [W, -W, -1j * W / va, -1j * W / vb],
+                   [1j * W / va, -1j * W / va, 2 * y1c, W / (va * vb)],
+                   [1j * W / vb, -1j * W / vb, W / (va * vb), z]]
+            if self.flow_lim == 1:
+                ## real power
+                d2S = [[d.real for d in r] for r in d2S]
+
+        return r_[tuple(2 * mu * (dS[i] * conj(dS[j]) +
+                                   conj(S) * d2S[i][j]).real
+                        for i in range(4) for j in range(4))]
@@ -10,7 +10,7 @@ from sys import stderr
 
 from numpy import array, zeros, ones, Inf, dot, arange, r_
 from numpy import flatnonzero as find
-from scipy.sparse import lil_matrix, csr_matrix as sparse
+from scipy.sparse import csr_matrix as sparse
 
 
 class opf_model(object):
@@ -101,6 +101,11 @@ class opf_model(object):
 
         self.user_data = {}
 
+        #: data derived from the model on first use, such as the linear
+        #  constraints and the sparsity patterns of the OPF derivatives,
+        #  cleared whenever variables or constraints are added
+        self.cache = {}
+
 
     def __repr__(self):
         """String representation of the object.
@@ -190,6 +195,8 @@ class opf_model(object):
         by PYPOWER, but there is no way for the user to specify
         additional nonlinear constraints.
         """
+        self.cache.clear()
+
         if u is None:  ## nonlinear
             ## prevent duplicate named constraint sets
             if name in self.nln["idx"]["N"]:
@@ -299,6 +306,9 @@ class opf_model(object):
 
             f_u(x, CP) = 1/2 * w'*H*w + Cw'*w
         """
+        ## only the Hessian pattern depends on the costs
+        self.cache.pop('opf_hessian', None)
+
         ## prevent duplicate named cost sets
         if name in self.cost["idx"]["N"]:
             stderr.write('opf_model.add_costs: cost set named \'%s\' already exists\n' % name)
@@ -385,6 +395,8 @@ class opf_model(object):
         are for all values to be initialized to zero (C{v0 = 0}) and unbounded
         (C{VL = -Inf, VU = Inf}).
         """
+        self.cache.clear()
+
         ## prevent duplicate named var sets
         if name in self.var["idx"]["N"]:
             stderr.write('opf_model.add_vars: variable set named ''%s'' already exists\n' % name)
@@ -710,49 +722,45 @@ class opf_model(object):
         L{add_constraints}::
 
             L <= A * x <= U
-        """
 
-        ## initialize A, l and u
-#        nnzA = 0
-#        for k in range(self.lin["NS"]):
-#            nnzA = nnzA + nnz(self.lin["data"].A.(self.lin.order{k}))
+        C{A} is assembled in coordinate form from the nonzeros of each
+        constraint set, shifted to the columns of its variable sets, and is
+        kept with C{L} and C{U} until the next call to L{add_constraints} or
+        L{add_vars}. The cached C{A} is returned, and must not be modified.
+        """
+        if not self.lin["N"]:
+            return None, array([]), array([])
 
-        if self.lin["N"]:
-            A = lil_matrix((self.lin["N"], self.var["N"]))
+        if 'linear_constraints' not in self.cache:
+            rows, cols, vals = [], [], []
+            l = -Inf * ones(self.lin["N"])
             u = Inf * ones(self.lin["N"])
-            l = -u
-        else:
-            A = None
-            u = array([])
-            l = array([])
 
-            return A, l, u
+            ## collect the nonzeros of each piece
+            for name in self.lin["order"]:
+                if self.lin["idx"]["N"][name]:      ## non-zero number of rows
+                    Ak = sparse(self.lin["data"]["A"][name]).tocoo()
+                    i1 = self.lin["idx"]["i1"][name]    ## starting row index
+                    iN = self.lin["idx"]["iN"][name]    ## ending row index
+                    ## columns in A of the columns of Ak, by var set
+                    jj = r_[tuple(arange(self.var["idx"]["i1"][v],
+                                         self.var["idx"]["iN"][v])
+                                  for v in self.lin["data"]["vs"][name])]
 
-        ## fill in each piece
-        for k in range(self.lin["NS"]):
-            name = self.lin["order"][k]
-            N = self.lin["idx"]["N"][name]
-            if N:                                   ## non-zero number of rows to add
-                Ak = self.lin["data"]["A"][name]    ## A for kth linear constrain set
-                i1 = self.lin["idx"]["i1"][name]    ## starting row index
-                iN = self.lin["idx"]["iN"][name]    ## ing row index
-                vsl = self.lin["data"]["vs"][name]  ## var set list
-                kN = 0                              ## initialize last col of Ak used
-                # FIXME: Sparse matrix with fancy indexing
-                Ai = zeros((N, self.var["N"]))
-                for v in vsl:
-                    j1 = self.var["idx"]["i1"][v]      ## starting column in A
-                    jN = self.var["idx"]["iN"][v]      ## ing column in A
-                    k1 = kN                            ## starting column in Ak
-                    kN = kN + self.var["idx"]["N"][v]  ## ing column in Ak
-                    Ai[:, j1:jN] = Ak[:, k1:kN].todense()
+                    rows.append(Ak.row + i1)
+                    cols.append(jj[Ak.col])
+                    vals.append(Ak.data)
+
+                    l[i1:iN] = self.lin["data"]["l"][name]
+                    u[i1:iN] = self.lin["data"]["u"][name]
 
-                A[i1:iN, :] = Ai
+            A = sparse((r_[tuple(vals)], (r_[tuple(rows)], r_[tuple(cols)])),
+                       (self.lin["N"], self.var["N"]))
+            self.cache['linear_constraints'] = (A, l, u)
 
-                l[i1:iN] = self.lin["data"]["l"][name]
-                u[i1:iN] = self.lin["data"]["u"][name]
+        A, l, u = self.cache['linear_constraints']
 
-        return A.tocsr(), l, u
+        return A, l.copy(), u.copy()
 
 
     def userdata(self, name, val=None):
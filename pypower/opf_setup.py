@@ -21,6 +21,7 @@ from pypower.makeApq import makeApq
 from pypower.makeAang import makeAang
 from pypower.makeAy import makeAy
 from pypower.opf_model import opf_model
+from pypower.dc_factors import get_dc_factors
 from pypower.run_userfcn import run_userfcn
 
 from pypower.idx_cost import MODEL, NCOST, PW_LINEAR, COST, POLYNOMIAL
@@ -35,6 +36,16 @@ def opf_setup(ppc, ppopt):
     Assumes that ppc is a PYPOWER case dict with internal indexing,
     all equipment in-service, etc.
 
+    The DC model is formulated in terms of the bus voltage angles C{Va}
+    and the generator outputs C{Pg}, with the nodal power balance
+    equations C{Pmis}, or with C{OPF_DC_FORM = 'ptdf'} in terms of C{Pg}
+    only, with the single system power balance equation C{Pbal} and the
+    flows of the limited branches C{Pf} and C{Pt} given by their rows of
+    the PTDF matrix (see L{dc_factors.ptdf}). The latter needs a single
+    reference bus and no angle difference limits or user constraints or
+    costs on C{Va}. The bus injections and branch flows with all C{Pg} at
+    zero are then saved as the 'Pbus0' and 'Pf0' userdata of the model.
+
     @see: L{opf}, L{ext2int}, L{opf_execute}
 
     @author: Ray Zimmerman (PSERC Cornell)
@@ -44,6 +55,7 @@ def opf_setup(ppc, ppopt):
     ## options
     dc  = ppopt['PF_DC']        ## 1 = DC OPF, 0 = AC OPF
     alg = ppopt['OPF_ALG']
+    ptdf = dc and ppopt['OPF_DC_FORM'] == 'ptdf'    ## PTDF DC formulation
     verbose = ppopt['VERBOSE']
 
     ## data dimensions
@@ -174,6 +186,36 @@ def opf_setup(ppc, ppopt):
     ## branch voltage angle difference limits
     Aang, lang, uang, iang  = makeAang(baseMVA, branch, nb, ppopt)
 
+    ## PTDF formulation, only for a connected network and no terms on Va
+    if ptdf and (len(refs) != 1 or Aang.shape[0] > 0 or
+                 (nusr and ppc['A'][:, :nb].nnz > 0) or
+                 (nw and ppc['N'][:, :nb].nnz > 0)):
+        stderr.write('opf_setup: PTDF DC OPF formulation requires a single '
+                     'reference bus and no angle difference limits or user '
+                     'constraints or costs on Va, using B-theta formulation\n')
+        ptdf = False
+
+    if ptdf:
+        ## flows of the limited branches w.r.t. Pg, and flows with no
+        ## generation (slack at the reference bus)
+        dcf = get_dc_factors(baseMVA, bus, branch)
+        Hg = dcf.ptdf(il, gbus)
+        Pf0 = Bf * dcf.angles(bmis) + Pfinj
+
+        ## system power balance, -sum(Pg) = -sum(Pd + Gs), and flow limits
+        Abal = sparse(-ones((1, ng)))
+        bbal = array([sum(bmis)])
+        Apf = sparse(Hg)
+        upf = branch[il, RATE_A] / baseMVA - Pf0[il]
+        upt = branch[il, RATE_A] / baseMVA + Pf0[il]
+
+        ## user constraints and costs on [Pg, z] only
+        if nusr:
+            ppc['A'] = ppc['A'][:, nb:]
+        if nw:
+            ppc['N'] = ppc['N'][:, nb:]
+        user_vars = ['Pg']
+
     ## basin constraints for piece-wise linear gen cost variables
     if alg == 545 or alg == 550:     ## SC-PDIPM or TRALM, no CCV cost vars
         ny = 0
@@ -189,6 +231,8 @@ def opf_setup(ppc, ppopt):
 
     ## more problem dimensions
     nx = nb+nv + ng+nq;  ## number of standard OPF control variables
+    if ptdf:
+        nx = ng              ## no voltage angle vars
     if nusr:
         nz = ppc['A'].shape[1] - nx  ## number of user z variables
         if nz < 0:
@@ -204,7 +248,16 @@ def opf_setup(ppc, ppopt):
     if len(pwl1) > 0:
         om.userdata('pwl1', pwl1)
 
-    if dc:
+    if ptdf:
+        om.userdata('Bf', Bf)
+        om.userdata('Pfinj', Pfinj)
+        om.userdata('Pbus0', bmis)
+        om.userdata('Pf0', Pf0)
+        om.add_vars('Pg', ng, Pg, Pmin, Pmax)
+        om.add_constraints('Pbal', Abal, bbal, bbal, ['Pg'])       ## 1
+        om.add_constraints('Pf',  Apf, lpf, upf, ['Pg'])           ## nl
+        om.add_constraints('Pt', -Apf, lpf, upt, ['Pg'])           ## nl
+    elif dc:
         om.userdata('Bf', Bf)
         om.userdata('Pfinj', Pfinj)
         om.userdata('iang', iang)
@@ -0,0 +1,92 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Implements the power flow Jacobian assembler object.
+"""
+
+from numpy import arange, ones, zeros, r_, lexsort, bincount, cumsum
+from numpy import flatnonzero as find
+from scipy.sparse import csr_matrix as sparse
+
+from pypower.dSbus_dV import dSbus_dV_nz, dSbus_dV_with_diag
+
+
+class pf_jacobian(object):
+    """This class assembles the Jacobian of the polar power flow equations
+    used by L{newtonpf}::
+
+        J = | dP/dVa(pvpq, pvpq)  dP/dVm(pvpq, pq) |
+            | dQ/dVa(pq, pvpq)    dQ/dVm(pq, pq)   |
+
+    The CSR structure of C{J} is computed once from C{Ybus}, C{pv} and
+    C{pq}, together with a map from the nonzeros of C{Ybus} to the data
+    slots of C{J}. Each call to L{update} then only recomputes the partial
+    derivatives on the nonzeros of C{Ybus} (see L{dSbus_dV_nz}) and scatters
+    them into C{J.data}, without building any intermediate sparse matrix.
+
+    The Jacobian returned by L{update} is the same object on every call,
+    its values being overwritten in place.
+    """
+
+    def __init__(self, Ybus, pv, pq):
+        ## pattern of Ybus with an entry on every diagonal, which receives
+        ## the diag(Ibus) terms of the derivatives
+        Yp, row, d = dSbus_dV_with_diag(Ybus)
+        nb = Yp.shape[0]
+
+        #: admittance matrix defining the pattern
+        self.Ybus = Ybus.tocsr()
+        #: row and column indices and values of the nonzeros of Ybus
+        self.row = row
+        self.col = Yp.indices.copy()
+        self.y = Yp.data.copy()
+        #: positions of the diagonal elements among the nonzeros
+        self.diag = d
+
+        ## positions of rows/columns of each bus in J, -1 if absent
+        pvpq = r_[pv, pq]
+        npvpq = len(pvpq)
+        npq = len(pq)
+        ia = -ones(nb, int)             ## P rows and Va columns
+        ia[pvpq] = arange(npvpq)
+        im = -ones(nb, int)             ## Q rows and Vm columns
+        im[pq] = npvpq + arange(npq)
+
+        ## select the nonzeros of each block, indexing into the stacked
+        ## vector [dS_dVa.real, dS_dVm.real, dS_dVa.imag, dS_dVm.imag]
+        nnz = len(self.y)
+        rows, cols, src = [], [], []
+        for k, (ir, ic) in enumerate([(ia, ia), (ia, im), (im, ia), (im, im)]):
+            r = ir[self.row]
+            c = ic[self.col]
+            i = find((r >= 0) & (c >= 0))
+            rows.append(r[i])
+            cols.append(c[i])
+            src.append(k * nnz + i)
+        rows, cols, src = r_[tuple(rows)], r_[tuple(cols)], r_[tuple(src)]
+
+        ## sort into CSR order
+        nj = npvpq + npq
+        order = lexsort((cols, rows))
+        indptr = r_[0, cumsum(bincount(rows, minlength=nj))]
+
+        #: map from the stacked derivative values to the data of J
+        self.map = src[order]
+        #: the Jacobian, values refreshed in place by L{update}
+        self.J = sparse((zeros(len(order)), cols[order], indptr), (nj, nj))
+
+
+    def update(self, V):
+        """Evaluates the Jacobian at the complex bus voltages C{V}.
+
+        Returns the Jacobian matrix, whose data array is overwritten on
+        each call.
+        """
+        dS_dVm, dS_dVa = dSbus_dV_nz(self.row, self.col, self.y, self.diag,
+                                     V, self.Ybus * V)
+
+        self.J.data[:] = r_[dS_dVa.real, dS_dVm.real,
+                            dS_dVa.imag, dS_dVm.imag][self.map]
+
+        return self.J
@@ -0,0 +1,211 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Sparse linear solvers for the Newton power flow update.
+"""
+
+from sys import stderr
+
+from time import time
+from collections import OrderedDict
+from hashlib import sha1
+
+from numpy import argsort, empty, int32
+from scipy.sparse.linalg import spsolve, splu, spilu, gmres, bicgstab, \
+    LinearOperator
+
+from pypower.ppoption import ppoption
+
+
+## solvers kept per Jacobian structure, most recently used last
+_cache = OrderedDict()
+_CACHE_SIZE = 8
+
+
+class pf_linsolver(object):
+    """Base class of the linear solvers used for the Newton power flow
+    update C{J * dx = F}.
+
+    A solver is created for one sparsity structure of C{J}. L{factor}
+    computes the numeric factorization (or preconditioner) for the current
+    values of C{J}, reusing any symbolic information from earlier calls,
+    and L{solve} solves using the last factorization. The number of calls
+    and the time spent in each are accumulated in C{stats}.
+    """
+
+    #: name used to select the solver with the C{PF_LIN_SOLVER} option
+    name = ''
+
+    def __init__(self, ppopt=None):
+        if ppopt is None:
+            ppopt = ppoption()
+        #: PYPOWER options used by the solver
+        self.ppopt = ppopt
+        #: number of and time spent in factorizations and solves
+        self.stats = {'factor': 0, 'factor_time': 0.0,
+                      'solve': 0, 'solve_time': 0.0}
+        #: true once a factorization is available for L{solve}
+        self.factored = False
+
+
+    def factor(self, J):
+        """Factorizes the matrix C{J}.
+        """
+        t0 = time()
+        self._factor(J.tocsc())
+        self.factored = True
+        self.stats['factor'] += 1
+        self.stats['factor_time'] += time() - t0
+
+
+    def solve(self, b):
+        """Solves C{J * x = b} using the last factorization.
+        """
+        t0 = time()
+        x = self._solve(b)
+        self.stats['solve'] += 1
+        self.stats['solve_time'] += time() - t0
+
+        return x
+
+
+class spsolve_solver(pf_linsolver):
+    """Calls C{scipy.sparse.linalg.spsolve}, which orders and factorizes
+    C{J} from scratch on every solve.
+    """
+
+    name = 'spsolve'
+
+    def _factor(self, J):
+        self.J = J
+
+    def _solve(self, b):
+        return spsolve(self.J, b)
+
+
+class splu_solver(pf_linsolver):
+    """SuperLU factorization with a fixed column permutation.
+
+    The fill-reducing column ordering is computed by the first
+    factorization only. Later factorizations of matrices with the same
+    structure apply it up front and skip the ordering step.
+    """
+
+    name = 'splu'
+
+    def __init__(self, ppopt=None):
+        super(splu_solver, self).__init__(ppopt)
+        #: column ordering applied to J before factorization
+        self.q = None
+
+    def _factor(self, J):
+        if self.q is None:
+            self.lu = splu(J, permc_spec='COLAMD')
+            self.q = argsort(self.lu.perm_c)
+            self.permuted = False
+        else:
+            self.lu = splu(J[:, self.q], permc_spec='NATURAL')
+            self.permuted = True
+
+    def _solve(self, b):
+        if not self.permuted:
+            return self.lu.solve(b)
+        x = empty(len(b))
+        x[self.q] = self.lu.solve(b)
+        return x
+
+
+class ilu_solver(pf_linsolver):
+    """Krylov solver (GMRES or BiCGSTAB) preconditioned with an incomplete
+    LU factorization of C{J}, using the same fixed column ordering as
+    L{splu_solver}.
+
+    The drop tolerance of the incomplete factorization is given by the
+    C{PF_ILU_DROP_TOL} option and the relative tolerance of the iterative
+    solve by C{PF_LIN_TOL}.
+    """
+
+    name = 'gmres'
+
+    def __init__(self, ppopt=None):
+        super(ilu_solver, self).__init__(ppopt)
+        self.q = None
+
+    def _factor(self, J):
+        drop_tol = self.ppopt['PF_ILU_DROP_TOL']
+        self.J = J
+        if self.q is None:
+            ilu = spilu(J, drop_tol=drop_tol, permc_spec='COLAMD')
+            self.q = argsort(ilu.perm_c)
+            self.M = LinearOperator(J.shape, ilu.solve)
+        else:
+            ilu = spilu(J[:, self.q], drop_tol=drop_tol, permc_spec='NATURAL')
+            q = self.q
+
+            def precond(b):
+                x = empty(len(b))
+                x[q] = ilu.solve(b)
+                return x
+
+            self.M = LinearOperator(J.shape, precond)
+
+    def _solve(self, b):
+        krylov = bicgstab if self.name == 'bicgstab' else gmres
+        tol = self.ppopt['PF_LIN_TOL']
+        try:
+            x, info = krylov(self.J, b, M=self.M, rtol=tol, atol=0.0)
+        except TypeError:   ## SciPy < 1.12
+            x, info = krylov(self.J, b, M=self.M, tol=tol, atol=0.0)
+        if info != 0:
+            stderr.write('pf_linsolver: %s did not converge (info = %d)\n' %
+                         (self.name, info))
+
+        return x
+
+
+class bicgstab_solver(ilu_solver):
+    """BiCGSTAB variant of L{ilu_solver}.
+    """
+
+    name = 'bicgstab'
+
+
+_SOLVERS = dict((s.name, s) for s in
+                [spsolve_solver, splu_solver, ilu_solver, bicgstab_solver])
+
+
+def get_linsolver(J, ppopt=None, cache=True):
+    """Returns the linear solver for matrices with the structure of C{J}.
+
+    The solver class is selected by the C{PF_LIN_SOLVER} option. Unless
+    C{cache} is false, solvers are cached by solver name and sparsity
+    structure of C{J}, so repeated power flows on the same topology keep
+    reusing the symbolic information (and factorizations) of earlier runs.
+    Options other than C{PF_LIN_SOLVER} are taken from C{ppopt} on every
+    call.
+    """
+    if ppopt is None:
+        ppopt = ppoption()
+
+    name = ppopt['PF_LIN_SOLVER']
+    if name not in _SOLVERS:
+        raise ValueError('get_linsolver: unknown PF_LIN_SOLVER \'%s\'' % name)
+    if not cache:
+        return _SOLVERS[name](ppopt)
+
+    J = J.tocsr()
+    h = sha1(J.indptr.astype(int32).tobytes())
+    h.update(J.indices.astype(int32).tobytes())
+    key = (name, J.shape, h.hexdigest())
+
+    if key in _cache:
+        solver = _cache.pop(key)
+        solver.ppopt = ppopt
+    else:
+        solver = _SOLVERS[name](ppopt)
+        if len(_cache) >= _CACHE_SIZE:
+            _cache.popitem(last=False)
+    _cache[key] = solver
+
+    return solver
@@ -5,15 +5,17 @@
 """Python Interior Point Solver (PIPS).
 """
 
+from collections import OrderedDict
+
 from numpy import array, Inf, any, isnan, ones, r_, finfo, \
-    zeros, dot, absolute, log, flatnonzero as find
+    zeros, dot, absolute, log, maximum, minimum, flatnonzero as find
 
 from numpy.linalg import norm
 
 from scipy.sparse import vstack, hstack, eye, csr_matrix as sparse
-from scipy.sparse.linalg import spsolve
 
 from pypower.pipsver import pipsver
+from pypower.pips_kkt import pips_kkt
 
 
 EPS = finfo(float).eps
@@ -140,6 +142,24 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
                     value is also passed as the 3rd argument to the Hessian
                     evaluation function so that it can appropriately scale the
                     objective function term in the Hessian of the Lagrangian.
+                  - C{linsolver} ('splu') - linear solver for the KKT system
+                    of the Newton steps, 'spsolve', 'splu' or 'ldl' (see
+                    L{pips_kkt})
+                  - C{values_only} (False) - set to True if C{gh_fcn}
+                    accepts a 2nd argument C{values_only}, in which case it
+                    is called with True when only the constraint values are
+                    needed (in the step-size control) and may return
+                    C{None} for the gradients
+                  - C{blocks} (None) - index of the block of each variable,
+                    for problems made of blocks coupled by few constraints,
+                    to order the KKT system block by block (see L{pips_kkt})
+                  - C{warm} (None) - the C{warm} value of the solution of a
+                    previous problem with the same dimensions, to start from
+                    its primal and dual point instead of the default one.
+                    C{x0} is then usually its C{x}
+                  - C{warm_push} (1e-4) - relative distance by which a warm
+                    start moves C{x0} away from the variable bounds, and the
+                    minimum of its slacks and inequality multipliers
     @type opt: dict
 
     @rtype: dict
@@ -154,7 +174,9 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
                    - C{iterations} - number of iterations performed
                    - C{hist} - list of arrays with trajectories of the
                      following: feascond, gradcond, compcond, costcond, gamma,
-                     stepsize, obj, alphap, alphad
+                     stepsize, obj, alphap, alphad, and the times spent in
+                     the assembly, factorization and solve of the KKT system,
+                     t_assemble, t_factor, t_solve
                    - C{message} - exit message
                - C{lmbda} - dictionary containing the Langrange and Kuhn-Tucker
                  multipliers on the constraints, with keys:
@@ -164,6 +186,8 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
                    - C{mu_u} - upper (right-hand) limit on linear constraints
                    - C{lower} - lower bound on optimization variables
                    - C{upper} - upper bound on optimization variables
+               - C{warm} - final primal and dual point, to warm start a
+                 later solve with the C{warm} option
 
     @see: U{http://www.pserc.cornell.edu/matpower/}
 
@@ -217,6 +241,19 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
         opt["cost_mult"] = 1
     if "verbose" not in opt:
         opt["verbose"] = 0
+    if "linsolver" not in opt:
+        opt["linsolver"] = 'splu'
+    if "values_only" not in opt:
+        opt["values_only"] = False
+    if "blocks" not in opt:
+        opt["blocks"] = None
+    if "warm" not in opt:
+        opt["warm"] = None
+    if "warm_push" not in opt:
+        opt["warm_push"] = 1e-4
+
+    # cost and constraint evaluations, cached on the iterate
+    ev = _evaluator(f_fcn, gh_fcn, opt["values_only"])
 
     # initialize history
     hist = []
@@ -258,11 +295,14 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
 
     # evaluate cost f(x0) and constraints g(x0), h(x0)
     x = x0
-    f, df = f_fcn(x)                 # cost
+    if opt["warm"] is not None:
+        # move the starting point away from the variable bounds
+        x = _push_interior(x0, xmin, xmax, opt["warm_push"])
+    f, df = ev.f(x)                  # cost
     f = f * opt["cost_mult"]
     df = df * opt["cost_mult"]
     if nonlinear:
-        hn, gn, dhn, dgn = gh_fcn(x)        # nonlinear constraints
+        hn, gn, dhn, dgn = ev.gh(x)         # nonlinear constraints
         h = hn if Ai is None else r_[hn, Ai * x - bi] # inequality constraints
         g = gn if Ae is None else r_[gn, Ae * x - be] # equality constraints
 
@@ -298,6 +338,9 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
     ngt = len(igt)             # number of lower bounded linear inequalities
     nbx = len(ibx)             # number of doubly bounded linear inequalities
 
+    # KKT system of the Newton steps, with a fixed structure
+    kkt = pips_kkt(nx, neq, opt["linsolver"], opt["blocks"])
+
     # initialize gamma, lam, mu, z, e
     gamma = 1                  # barrier coefficient
     lam = zeros(neq)
@@ -309,6 +352,19 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
     mu[k] = gamma / z[k]
     e = ones(niq)
 
+    # warm start from the solution of a problem with the same structure,
+    # with slacks and multipliers pushed back into the interior
+    warm = opt["warm"]
+    if warm is not None and len(warm["z"]) == niq and \
+            len(warm["lam"]) == neq:
+        push = opt["warm_push"]
+        lam = warm["lam"] * opt["cost_mult"]
+        z = maximum(warm["z"], push * maximum(1, absolute(h)))
+        mu = maximum(warm["mu"] * opt["cost_mult"], push * opt["cost_mult"])
+        if niq > 0:
+            gamma = max(warm["gamma"] * opt["cost_mult"],
+                        sigma * dot(z, mu) / niq)
+
     # check tolerance
     f0 = f
     if opt["step_control"]:
@@ -334,7 +390,8 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
     # save history
     hist.append({'feascond': feascond, 'gradcond': gradcond,
         'compcond': compcond, 'costcond': costcond, 'gamma': gamma,
-        'stepsize': 0, 'obj': f / opt["cost_mult"], 'alphap': 0, 'alphad': 0})
+        'stepsize': 0, 'obj': f / opt["cost_mult"], 'alphap': 0, 'alphad': 0,
+        't_assemble': 0.0, 't_factor': 0.0, 't_solve': 0.0})
 
     if opt["verbose"]:
         s = '-sc' if opt["step_control"] else ''
@@ -381,13 +438,10 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
         M = Lxx if dh is None else Lxx + dh_zinv * mudiag * dh.T
         N = Lx if dh is None else Lx + dh_zinv * (mudiag * h + gamma * e)
 
-        Ab = sparse(M) if dg is None else vstack([
-            hstack([M, dg]),
-            hstack([dg.T, sparse((neq, neq))])
-        ])
+        kkt.update(M, dg)
         bb = r_[-N, -g]
 
-        dxdlam = spsolve(Ab.tocsr(), bb)
+        dxdlam = kkt.solve(bb)
 
         if any(isnan(dxdlam)):
             if opt["verbose"]:
@@ -406,11 +460,11 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
             x1 = x + dx
 
             # evaluate cost, constraints, derivatives at x1
-            f1, df1 = f_fcn(x1)          # cost
+            f1, df1 = ev.f(x1)           # cost
             f1 = f1 * opt["cost_mult"]
             df1 = df1 * opt["cost_mult"]
             if nonlinear:
-                hn1, gn1, dhn1, dgn1 = gh_fcn(x1) # nonlinear constraints
+                hn1, gn1, dhn1, dgn1 = ev.gh(x1)  # nonlinear constraints
 
                 h1 = hn1 if Ai is None else r_[hn1, Ai * x1 - bi] # ieq constraints
                 g1 = gn1 if Ae is None else r_[gn1, Ae * x1 - be] # eq constraints
@@ -464,10 +518,10 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
             for j in range(opt["max_red"]):
                 dx1 = alpha * dx
                 x1 = x + dx1
-                f1, _ = f_fcn(x1)             # cost
+                f1, _ = ev.f(x1)              # cost
                 f1 = f1 * opt["cost_mult"]
                 if nonlinear:
-                    hn1, gn1, _, _ = gh_fcn(x1)              # nonlinear constraints
+                    hn1, gn1, _, _ = ev.gh(x1, False)        # nonlinear constraints
                     h1 = hn1 if Ai is None else r_[hn1, Ai * x1 - bi]         # inequality constraints
                     g1 = gn1 if Ae is None else r_[gn1, Ae * x1 - be]         # equality constraints
                 else:
@@ -503,11 +557,11 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
             gamma = sigma * dot(z, mu) / niq
 
         # evaluate cost, constraints, derivatives
-        f, df = f_fcn(x)             # cost
+        f, df = ev.f(x)              # cost
         f = f * opt["cost_mult"]
         df = df * opt["cost_mult"]
         if nonlinear:
-            hn, gn, dhn, dgn = gh_fcn(x)                   # nln constraints
+            hn, gn, dhn, dgn = ev.gh(x)                    # nln constraints
 #            g = gn if Ai is None else r_[gn, Ai * x - bi] # ieq constraints
 #            h = hn if Ae is None else r_[hn, Ae * x - be] # eq constraints
             h = hn if Ai is None else r_[hn, Ai * x - bi] # ieq constr
@@ -558,7 +612,9 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
         hist.append({'feascond': feascond, 'gradcond': gradcond,
             'compcond': compcond, 'costcond': costcond, 'gamma': gamma,
             'stepsize': norm(dx), 'obj': f / opt["cost_mult"],
-            'alphap': alphap, 'alphad': alphad})
+            'alphap': alphap, 'alphad': alphad,
+            't_assemble': kkt.times['assemble'],
+            't_factor': kkt.times['factor'], 't_solve': kkt.times['solve']})
 
         if opt["verbose"] > 1:
             print("%3d  %12.8g %10.5g %12g %12g %12g %12g" %
@@ -601,6 +657,10 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
 
     output = {"iterations": i, "hist": hist, "message": message}
 
+    # final point, for warm starts
+    warm = {"x": x, "z": z.copy(), "lam": lam / opt["cost_mult"],
+            "mu": mu / opt["cost_mult"], "gamma": gamma / opt["cost_mult"]}
+
     # zero out multipliers on non-binding constraints
     mu[find( (h < -opt["feastol"]) & (mu < mu_threshold) )] = 0.0
 
@@ -638,10 +698,84 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
 #             "lower": mu_l[:nx], "upper": mu_u[:nx]}
 
     solution =  {"x": x, "f": f, "eflag": converged,
-                 "output": output, "lmbda": lmbda}
+                 "output": output, "lmbda": lmbda, "warm": warm}
 
     return solution
 
+
+def _push_interior(x, xmin, xmax, push):
+    """Moves C{x} inside C{xmin <= x <= xmax}, by
+    C{push * min(max(1, |bound|), xmax - xmin)} from each finite bound, as
+    IPOPT does with its C{bound_push} and C{bound_frac} options. Fixed
+    variables are set to their value.
+    """
+    x = x.copy()
+    rng = xmax - xmin
+    k = find((xmin > -1e10) & (rng > EPS))
+    lo = xmin[k] + push * minimum(maximum(1, absolute(xmin[k])), rng[k])
+    x[k] = maximum(x[k], lo)
+    k = find((xmax < 1e10) & (rng > EPS))
+    hi = xmax[k] - push * minimum(maximum(1, absolute(xmax[k])), rng[k])
+    x[k] = minimum(x[k], hi)
+    k = find(rng <= EPS)
+    x[k] = xmin[k]
+
+    return x
+
+
+class _evaluator(object):
+    """Evaluates the cost and nonlinear constraints for L{pips}, keeping the
+    results for the last few iterates.
+
+    With step-size control, the same trial point is evaluated up to three
+    times, for the step test, the first reduction and after the update.
+    Results are looked up by the bytes of the iterate, and constraint
+    values computed without gradients are only reused when no gradients
+    are needed.
+    """
+
+    #: number of iterates kept
+    size = 3
+
+    def __init__(self, f_fcn, gh_fcn, values_only=False):
+        self.f_fcn = f_fcn
+        self.gh_fcn = gh_fcn
+        self.values_only = values_only
+        self.fs = OrderedDict()
+        self.ghs = OrderedDict()
+
+
+    def f(self, x):
+        """Cost and its gradient at C{x}.
+        """
+        key = x.tobytes()
+        if key not in self.fs:
+            self._store(self.fs, key, self.f_fcn(x))
+
+        return self.fs[key]
+
+
+    def gh(self, x, derivs=True):
+        """Nonlinear constraints at C{x}, with their gradients unless
+        C{derivs} is false and C{gh_fcn} has a values only mode.
+        """
+        key = x.tobytes()
+        if key not in self.ghs or (derivs and not self.ghs[key][1]):
+            if derivs or not self.values_only:
+                self._store(self.ghs, key, (self.gh_fcn(x), True))
+            else:
+                self._store(self.ghs, key, (self.gh_fcn(x, True), False))
+
+        return self.ghs[key][0]
+
+
+    def _store(self, cache, key, value):
+        cache.pop(key, None)
+        if len(cache) >= self.size:
+            cache.popitem(last=False)
+        cache[key] = value
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
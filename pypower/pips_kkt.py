@@ -0,0 +1,259 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Assembles and solves the KKT systems of the PIPS Newton steps.
+"""
+
+from time import time
+
+from numpy import arange, argsort, empty, zeros, ones, r_, unique, \
+    searchsorted, bincount, cumsum, lexsort, minimum, all as all_, Inf
+from scipy.sparse import csc_matrix, coo_matrix, eye
+from scipy.sparse.linalg import splu
+
+from pypower.pf_linsolver import pf_linsolver, spsolve_solver, splu_solver
+
+
+class pips_kkt(object):
+    """This class assembles and solves the KKT system of the Newton step of
+    L{pips}::
+
+        | M   dg | | dx   |   | -N |
+        | dg'  0 | | dlam | = | -g |
+
+    The sparsity structure of the KKT matrix, with all its diagonal
+    elements, is built from the first C{M} and C{dg} given to L{update},
+    together with the positions of their nonzeros. Later calls only
+    scatter the new values into its data, and the linear solver keeps
+    its fill-reducing ordering for the whole solve. If the nonzeros of
+    C{M} or C{dg} ever fall outside the structure, it is extended to the
+    union of both and the solver restarts.
+
+    The linear solver is selected by name:
+        - C{'spsolve'} - SciPy C{spsolve}, orders and factorizes every step
+        - C{'splu'} - SuperLU, column ordering of the first step reused
+        - C{'ldl'} - symmetric indefinite factorization with inertia
+          correction (see L{ldl_solver})
+
+    If the variables form C{blocks} coupled by only a few constraints, as
+    the periods of a multi-period problem, C{blocks} gives the index of the
+    block of each variable. The C{'splu'} and C{'ldl'} solvers then order
+    the KKT matrix block by block (see L{_block_order}), so that its fill-in
+    grows linearly with the number of blocks.
+
+    The time spent in the last L{update} and in the factorization and
+    solve of the last L{solve} is in C{times}.
+    """
+
+    def __init__(self, nx, neq, solver='splu', blocks=None):
+        if solver not in _SOLVERS:
+            raise ValueError('pips_kkt: unknown linear solver \'%s\'' % solver)
+        #: number of variables and of equality constraints
+        self.nx, self.neq = nx, neq
+        #: name of the linear solver
+        self.solver_name = solver
+        self.solver = None
+        #: block of each variable
+        self.blocks = blocks
+        #: sorted column-major keys of the nonzeros of the KKT matrix
+        self.key = None
+        #: KKT matrix of the last update
+        self.K = None
+        #: times of the last assembly, factorization and solve
+        self.times = {'assemble': 0.0, 'factor': 0.0, 'solve': 0.0}
+
+
+    def update(self, M, dg=None):
+        """Sets the values of the KKT matrix to those of C{M} and C{dg}.
+        """
+        t0 = time()
+        nx = self.nx
+        n = nx + self.neq
+        Mc = coo_matrix(M)
+        rows, cols, vals = [Mc.row], [Mc.col], [Mc.data]
+        if dg is not None:
+            G = coo_matrix(dg)
+            rows += [G.row, nx + G.col]
+            cols += [nx + G.col, G.row]
+            vals += [G.data, G.data]
+        rows, cols, vals = r_[tuple(rows)], r_[tuple(cols)], r_[tuple(vals)]
+        key = cols * n + rows
+
+        if self.key is not None:
+            pos = searchsorted(self.key, key)
+            pos[pos == len(self.key)] = 0
+        if self.key is None or not all_(self.key[pos] == key):
+            ## new or extended structure, always with the full diagonal
+            old = self.key if self.key is not None else arange(n) * (n + 1)
+            self.key = unique(r_[old, key])
+            self.indices = self.key % n
+            self.indptr = r_[0, cumsum(bincount(self.key // n, minlength=n))]
+            self.solver = _new_solver(self.solver_name, nx)
+            pos = searchsorted(self.key, key)
+
+        data = bincount(pos, vals, len(self.key))
+        self.K = csc_matrix((data, self.indices, self.indptr), (n, n))
+        if self.blocks is not None and hasattr(self.solver, 'q') and \
+                self.solver.q is None:
+            self.solver.q = _block_order(self.K, self.blocks)
+        self.times['assemble'] = time() - t0
+
+
+    def solve(self, b):
+        """Factorizes the KKT matrix of the last L{update} and solves for
+        the right hand side C{b}. Returns C{NaN}s if the matrix is singular.
+        """
+        stats = self.solver.stats
+        t_factor, t_solve = stats['factor_time'], stats['solve_time']
+        try:
+            self.solver.factor(self.K)
+            x = self.solver.solve(b)
+        except RuntimeError:            ## singular matrix
+            x = empty(len(b))
+            x[:] = float('nan')
+        self.times['factor'] = stats['factor_time'] - t_factor
+        self.times['solve'] = stats['solve_time'] - t_solve
+
+        return x
+
+
+class ldl_solver(pf_linsolver):
+    """Symmetric indefinite (LDL') factorization of KKT matrices, with
+    inertia correction.
+
+    SciPy has no sparse LDL' factorization, so the KKT matrix is
+    factorized by SuperLU in symmetric mode, with a symmetric minimum
+    degree ordering computed once and only diagonal pivots. To make
+    diagonal pivots always available, the matrix is regularized to the
+    quasi-definite::
+
+        | M + dw * I     dg    |
+        |    dg'      -dc * I  |
+
+    with the fixed C{dc = 1e-8}, so that C{D} is the diagonal of C{U} and
+    its signs give the inertia of the matrix. As in IPOPT, C{dw} is
+    increased from zero until the inertia is C{(nx, neq, 0)}, i.e. the
+    Hessian C{M} is positive definite on the null space of C{dg'}, and its
+    last nonzero value is used to start the next correction. Each solve
+    ends with one step of iterative refinement on the matrix with C{dc = 0}.
+    The numbers of corrections and the last C{dw} are kept in C{stats}.
+    """
+
+    name = 'ldl'
+
+    #: regularization of the constraint block
+    dc = 1e-8
+    #: first, min and max Hessian corrections and their factors
+    dw0, dw_min, dw_max = 1e-4, 1e-20, 1e40
+    kappa_minus, kappa_plus, kappa_plus_bar = 1. / 3, 8., 100.
+
+    def __init__(self, ppopt=None, npos=0):
+        super(ldl_solver, self).__init__(ppopt)
+        #: number of positive eigenvalues of a correct inertia
+        self.npos = npos
+        #: symmetric ordering of the matrix
+        self.q = None
+        self.stats['inertia_corr'] = 0
+        self.stats['dw'] = 0.0
+
+    def _factor(self, K):
+        n = K.shape[0]
+        if self.q is None:
+            lu = splu(K, permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0.,
+                      options=dict(SymmetricMode=True))
+            self.q = argsort(lu.perm_c)
+        Kp = K[self.q, :][:, self.q].tocsc()
+        top = (arange(n) < self.npos)[self.q]   ## Hessian block, permuted
+        dc = self.dc * ~top
+
+        last = self.stats['dw']
+        dw = 0.0
+        while True:
+            self.lu = splu(Kp - _diag(dc, n), permc_spec='NATURAL',
+                           diag_pivot_thresh=0.,
+                           options=dict(SymmetricMode=True))
+            if _inertia(self.lu) == self.npos:
+                break
+            if dw == 0:
+                dw = self.dw0 if last == 0 else \
+                    max(self.dw_min, self.kappa_minus * last)
+            else:
+                dw *= self.kappa_plus_bar if last == 0 else self.kappa_plus
+            if dw > self.dw_max:
+                raise RuntimeError('ldl_solver: inertia correction failed')
+            self.stats['inertia_corr'] += 1
+            Kp = K[self.q, :][:, self.q].tocsc() + _diag(dw * top, n)
+
+        if dw > 0:
+            self.stats['dw'] = dw
+        self.Kp = Kp
+
+    def _solve(self, b):
+        bp = b[self.q]
+        y = self.lu.solve(bp)
+        y += self.lu.solve(bp - self.Kp * y)
+        x = empty(len(b))
+        x[self.q] = y
+        return x
+
+
+def _block_order(K, blocks):
+    """Fill-reducing ordering of the KKT matrix C{K} of variables in
+    C{blocks}.
+
+    Each constraint belongs to the first block of its variables. The rows
+    of each block come one block after the other, those coupled to other
+    blocks last, and in each block in the minimum degree order of the
+    matrix without the coupling entries. The fill-in of a block then only
+    reaches the coupling rows of the next one.
+    """
+    n = K.shape[0]
+    nx = len(blocks)
+    C = coo_matrix(K)
+    b = r_[blocks, zeros(n - nx, int) + max(blocks) + 1].astype(int)
+    k = (C.row >= nx) & (C.col < nx)
+    minimum.at(b, C.row[k], b[C.col[k]])
+
+    ## rows coupled to other blocks, matrix without the couplings
+    cross = b[C.row] != b[C.col]
+    coupled = zeros(n, bool)
+    coupled[C.row[cross]] = True
+    B = csc_matrix((ones(sum(~cross)), (C.row[~cross], C.col[~cross])),
+                   (n, n))
+    q = argsort(splu(B + n * eye(n, format='csc'),
+                     permc_spec='MMD_ATA').perm_c)
+
+    return q[lexsort((coupled[q], b[q]))]
+
+
+def _diag(d, n):
+    """Sparse diagonal matrix with the diagonal C{d}.
+    """
+    return csc_matrix((d, (arange(n), arange(n))), (n, n))
+
+
+def _inertia(lu):
+    """Number of positive pivots of a symmetric SuperLU factorization, or
+    -1 if it used off-diagonal pivots or has zero pivots.
+    """
+    n = lu.shape[0]
+    d = lu.U.diagonal()
+    if not all_(lu.perm_r == arange(n)) or not all_(abs(d) > 0) or \
+            not all_(abs(d) < Inf):
+        return -1
+
+    return int((d > 0).sum())
+
+
+_SOLVERS = dict((s.name, s) for s in [spsolve_solver, splu_solver, ldl_solver])
+
+
+def _new_solver(name, nx):
+    """New linear solver named C{name} for KKT matrices with C{nx}
+    variables.
+    """
+    if name == 'ldl':
+        return ldl_solver(npos=nx)
+
+    return _SOLVERS[name]()
@@ -53,6 +53,18 @@ def pipsopf_solver(om, ppopt, out_opt=None):
         - pimul  constraint multipliers
         - info   solver specific termination code
         - output solver specific output information
+        - warm   final point of PIPS, see below
+
+    The OPF is warm started from the solution of a previous one with the
+    same structure if the case has a C{warm} key set to its C{raw['warm']},
+    e.g. after a small change of the loads::
+
+        r1 = runopf(ppc, ppopt)
+        ppc['warm'] = r1['raw']['warm']
+        r2 = runopf(ppc, ppopt)
+
+    If the warm started solve fails, the OPF is solved again from the
+    default starting point.
 
     @see: L{opf}, L{pips}
 
@@ -84,6 +96,8 @@ def pipsopf_solver(om, ppopt, out_opt=None):
              'max_red': max_red,
              'step_control': step_control,
              'cost_mult': 1e-4,
+             'linsolver': ppopt['PDIPM_LIN_SOLVER'],
+             'values_only': True,
              'verbose': verbose  }
 
     ## unpack data
@@ -92,6 +106,11 @@ def pipsopf_solver(om, ppopt, out_opt=None):
         ppc["baseMVA"], ppc["bus"], ppc["gen"], ppc["branch"], ppc["gencost"]
     vv, _, nn, _ = om.get_idx()
 
+    ## blocks of variables, e.g. periods of a multi-period OPF
+    blocks = om.userdata('blocks')
+    if len(blocks) == om.var['N']:
+        opt['blocks'] = blocks
+
     ## problem dimensions
     nb = bus.shape[0]          ## number of buses
     nl = branch.shape[0]       ## number of branches
@@ -122,16 +141,35 @@ def pipsopf_solver(om, ppopt, out_opt=None):
         x0[vv["i1"]["y"]:vv["iN"]["y"]] = max(c) + 0.1 * abs(max(c))
 #        x0[vv["i1"]["y"]:vv["iN"]["y"]] = c + 0.1 * abs(c)
 
+    ## warm start from the solution of a previous OPF
+    warm = ppc.get('warm')
+    if warm is not None and len(warm['x']) != len(x0):
+        warm = None
+
     ## find branches with flow limits
     il = find((branch[:, RATE_A] != 0) & (branch[:, RATE_A] < 1e10))
     nl2 = len(il)           ## number of constrained lines
 
+    ## admittance matrices of constrained lines, sliced once so that the
+    ## Jacobian and Hessian structures cached in om are reused
+    Yfl, Ytl = Yf[il, :], Yt[il, :]
+
     ##-----  run opf  -----
     f_fcn = lambda x, return_hessian=False: opf_costfcn(x, om, return_hessian)
-    gh_fcn = lambda x: opf_consfcn(x, om, Ybus, Yf[il, :], Yt[il,:], ppopt, il)
-    hess_fcn = lambda x, lmbda, cost_mult: opf_hessfcn(x, lmbda, om, Ybus, Yf[il, :], Yt[il, :], ppopt, il, cost_mult)
-
-    solution = pips(f_fcn, x0, A, l, u, xmin, xmax, gh_fcn, hess_fcn, opt)
+    gh_fcn = lambda x, values_only=False: \
+        opf_consfcn(x, om, Ybus, Yfl, Ytl, ppopt, il, values_only)
+    hess_fcn = lambda x, lmbda, cost_mult: opf_hessfcn(x, lmbda, om, Ybus, Yfl, Ytl, ppopt, il, cost_mult)
+
+    if warm is not None:
+        opt['warm'] = warm
+        solution = pips(f_fcn, warm['x'], A, l, u, xmin, xmax, gh_fcn,
+                        hess_fcn, opt)
+        if solution['eflag'] <= 0:
+            ## too far from the previous solution, start from scratch
+            opt['warm'] = None
+            warm = None
+    if warm is None:
+        solution = pips(f_fcn, x0, A, l, u, xmin, xmax, gh_fcn, hess_fcn, opt)
     x, f, info, lmbda, output = solution["x"], solution["f"], \
             solution["eflag"], solution["lmbda"], solution["output"]
 
@@ -203,6 +241,7 @@ def pipsopf_solver(om, ppopt, out_opt=None):
       'lin': {'l': lmbda["mu_l"], 'u': lmbda["mu_u"]} }
 
     results = ppc
+    results.pop('warm', None)
     results["bus"], results["branch"], results["gen"], \
         results["om"], results["x"], results["mu"], results["f"] = \
             bus, branch, gen, om, x, mu, f
@@ -213,6 +252,7 @@ def pipsopf_solver(om, ppopt, out_opt=None):
         -ones(int(ny > 0)),
         results["mu"]["var"]["l"] - results["mu"]["var"]["u"],
     ]
-    raw = {'xr': x, 'pimul': pimul, 'info': info, 'output': output}
+    raw = {'xr': x, 'pimul': pimul, 'info': info, 'output': output,
+           'warm': solution['warm']}
 
     return results, success, raw
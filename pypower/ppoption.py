@@ -13,7 +13,9 @@ PF_OPTIONS = [
 1 - Newton's method,
 2 - Fast-Decoupled (XB version),
 3 - Fast-Decoupled (BX version),
-4 - Gauss Seidel'''),
+4 - Gauss Seidel,
+5 - Newton's method, current injection in
+    cartesian coordinates'''),
 
     ('pf_tol', 1e-8, 'termination tolerance on per unit P & Q mismatch'),
 
@@ -25,8 +27,77 @@ PF_OPTIONS = [
     ('pf_max_it_gs', 1000, 'maximum number of iterations for '
      'Gauss-Seidel method'),
 
-    ('enforce_q_lims', False, 'enforce gen reactive power limits, at '
-     'expense of |V|'),
+    ('pf_gs_alg', 'gs', '''update scheme of the Gauss-Seidel power flow
+(PF_ALG = 4):
+'gs'     - Gauss-Seidel,
+'sor'    - successive over-relaxation by PF_SOR_OMEGA,
+'jacobi' - Jacobi, all buses updated at once'''),
+
+    ('pf_sor_omega', 1.6, 'relaxation factor for PF_GS_ALG = sor'),
+
+    ('pf_lin_solver', 'spsolve', '''linear solver for Newton updates:
+'spsolve'  - SciPy spsolve, refactorizes from scratch,
+'splu'     - SuperLU, column ordering reused while
+             the Jacobian structure is unchanged,
+'gmres'    - ILU preconditioned GMRES,
+'bicgstab' - ILU preconditioned BiCGSTAB'''),
+
+    ('pf_lin_tol', 1e-10, 'relative tolerance of iterative linear '
+     'solvers (PF_LIN_SOLVER = gmres or bicgstab)'),
+
+    ('pf_ilu_drop_tol', 1e-4, 'drop tolerance of the ILU preconditioner '
+     'for iterative linear solvers'),
+
+    ('pf_jac_reuse', 0, '''reuse Jacobian factors in Newton's method
+(dishonest Newton):
+0 - refactorize on every iteration,
+1 - reuse factors from previous iterations,
+2 - also reuse factors from the previous power flow
+    with the same Jacobian structure'''),
+
+    ('pf_jac_reuse_ratio', 10, 'with PF_JAC_REUSE, refactorize when the '
+     'ratio of the previous to the new max mismatch drops below this '
+     '(iterations with old factors count against PF_MAX_IT)'),
+
+    ('pf_nr_step', 0, '''step length control in Newton's method:
+0 - always take the full Newton step,
+1 - Iwamoto optimal multiplier,
+2 - backtracking line search'''),
+
+    ('pf_nr_ls_max_it', 5, 'with PF_NR_STEP = 2, max number of step '
+     'reductions per iteration'),
+
+    ('enforce_q_lims', False, '''enforce gen reactive power limits, at
+expense of |V|:
+0 - do not enforce limits,
+1 - convert all violating gens to PQ and re-run,
+2 - convert the largest violation to PQ and re-run,
+3 - switch bus types inside the solver (PF_ALG 1-3)'''),
+
+    ('pf_qlim_tol', 1e-3, 'with ENFORCE_Q_LIMS = 3, max mismatch below '
+     'which Q limits are checked'),
+
+    ('pf_qlim_backswitch', False, 'with ENFORCE_Q_LIMS = 3, allow buses '
+     'switched to PQ to switch back to PV'),
+
+    ('cpf_parameterization', 3, '''parameterization of continuation power flow:
+1 - natural (lambda),
+2 - arc length,
+3 - pseudo arc length'''),
+
+    ('cpf_stop_at', 'NOSE', '''end point of continuation power flow:
+'NOSE'   - stop at the nose point,
+'FULL'   - trace back down to lambda = 0,
+'TARGET' - stop at lambda = 1, the target case'''),
+
+    ('cpf_step', 0.05, 'continuation power flow step size'),
+
+    ('cpf_step_min', 1e-4, 'continuation power flow minimum step size, '
+     'steps are halved down to this to locate the nose and after '
+     'corrector failures'),
+
+    ('cpf_max_steps', 1000, 'maximum number of continuation power flow '
+     'steps'),
 
     ('pf_dc', False, '''use DC power flow formulation, for power flow and OPF:
 False - use AC formulation & corresponding algorithm opts,
@@ -71,7 +142,15 @@ available from: https://projects.coin-or.org/Ipopt/
 600 - MOSEK, requires Python interface to MOSEK solver
 available from: http://www.mosek.com/
 700 - GUROBI, requires Python interface to Gurobi optimizer
-available from: http://www.gurobi.com/''')
+available from: http://www.gurobi.com/'''),
+
+    ('opf_dc_form', 'btheta', '''formulation of the DC OPF:
+'btheta' - bus voltage angles and generator outputs,
+           nodal power balance and flows of the
+           limited branches in terms of the angles,
+'ptdf'   - generator outputs only, system power
+           balance and flows of the limited branches
+           from the PTDF matrix''')
 ]
 
 OUTPUT_OPTIONS = [
@@ -136,7 +215,14 @@ Primal-Dual Interior Points Methods'''),
     ('pdipm_max_it',  150, '''maximum number of iterations for
 Primal-Dual Interior Points Methods'''),
     ('scpdipm_red_it', 20, '''maximum number of reductions per iteration
-for Step-Control Primal-Dual Interior Points Methods''')
+for Step-Control Primal-Dual Interior Points Methods'''),
+    ('pdipm_lin_solver', 'splu', '''linear solver for the KKT system of
+Primal-Dual Interior Points Methods (PIPS):
+'spsolve' - SciPy spsolve, refactorizes from scratch,
+'splu'    - SuperLU, column ordering reused while
+            the KKT structure is unchanged,
+'ldl'     - symmetric indefinite factorization with
+            inertia correction''')
 ]
 
 GUROBI_OPTIONS = [
@@ -0,0 +1,94 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Switches bus types to enforce reactive power limits during a power flow.
+"""
+
+import sys
+
+from numpy import conj, r_, sort, in1d, ones, zeros, flatnonzero as find
+from scipy.sparse import csr_matrix as sparse
+
+from pypower.idx_bus import QD
+from pypower.idx_gen import GEN_BUS, GEN_STATUS, QMIN, QMAX
+
+
+def qlim_switch(Ybus, V, Sbus, pv, pq, qlim, verbose=0):
+    """Switches bus types to enforce reactive power limits.
+
+    C{qlim} is the dict of bus reactive injection limits built by
+    L{qlim_buses}, whose C{'pv0'} and C{'Vset'} entries give the buses that
+    were originally PV and their voltage set points. PV buses whose
+    reactive injection at the voltages C{V} violates a limit are converted
+    to PQ buses with the injection fixed at the limit in C{Sbus}. If
+    C{qlim['backswitch']} is true, converted buses whose voltage has moved
+    past the set point in the direction that would reduce their reactive
+    injection away from the limit (above it when at the upper limit, below
+    it when at the lower limit) are converted back to PV buses, and their
+    voltage magnitude is reset to the set point.
+
+    Returns the updated voltages, C{Sbus}, C{pv} and C{pq}, and the
+    number of buses whose type was switched. C{V} and C{Sbus} are
+    modified in place.
+    """
+    Qmin, Qmax = qlim['Qmin'], qlim['Qmax']
+    Vset = qlim['Vset']
+
+    ## reactive injections at PV buses
+    Qpv = (V[pv] * conj(Ybus[pv, :] * V)).imag
+    hi = pv[Qpv > Qmax[pv]]
+    lo = pv[Qpv < Qmin[pv]]
+    Sbus[hi] = Sbus[hi].real + 1j * Qmax[hi]
+    Sbus[lo] = Sbus[lo].real + 1j * Qmin[lo]
+    topq = r_[hi, lo]
+
+    ## PQ buses with gens, back to PV?
+    topv = zeros(0, int)
+    if qlim['backswitch']:
+        lim = pq[in1d(pq, qlim['pv0'])]
+        Vm = abs(V[lim])
+        athi = Sbus[lim].imag >= Qmax[lim]
+        atlo = Sbus[lim].imag <= Qmin[lim]
+        topv = lim[(athi & (Vm > Vset[lim])) | (atlo & (Vm < Vset[lim]))]
+        V[topv] = Vset[topv] * V[topv] / abs(V[topv])
+
+    if verbose > 1:
+        for k in hi:
+            sys.stdout.write('\nBus %d at upper Q limit, converting to PQ bus'
+                             % (k + 1))
+        for k in lo:
+            sys.stdout.write('\nBus %d at lower Q limit, converting to PQ bus'
+                             % (k + 1))
+        for k in topv:
+            sys.stdout.write('\nBus %d back within Q limits, converting to '
+                             'PV bus' % (k + 1))
+
+    if len(topq) or len(topv):
+        pv = sort(r_[pv[~in1d(pv, topq)], topv]).astype(int)
+        pq = sort(r_[pq[~in1d(pq, topv)], topq]).astype(int)
+
+    return V, Sbus, pv, pq, len(topq) + len(topv)
+
+
+def qlim_buses(baseMVA, bus, gen, V0, pv, ppopt):
+    """Builds the bus reactive injection limits used by L{qlim_switch}.
+
+    The limits of a bus are the sums of the C{QMIN} and C{QMAX} of the
+    in-service generators at the bus, less the reactive load, in p.u.
+    The voltage set points are taken from the initial voltages C{V0}.
+    Whether buses may switch back from PQ to PV is given by the
+    C{PF_QLIM_BACKSWITCH} option.
+    """
+    nb = bus.shape[0]
+    on = find(gen[:, GEN_STATUS] > 0)
+    gbus = gen[on, GEN_BUS].astype(int)
+    Cg = sparse((ones(len(on)), (gbus, range(len(on)))), (nb, len(on)))
+
+    return {
+        'Qmin': (Cg * gen[on, QMIN] - bus[:, QD]) / baseMVA,
+        'Qmax': (Cg * gen[on, QMAX] - bus[:, QD]) / baseMVA,
+        'Vset': abs(V0),
+        'pv0': pv.copy(),
+        'backswitch': ppopt['PF_QLIM_BACKSWITCH']
+    }
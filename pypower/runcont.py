@@ -0,0 +1,253 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Runs an AC contingency analysis.
+"""
+
+from sys import stdout
+
+from os.path import dirname, join
+
+from time import time
+
+from multiprocessing import Pool, cpu_count
+
+from numpy import array, zeros, ones, exp, pi, conj, arange, maximum, \
+    r_, c_, flatnonzero as find
+
+from scipy.sparse import csr_matrix as sparse
+from scipy.sparse.csgraph import connected_components
+
+from pypower.admittance_model import admittance_model
+from pypower.bustypes import bustypes
+from pypower.ext2int import ext2int
+from pypower.loadcase import loadcase
+from pypower.ppoption import ppoption
+from pypower.makeSbus import makeSbus
+from pypower.makeB import makeB
+from pypower.newtonpf import newtonpf
+from pypower.newtonpf_I_cart import newtonpf_I_cart
+from pypower.fdpf import fdpf
+from pypower.gausspf import gausspf
+
+from pypower.idx_bus import VM, VA, VMAX, VMIN
+from pypower.idx_brch import F_BUS, T_BUS, RATE_A
+from pypower.idx_gen import GEN_BUS, GEN_STATUS, VG
+
+
+## case data of the worker processes, set by _init
+_state = {}
+
+
+def runcont(casedata=None, contingencies=None, ppopt=None, processes=None):
+    """Runs an AC contingency analysis.
+
+    Solves an AC power flow, with the method selected by C{PF_ALG} as in
+    L{runpf}, for each outage in the list C{contingencies}. An outage is
+    given as a tuple C{('branch', i)} or C{('gen', i)}, where C{i} is the
+    row of the branch or generator in the case data, or as a list of such
+    tuples for multiple outages. The default is the outage of each
+    in-service branch in turn. Each contingency is solved starting from
+    the base case voltages.
+
+    The contingencies are distributed over a pool of C{processes} worker
+    processes (by default one per CPU). The case data, admittance matrices
+    and base case solution are sent to each worker once, when it starts,
+    and the branch outages are applied by updating the admittance matrices
+    in place (see L{admittance_model}). With C{processes = 1} all
+    contingencies are solved in the calling process.
+
+    Returns a dict with the violations found::
+        overloads    - rows C{[k, i, S, loading]}, branch C{i} loaded at
+                       C{S} MVA, C{loading} percent of C{RATE_A}, in
+                       contingency C{k}
+        voltages     - rows C{[k, i, Vm]}, voltage magnitude C{Vm} of bus
+                       C{i} outside C{[VMIN, VMAX]} in contingency C{k}
+        nonconverged - indices of the contingencies whose power flow did
+                       not converge
+        islanded     - indices of the contingencies splitting the network,
+                       which are not solved
+        base         - C{True} if the base case power flow converged
+        et           - elapsed time in seconds
+
+    Branch and bus indices are rows of the case data.
+
+    @see: L{runpf}
+    """
+    ## default arguments
+    if casedata is None:
+        casedata = join(dirname(__file__), 'case9')
+    ppopt = ppoption(ppopt)
+    verbose = ppopt['VERBOSE']
+
+    t0 = time()
+
+    ## read data, convert to internal indexing
+    ppc = ext2int(loadcase(casedata))
+    baseMVA, bus, gen, branch = \
+        ppc['baseMVA'], ppc['bus'], ppc['gen'], ppc['branch']
+    o = ppc['order']
+
+    ## external to internal branch and gen indices, -1 if out of service
+    nl_ext = len(o['ext']['branch'])
+    ng_ext = len(o['ext']['gen'])
+    br_e2i = -ones(nl_ext, int)
+    br_e2i[o['branch']['status']['on']] = arange(branch.shape[0])
+    gen_e2i = -ones(ng_ext, int)
+    gen_e2i[o['gen']['status']['on'][o['gen']['e2i'].astype(int)]] = \
+        arange(gen.shape[0])
+
+    if contingencies is None:
+        contingencies = [('branch', i) for i in o['branch']['status']['on']]
+
+    ## outages in internal indexing
+    outages = []
+    for c in contingencies:
+        if isinstance(c, tuple):
+            c = [c]
+        brs = [br_e2i[i] for kind, i in c if kind == 'branch']
+        gens = [gen_e2i[i] for kind, i in c if kind == 'gen']
+        if len(brs) + len(gens) < len(c):
+            raise ValueError('runcont: outage type must be \'branch\' or '
+                             '\'gen\'')
+        outages.append((array([i for i in brs if i >= 0], int),
+                        array([i for i in gens if i >= 0], int)))
+
+    ## base case
+    state = {
+        'ppopt':  ppoption(ppopt, VERBOSE=0),
+        'am':     admittance_model(baseMVA, bus, branch),
+        'gen':    gen,
+        'bus_i2e': o['bus']['status']['on'],
+        'br_i2e': o['branch']['status']['on'],
+        'outages': outages
+    }
+    _init(state)
+    ref, pv, pq = bustypes(bus, gen)
+    on = find(gen[:, GEN_STATUS] > 0)
+    gbus = gen[on, GEN_BUS].astype(int)
+    V0 = bus[:, VM] * exp(1j * pi/180 * bus[:, VA])
+    V0[gbus] = gen[on, VG] / abs(V0[gbus]) * V0[gbus]
+    V0, base, _ = _solve(V0, ref, pv, pq, makeSbus(baseMVA, bus, gen))
+    state['V0'] = V0
+
+    ## run the contingencies
+    nc = len(outages)
+    if processes == 1:
+        _init(state)
+        res = [_run_contingency(k) for k in range(nc)]
+    else:
+        nw = processes or cpu_count()
+        pool = Pool(nw, _init, (state,))
+        try:
+            res = pool.map(_run_contingency, range(nc),
+                           max(1, nc // (4 * nw)))
+        finally:
+            pool.close()
+            pool.join()
+
+    ## collect the violations
+    status = array([r[0] for r in res], int)
+    ovl = [r[1] for r in res if len(r[1])]
+    vv = [r[2] for r in res if len(r[2])]
+    results = {
+        'overloads':    r_[tuple(ovl)] if ovl else zeros((0, 4)),
+        'voltages':     r_[tuple(vv)] if vv else zeros((0, 3)),
+        'nonconverged': find(status == 1),
+        'islanded':     find(status == 2),
+        'base':         base,
+        'et':           time() - t0
+    }
+
+    if verbose:
+        stdout.write('Ran %d contingencies in %.2f seconds: %d overloads, '
+                     '%d voltage violations, %d not converged, %d '
+                     'islanded.\n' % (nc, results['et'],
+                                      len(results['overloads']),
+                                      len(results['voltages']),
+                                      len(results['nonconverged']),
+                                      len(results['islanded'])))
+
+    return results
+
+
+def _init(state):
+    """Sets the case data of a worker process.
+    """
+    _state.update(state)
+
+    ## bus connections of the branches, for island detection
+    branch = state['am'].branch
+    _state['f'] = branch[:, F_BUS].astype(int)
+    _state['t'] = branch[:, T_BUS].astype(int)
+
+
+def _solve(V0, ref, pv, pq, Sbus):
+    """Solves the power flow with the current admittance matrices.
+    """
+    ppopt = _state['ppopt']
+    am = _state['am']
+    alg = ppopt['PF_ALG']
+    if alg == 1:
+        return newtonpf(am.Ybus, Sbus, V0, ref, pv, pq, ppopt)
+    elif alg == 2 or alg == 3:
+        Bp, Bpp = makeB(am.baseMVA, am.bus, am.branch, alg)
+        return fdpf(am.Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt)
+    elif alg == 4:
+        return gausspf(am.Ybus, Sbus, V0, ref, pv, pq, ppopt)
+    elif alg == 5:
+        return newtonpf_I_cart(am.Ybus, Sbus, V0, ref, pv, pq, ppopt)
+    else:
+        raise ValueError('runcont: PF_ALG %d not implemented' % alg)
+
+
+def _run_contingency(k):
+    """Solves contingency C{k}, returns its status (0 - solved, 1 - not
+    converged, 2 - islanded) and overload and voltage violation rows.
+    """
+    am = _state['am']
+    brs, gens = _state['outages'][k]
+    bus, branch = am.bus, am.branch
+    nb = bus.shape[0]
+    none = (zeros((0, 4)), zeros((0, 3)))
+
+    ## islanded?
+    inservice = ones(branch.shape[0], bool)
+    inservice[brs] = False
+    f, t = _state['f'][inservice], _state['t'][inservice]
+    A = sparse((ones(len(f)), (f, t)), (nb, nb))
+    if connected_components(A, directed=False)[0] > 1:
+        return (2,) + none
+
+    ## apply the outages
+    gen = _state['gen'].copy()
+    gen[gens, GEN_STATUS] = 0
+    if len(brs):
+        am.update_branch(brs, status=0)
+    try:
+        ref, pv, pq = bustypes(bus, gen)
+        Sbus = makeSbus(am.baseMVA, bus, gen)
+        V, success, _ = _solve(_state['V0'], ref, pv, pq, Sbus)
+
+        if not success:
+            return (1,) + none
+
+        ## branch loading
+        Sf = abs(V[_state['f']] * conj(am.Yf * V)) * am.baseMVA
+        St = abs(V[_state['t']] * conj(am.Yt * V)) * am.baseMVA
+        S = maximum(Sf, St)
+        rate = branch[:, RATE_A]
+        i = find((rate > 0) & (S > rate))
+        ovl = c_[k * ones(len(i)), _state['br_i2e'][i], S[i],
+                 100 * S[i] / rate[i]]
+
+        ## bus voltages
+        Vm = abs(V)
+        j = find((Vm > bus[:, VMAX]) | (Vm < bus[:, VMIN]))
+        vv = c_[k * ones(len(j)), _state['bus_i2e'][j], Vm[j]]
+    finally:
+        if len(brs):
+            am.update_branch(brs, status=1)
+
+    return 0, ovl, vv
@@ -0,0 +1,171 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Runs a continuation power flow.
+"""
+
+from sys import stdout, stderr
+
+from os.path import dirname, join
+
+from time import time
+
+from numpy import c_, zeros, pi, exp, any
+from numpy import flatnonzero as find
+
+from pypower.bustypes import bustypes
+from pypower.ext2int import ext2int
+from pypower.loadcase import loadcase
+from pypower.ppoption import ppoption
+from pypower.ppver import ppver
+from pypower.makeSbus import makeSbus
+from pypower.makeYbus import makeYbus
+from pypower.newtonpf import newtonpf
+from pypower.cpf import cpf
+from pypower.pfsoln import pfsoln
+from pypower.printpf import printpf
+from pypower.savecase import savecase
+from pypower.int2ext import int2ext
+
+from pypower.idx_bus import PD, QD, VM, VA, BUS_TYPE
+from pypower.idx_brch import QT
+from pypower.idx_gen import PG, QG, VG, GEN_BUS, GEN_STATUS
+
+
+def runcpf(basecasedata=None, targetcasedata=None, ppopt=None, fname='',
+           solvedcase=''):
+    """Runs a continuation power flow.
+
+    Traces the AC power flow solutions (PV curves) along the transition
+    from the base case C{basecasedata} to the target case
+    C{targetcasedata}, whose loads and generator real power outputs are
+    interpolated as::
+
+        P(lam) = Pbase + lam * (Ptarget - Pbase)
+
+    up to the maximum loading point, using L{cpf}. Both cases must have
+    the same network, generators and bus types. The default base case is
+    'case9' and the default target case is the base case with all loads
+    and generation increased by half.
+
+    Returns the solved case at the maximum loading point, in the same
+    form as L{runpf}, with the bus loads and generator outputs at
+    C{lam = results['cpf']['max_lam']}, and a success flag. The whole
+    curve is returned in C{results['cpf']}, see L{cpf}, with the voltages
+    in internal bus order. The C{fname} and C{solvedcase} arguments are
+    as for L{runpf} and apply to the maximum loading point.
+
+    @see: L{cpf}, L{runpf}
+    """
+    ## default arguments
+    if basecasedata is None:
+        basecasedata = join(dirname(__file__), 'case9')
+    ppopt = ppoption(ppopt)
+    verbose = ppopt['VERBOSE']
+
+    ## read data
+    ppc = loadcase(basecasedata)
+    if targetcasedata is None:
+        target = loadcase(basecasedata)
+        target['bus'] = target['bus'].astype(float)
+        target['gen'] = target['gen'].astype(float)
+        target['bus'][:, [PD, QD]] *= 1.5
+        target['gen'][:, PG] *= 1.5
+    else:
+        target = loadcase(targetcasedata)
+
+    ## add zero columns to branch for flows if needed
+    if ppc['branch'].shape[1] < QT:
+        ppc['branch'] = c_[ppc['branch'],
+                           zeros((ppc['branch'].shape[0],
+                                  QT - ppc['branch'].shape[1] + 1))]
+
+    ## convert to internal indexing
+    ppc = ext2int(ppc)
+    target = ext2int(target)
+    baseMVA, bus, gen, branch = \
+        ppc['baseMVA'], ppc['bus'].astype(float), ppc['gen'].astype(float), \
+        ppc['branch']
+    bust, gent = target['bus'], target['gen']
+
+    if bus.shape != bust.shape or gen.shape != gent.shape or \
+            any(bus[:, BUS_TYPE] != bust[:, BUS_TYPE]) or \
+            any(gen[:, GEN_BUS] != gent[:, GEN_BUS]):
+        raise ValueError('runcpf: base and target cases must have the same '
+                         'buses, bus types and generators')
+
+    ## get bus index lists of each type of bus
+    ref, pv, pq = bustypes(bus, gen)
+
+    ## generator info
+    on = find(gen[:, GEN_STATUS] > 0)      ## which generators are on?
+    gbus = gen[on, GEN_BUS].astype(int)    ## what buses are they at?
+
+    ##-----  run the continuation power flow  -----
+    t0 = time()
+    if verbose > 0:
+        v = ppver('all')
+        stdout.write('PYPOWER Version %s, %s' % (v["Version"], v["Date"]))
+        stdout.write(' -- AC Continuation Power Flow\n')
+
+    ## initial state
+    V0 = bus[:, VM] * exp(1j * pi/180 * bus[:, VA])
+    V0[gbus] = gen[on, VG] / abs(V0[gbus]) * V0[gbus]
+
+    ## solve the base case
+    Ybus, Yf, Yt = makeYbus(baseMVA, bus, branch)
+    Sbusb = makeSbus(baseMVA, bus, gen)
+    Sbust = makeSbus(baseMVA, bust, gent)
+    V0, success, _ = newtonpf(Ybus, Sbusb, V0, ref, pv, pq,
+                              ppoption(ppopt, VERBOSE=0))
+
+    if success:
+        res = cpf(Ybus, Sbusb, Sbust, V0, ref, pv, pq, ppopt)
+        success = res['success']
+
+        ## loads and generation at the maximum loading point
+        lam = res['max_lam']
+        bus[:, [PD, QD]] = (1 - lam) * bus[:, [PD, QD]] + lam * bust[:, [PD, QD]]
+        gen[:, [PG, QG]] = (1 - lam) * gen[:, [PG, QG]] + lam * gent[:, [PG, QG]]
+        V = res['V_max']
+    else:
+        stderr.write('runcpf: base case power flow did not converge\n')
+        res = None
+        V = V0
+
+    ## update data matrices with solution
+    bus, gen, branch = pfsoln(baseMVA, bus, gen, branch, Ybus, Yf, Yt, V,
+                              ref, pv, pq)
+
+    ppc['et'] = time() - t0
+    ppc['success'] = success
+    ppc['cpf'] = res
+
+    ##-----  output results  -----
+    ## convert back to original bus numbering & print results
+    ppc['bus'], ppc['gen'], ppc['branch'] = bus, gen, branch
+    results = int2ext(ppc)
+
+    if fname:
+        fd = None
+        try:
+            fd = open(fname, "a")
+        except Exception as detail:
+            stderr.write("Error opening %s: %s.\n" % (fname, detail))
+        finally:
+            if fd is not None:
+                printpf(results, fd, ppopt)
+                fd.close()
+    else:
+        printpf(results, stdout, ppopt)
+
+    ## save solved case
+    if solvedcase:
+        savecase(solvedcase, results)
+
+    return results, success
+
+
+if __name__ == '__main__':
+    runcpf()
@@ -23,11 +23,13 @@ from pypower.makeBdc import makeBdc
 from pypower.makeSbus import makeSbus
 from pypower.dcpf import dcpf
 from pypower.makeYbus import makeYbus
-from pypower.newtonpf import newtonpf
-from pypower.fdpf import fdpf
+from pypower.newtonpf import newtonpf, newtonpf_qlim
+from pypower.newtonpf_I_cart import newtonpf_I_cart
+from pypower.fdpf import fdpf, fdpf_qlim
 from pypower.gausspf import gausspf
 from pypower.makeB import makeB
 from pypower.pfsoln import pfsoln
+from pypower.qlim_switch import qlim_buses
 from pypower.printpf import printpf
 from pypower.savecase import savecase
 from pypower.int2ext import int2ext
@@ -66,6 +68,17 @@ def runpf(casedata=None, ppopt=None, fname='', solvedcase=''):
     This may result in the real power output at this generator being
     slightly off from the specified values.
 
+    If C{ENFORCE_Q_LIMS} is 3, Q limits are instead enforced inside the
+    Newton or fast-decoupled solver, by switching the types of PV buses
+    whose total generator Q limits are violated to PQ (and optionally back,
+    see C{PF_QLIM_BACKSWITCH}) and continuing from the current voltages,
+    without restarting the power flow. Limits at the reference bus are not
+    enforced in this mode. It is only available with C{PF_ALG} 1 to 3;
+    with the other algorithms a warning is printed and Q limits are
+    enforced as with C{ENFORCE_Q_LIMS = 1}. Whenever C{ENFORCE_Q_LIMS} is
+    on, the number of bus type (or generator) switches is returned in
+    C{results['qlim_switches']}.
+
     Enforcing of generator Q limits inspired by contributions from Mu Lin,
     Lincoln University, New Zealand (1/14/05).
 
@@ -153,6 +166,8 @@ def runpf(casedata=None, ppopt=None, fname='', solvedcase=''):
                 solver = 'fast-decoupled, BX'
             elif alg == 4:
                 solver = 'Gauss-Seidel'
+            elif alg == 5:
+                solver = 'Newton, current injection, cartesian'
             else:
                 solver = 'unknown'
             print(' -- AC Power Flow (%s)\n' % solver)
@@ -162,29 +177,54 @@ def runpf(casedata=None, ppopt=None, fname='', solvedcase=''):
         V0  = bus[:, VM] * exp(1j * pi/180 * bus[:, VA])
         V0[gbus] = gen[on, VG] / abs(V0[gbus]) * V0[gbus]
 
+        ## enforce Q limits inside the Newton or fast-decoupled solver?
+        qlim_bus = None
+        nswitch = 0
+        if qlim == 3:
+            if ppopt['PF_ALG'] in (1, 2, 3):
+                qlim_bus = qlim_buses(baseMVA, bus, gen, V0, pv, ppopt)
+                qlim = 0
+            else:
+                stderr.write('runpf: ENFORCE_Q_LIMS = 3 requires PF_ALG 1, 2 '
+                             'or 3, using ENFORCE_Q_LIMS = 1 instead\n')
+
         if qlim:
             ref0 = ref                         ## save index and angle of
             Varef0 = bus[ref0, VA]             ##   original reference bus(es)
             limited = []                       ## list of indices of gens @ Q lims
             fixedQg = zeros(gen.shape[0])      ## Qg of gens at Q limits
 
+        ## build admittance matrices, which Q limit enforcement below
+        ## does not change
+        Ybus, Yf, Yt = makeYbus(baseMVA, bus, branch)
+
         repeat = True
         while repeat:
-            ## build admittance matrices
-            Ybus, Yf, Yt = makeYbus(baseMVA, bus, branch)
-
             ## compute complex bus power injections [generation - load]
             Sbus = makeSbus(baseMVA, bus, gen)
 
             ## run the power flow
             alg = ppopt["PF_ALG"]
-            if alg == 1:
+            if qlim_bus is not None:
+                if alg == 1:
+                    V, success, _, nswitch = newtonpf_qlim(Ybus, Sbus, V0, ref,
+                                                           pv, pq, ppopt,
+                                                           qlim_bus)
+                else:
+                    Bp, Bpp = makeB(baseMVA, bus, branch, alg)
+                    V, success, _, nswitch = fdpf_qlim(Ybus, Sbus, V0, Bp, Bpp,
+                                                       ref, pv, pq, ppopt,
+                                                       qlim_bus)
+            elif alg == 1:
                 V, success, _ = newtonpf(Ybus, Sbus, V0, ref, pv, pq, ppopt)
             elif alg == 2 or alg == 3:
                 Bp, Bpp = makeB(baseMVA, bus, branch, alg)
                 V, success, _ = fdpf(Ybus, Sbus, V0, Bp, Bpp, ref, pv, pq, ppopt)
             elif alg == 4:
                 V, success, _ = gausspf(Ybus, Sbus, V0, ref, pv, pq, ppopt)
+            elif alg == 5:
+                V, success, _ = newtonpf_I_cart(Ybus, Sbus, V0, ref, pv, pq,
+                                                ppopt)
             else:
                 stderr.write('Only Newton''s method, fast-decoupled, and '
                              'Gauss-Seidel power flow algorithms currently '
@@ -264,6 +304,9 @@ def runpf(casedata=None, ppopt=None, fname='', solvedcase=''):
             else:
                 repeat = 0     ## don't enforce generator Q limits, once is enough
 
+        if qlim:
+            nswitch = len(limited)
+
         if qlim and len(limited) > 0:
             ## restore injections from limited gens [those at Q limits]
             gen[limited, QG] = fixedQg[limited]    ## restore Qg value,
@@ -278,6 +321,8 @@ def runpf(casedata=None, ppopt=None, fname='', solvedcase=''):
 
     ppc["et"] = time() - t0
     ppc["success"] = success
+    if not dc and ppopt['ENFORCE_Q_LIMS']:
+        ppc["qlim_switches"] = nswitch  ## buses/gens switched at Q limits
 
     ##-----  output results  -----
     ## convert back to original bus numbering & print results
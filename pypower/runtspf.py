@@ -0,0 +1,200 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Runs a time series of AC power flows on one network.
+"""
+
+from sys import stdout, stderr
+
+from os.path import dirname, join
+
+from time import time
+
+from numpy import zeros, ones, exp, pi, angle, conj, asarray
+from numpy import flatnonzero as find
+from numpy.lib.format import open_memmap
+
+from scipy.sparse import csr_matrix as sparse
+
+from pypower.bustypes import bustypes
+from pypower.ext2int import ext2int
+from pypower.loadcase import loadcase
+from pypower.ppoption import ppoption
+from pypower.makeYbus import makeYbus
+from pypower.makeB import makeB
+from pypower.newtonpf import newtonpf
+from pypower.newtonpf_I_cart import newtonpf_I_cart
+from pypower.fdpf import fdpf
+from pypower.gausspf import gausspf
+
+from pypower.idx_bus import PD, QD, VM, VA
+from pypower.idx_brch import F_BUS, T_BUS
+from pypower.idx_gen import PG, QG, VG, GEN_BUS, GEN_STATUS
+
+
+def runtspf(casedata=None, pd=None, qd=None, pg=None, ppopt=None, out=None):
+    """Runs a time series of AC power flows on one network.
+
+    Solves one power flow per row of the profile matrices C{pd} and C{qd}
+    (C{nt x nb}, real and reactive load in MW and MVAr of each bus of the
+    case, in the order of the rows of its C{bus} matrix) and C{pg}
+    (C{nt x ng}, real power output in MW of each generator, in the order
+    of the rows of its C{gen} matrix). Any profile which is not given is
+    held at the value of the case. The profiles may be memory-mapped
+    arrays, they are only read one row at a time.
+
+    The case is loaded and converted to internal indexing, and its
+    admittance (and for the fast-decoupled methods, B) matrices are built,
+    only once. Each step starts from the voltages of the last converged
+    step. The C{PF_ALG} option selects the method as in L{runpf}, other
+    options are passed to the solver, e.g. C{PF_JAC_REUSE = 2} to reuse
+    the Jacobian factors of the previous step. Generator reactive power
+    limits are not enforced.
+
+    Results are written row by row into the arrays of the dict C{out},
+    which are allocated with one row per step if C{out} is not given. If
+    C{out} is the name of a directory, they are created there as
+    memory-mapped C{.npy} files instead, so memory use does not grow with
+    the number of steps. The arrays are::
+        Vm, Va      - bus voltage magnitudes (p.u.) and angles (degrees)
+        Pf, Qf,
+        Pt, Qt      - branch flows (MW and MVAr) at the "from" and "to" ends
+        success     - true for the steps that converged
+        iterations  - number of iterations of each step
+
+    Buses, generators and branches which are out of service are given
+    zero values. Returns C{out}.
+
+    @see: L{runpf}
+    """
+    ## default arguments
+    if casedata is None:
+        casedata = join(dirname(__file__), 'case9')
+    ppopt = ppoption(ppopt)
+
+    ## options
+    verbose = ppopt['VERBOSE']
+    alg = ppopt['PF_ALG']
+    ppopt_pf = ppoption(ppopt, VERBOSE=0)   ## silence the solver
+
+    ## read data, convert to internal indexing
+    ppc = ext2int(loadcase(casedata))
+    baseMVA, bus, gen, branch = \
+        ppc['baseMVA'], ppc['bus'], ppc['gen'], ppc['branch']
+    o = ppc['order']
+
+    ## rows of the external data kept by ext2int, in internal order
+    bus_on = o['bus']['status']['on']
+    gen_on = o['gen']['status']['on'][o['gen']['e2i'].astype(int)]
+    branch_on = o['branch']['status']['on']
+    nb_ext = len(o['ext']['bus'])
+    nl_ext = len(o['ext']['branch'])
+
+    ## number of steps
+    nt = [p.shape[0] for p in (pd, qd, pg) if p is not None]
+    if not nt:
+        raise ValueError('runtspf: no profile given')
+    nt = nt[0]
+
+    ## get bus index lists of each type of bus
+    ref, pv, pq = bustypes(bus, gen)
+
+    ## generator info
+    on = find(gen[:, GEN_STATUS] > 0)      ## which generators are on?
+    gbus = gen[on, GEN_BUS].astype(int)    ## what buses are they at?
+    nb = bus.shape[0]
+    Cg = sparse((ones(len(on)), (gbus, range(len(on)))), (nb, len(on)))
+
+    ## network matrices, built once
+    f = branch[:, F_BUS].astype(int)
+    t = branch[:, T_BUS].astype(int)
+    Ybus, Yf, Yt = makeYbus(baseMVA, bus, branch)
+    if alg == 2 or alg == 3:
+        Bp, Bpp = makeB(baseMVA, bus, branch, alg)
+    elif alg not in (1, 4, 5):
+        raise ValueError('runtspf: PF_ALG %d not implemented' % alg)
+
+    ## initial state, also used to restart after a failed step
+    V0 = bus[:, VM] * exp(1j * pi/180 * bus[:, VA])
+    V0[gbus] = gen[on, VG] / abs(V0[gbus]) * V0[gbus]
+
+    ## output arrays
+    shapes = {'Vm': (nt, nb_ext), 'Va': (nt, nb_ext),
+              'Pf': (nt, nl_ext), 'Qf': (nt, nl_ext),
+              'Pt': (nt, nl_ext), 'Qt': (nt, nl_ext),
+              'success': (nt,), 'iterations': (nt,)}
+    dtypes = {'success': bool, 'iterations': int}
+    if out is None or isinstance(out, str):
+        path = out
+        out = {}
+        for key, shape in shapes.items():
+            dtype = dtypes.get(key, float)
+            if path is None:
+                out[key] = zeros(shape, dtype)
+            else:
+                out[key] = open_memmap(join(path, key + '.npy'), mode='w+',
+                                       dtype=dtype, shape=shape)
+
+    ## per-step injections, in internal order
+    Pd, Qd = bus[:, PD].copy(), bus[:, QD].copy()
+    Pg, Qg = gen[on, PG].copy(), gen[on, QG]
+    rowb = zeros(nb_ext)
+    rowl = zeros(nl_ext)
+
+    ##-----  run the power flows  -----
+    t0 = time()
+    V = V0
+    nfail = 0
+    for k in range(nt):
+        if pd is not None:
+            Pd = asarray(pd[k])[bus_on]
+        if qd is not None:
+            Qd = asarray(qd[k])[bus_on]
+        if pg is not None:
+            Pg = asarray(pg[k])[gen_on][on]
+
+        ## compute complex bus power injections [generation - load]
+        Sbus = (Cg * (Pg + 1j * Qg) - (Pd + 1j * Qd)) / baseMVA
+
+        ## run the power flow, warm-started
+        if alg == 1:
+            V1, success, iterations = newtonpf(Ybus, Sbus, V, ref, pv, pq,
+                                               ppopt_pf)
+        elif alg == 4:
+            V1, success, iterations = gausspf(Ybus, Sbus, V, ref, pv, pq,
+                                              ppopt_pf)
+        elif alg == 5:
+            V1, success, iterations = newtonpf_I_cart(Ybus, Sbus, V, ref, pv,
+                                                      pq, ppopt_pf)
+        else:
+            V1, success, iterations = fdpf(Ybus, Sbus, V, Bp, Bpp, ref, pv,
+                                           pq, ppopt_pf)
+
+        ## save the solution
+        rowb[bus_on] = abs(V1)
+        out['Vm'][k] = rowb
+        rowb[bus_on] = angle(V1) * 180 / pi
+        out['Va'][k] = rowb
+        Sf = V1[f] * conj(Yf * V1) * baseMVA
+        St = V1[t] * conj(Yt * V1) * baseMVA
+        for key, val in [('Pf', Sf.real), ('Qf', Sf.imag),
+                         ('Pt', St.real), ('Qt', St.imag)]:
+            rowl[branch_on] = val
+            out[key][k] = rowl
+        out['success'][k] = success
+        out['iterations'][k] = iterations
+
+        if success:
+            V = V1
+        else:
+            V = V0
+            nfail = nfail + 1
+            if verbose:
+                stderr.write('runtspf: step %d did not converge\n' % k)
+
+    if verbose:
+        stdout.write('Ran %d power flows in %.2f seconds, %d did not '
+                     'converge.\n' % (nt, time() - t0, nfail))
+
+    return out
@@ -0,0 +1,217 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Solves a security-constrained DC optimal power flow.
+"""
+
+from sys import stdout
+
+from time import time
+
+from numpy import arange, zeros, ones, asarray, unique, bincount, r_, c_, \
+    ix_, shape
+from scipy.sparse import csr_matrix as sparse
+
+from pypower.loadcase import loadcase
+from pypower.ppoption import ppoption
+from pypower.ext2int import ext2int
+from pypower.opf_setup import opf_setup
+from pypower.opf_execute import opf_execute
+from pypower.int2ext import int2ext
+from pypower.dc_factors import get_dc_factors
+from pypower.dcscreen import dcscreen
+
+from pypower.idx_bus import LAM_P, MU_VMIN
+from pypower.idx_gen import GEN_BUS, PG, QG, MU_PMAX, MU_PMIN, MU_QMIN
+from pypower.idx_brch import PF, QF, PT, QT, MU_SF, MU_ST, MU_ANGMIN, \
+    MU_ANGMAX, RATE_A
+
+
+def scdcopf(casedata=None, ppopt=None, outages=None, monitored=None,
+            rate=None, max_it=20):
+    """Solves a security-constrained DC optimal power flow.
+
+    Finds the least cost dispatch of the DC OPF (see L{opf}) for which the
+    flow of each C{monitored} branch stays within C{rate} (C{nl}, in MW,
+    default C{RATE_A}) after the outage of any single branch in C{outages}
+    (preventive N-1 security). C{outages} and C{monitored} are indices of
+    rows of the C{branch} matrix of the case, and default to all in-service
+    branches. Outages which island the network are not considered.
+
+    The post-contingency flows are linear in the voltage angles::
+
+        Pf_post[l] = Pf[l] + LODF[l, k] * Pf[k]
+                   = (Bf[l, :] + LODF[l, k] * Bf[k, :]) * Va
+                     + Pfinj[l] + LODF[l, k] * Pfinj[k]
+
+    or, with the PTDF formulation of the DC OPF (C{OPF_DC_FORM = 'ptdf'},
+    see L{opf_setup}), in the generator outputs, through the PTDF rows of
+    branches C{l} and C{k}. Only a few of these C{nl x nl} constraints ever
+    bind, so they are generated lazily. Starting from the base case DC OPF,
+    each iteration screens all outages with the line outage distribution
+    factors of the network (see L{dcscreen}), adds the constraint of the
+    worst violated outage of each overloaded branch as a new set of linear
+    constraints of the OPF model (see L{opf_model.add_constraints}) and
+    solves it again, until no post-contingency flow exceeds its rating by
+    more than C{OPF_VIOLATION} or C{max_it} iterations are done. The factorization
+    of the network is computed once (see L{get_dc_factors}) and the LODF
+    columns are computed in chunks, so the memory used does not grow with
+    the square of the number of branches.
+
+    Returns the C{results} dict of L{opf}, with C{success} false if the
+    last iteration still had violations, and the additional field
+    C{scopf}, a dict with:
+        - C{cont}      C{nc x 2}, outaged and monitored branch C{[k, l]} of
+          each post-contingency constraint, in the order added
+        - C{mu}
+            - C{l}     C{nc}, shadow prices of their lower limits ($/MW)
+            - C{u}     C{nc}, shadow prices of their upper limits ($/MW)
+        - C{it}        number of OPF solutions
+        - C{islands}   outages which island the network
+
+    @see: L{opf}, L{dcscreen}, L{dc_factors}
+    """
+    ##----- initialization -----
+    t0 = time()         ## start timer
+
+    ## default arguments
+    ppopt = ppoption(ppopt, PF_DC=True)
+    verbose = ppopt['VERBOSE']
+    if verbose:      ## turn down verbosity one level for the OPF solutions
+        ppopt = ppoption(ppopt, VERBOSE=verbose - 1)
+
+    ## read data
+    ppc = loadcase(casedata)
+    nb = shape(ppc['bus'])[0]       ## number of buses
+    nl = shape(ppc['branch'])[0]    ## number of branches
+    ng = shape(ppc['gen'])[0]       ## number of dispatchable injections
+    if shape(ppc['bus'])[1] < MU_VMIN + 1:
+        ppc['bus'] = c_[ppc['bus'], zeros((nb, MU_VMIN + 1 - shape(ppc['bus'])[1]))]
+
+    if shape(ppc['gen'])[1] < MU_QMIN + 1:
+        ppc['gen'] = c_[ppc['gen'], zeros((ng, MU_QMIN + 1 - shape(ppc['gen'])[1]))]
+
+    if shape(ppc['branch'])[1] < MU_ANGMAX + 1:
+        ppc['branch'] = c_[ppc['branch'], zeros((nl, MU_ANGMAX + 1 - shape(ppc['branch'])[1]))]
+
+    ## post-contingency ratings
+    if rate is None:
+        rate = ppc['branch'][:, RATE_A]
+    rate = asarray(rate, float) * ones(nl)
+
+    ##-----  convert to internal numbering, remove out-of-service stuff  -----
+    ppc = ext2int(ppc)
+    baseMVA, bus, branch = ppc['baseMVA'], ppc['bus'], ppc['branch']
+    e2i = -ones(nl, int)
+    on = ppc['order']['branch']['status']['on']
+    e2i[on] = arange(len(on))
+    if outages is not None:
+        outages = e2i[asarray(outages, int)]
+        outages = outages[outages >= 0]
+    if monitored is not None:
+        monitored = e2i[asarray(monitored, int)]
+        monitored = monitored[monitored >= 0]
+    rate = rate[on]
+
+    ##-----  construct OPF model object  -----
+    om = opf_setup(ppc, ppopt)
+    Bf, Pfinj = om.userdata('Bf').tocsr(), om.userdata('Pfinj')
+    Pf0 = om.userdata('Pf0')
+    gbus = ppc['gen'][:, GEN_BUS].astype(int)
+    dcf = get_dc_factors(baseMVA, bus, branch)
+    tol = ppopt['OPF_VIOLATION'] * baseMVA
+
+    ##-----  solve, adding violated post-contingency constraints  -----
+    cont = zeros((0, 2), int)       ## [k, l] of the constraints added
+    Lc = zeros(0)                   ## and their LODF[l, k]
+    added = set()
+    names = []
+    islands = zeros(0, int)
+    it = 0
+    while True:
+        results, success, raw = opf_execute(om, ppopt)
+        it += 1
+        if not success:
+            break
+
+        ## screen all outages
+        ovl, islands = dcscreen(baseMVA, results['bus'], results['branch'],
+                                results['branch'][:, PF], outages,
+                                monitored, rate)
+        k, l = ovl[:, 0].astype(int), ovl[:, 1].astype(int)
+        new = (abs(ovl[:, 2]) - rate[l] > tol) & \
+            asarray([c not in added for c in zip(k, l)], bool)
+
+        ## worst new violation of each monitored branch (ovl is sorted)
+        k, l = k[new], l[new]
+        _, i = unique(l, return_index=True)
+        k, l = k[i], l[i]
+        nc = len(l)
+        if verbose:
+            stdout.write('scdcopf: iteration %d, %d violations, '
+                         '%d constraints added\n' % (it, sum(new), nc))
+        if nc == 0:
+            break
+        if it >= max_it:            ## violations left after max_it solutions
+            success = False
+            break
+
+        kk, pos = unique(k, return_inverse=True)
+        L = dcf.lodf(kk, l)[arange(nc), pos]
+        if om.getN('var', 'Va'):
+            ## Pf_post[l] = (Bf[l] + L[l, k] * Bf[k]) * Va + Pfinj[l] + L[l, k] * Pfinj[k]
+            A = Bf[l, :] + sparse((L, (arange(nc), arange(nc))), (nc, nc)) * Bf[k, :]
+            Pinj = Pfinj[l] + L * Pfinj[k]
+            vs = ['Va']
+        else:
+            ## PTDF formulation, in terms of Pg and the flows with Pg = 0
+            H = dcf.ptdf(r_[l, k], gbus)
+            A = sparse(H[:nc] + L[:, None] * H[nc:])
+            Pinj = Pf0[l] + L * Pf0[k]
+            vs = ['Pg']
+        name = 'cont%d' % len(names)
+        om.add_constraints(name, A, -rate[l] / baseMVA - Pinj,
+                           rate[l] / baseMVA - Pinj, vs)
+        names.append(name)
+        cont = r_[cont, c_[k, l]]
+        Lc = r_[Lc, L]
+        added.update(zip(k, l))
+
+    ## shadow prices of the post-contingency constraints
+    _, ll, _, _ = om.get_idx()
+    kc = r_[tuple(arange(ll['i1'][n], ll['iN'][n]) for n in names)].astype(int) \
+        if names else zeros(0, int)
+    mu_l = results['mu']['lin']['l'][kc] / baseMVA
+    mu_u = results['mu']['lin']['u'][kc] / baseMVA
+
+    ## PTDF formulation, congestion component of the post-contingency
+    ## constraints in the prices, PTDF' * muF = inv(Bbus) * Bf' * muF
+    if not om.getN('var', 'Va') and len(kc):
+        mu = mu_u - mu_l
+        muF = bincount(cont[:, 1], mu, Bf.shape[0]) + \
+            bincount(cont[:, 0], Lc * mu, Bf.shape[0])
+        results['bus'][:, LAM_P] -= dcf.angles(Bf.T * muF)
+
+    ##-----  revert to original ordering, including out-of-service stuff  -----
+    results = int2ext(results)
+
+    ## zero out result fields of out-of-service gens & branches
+    if len(results['order']['gen']['status']['off']) > 0:
+        results['gen'][ ix_(results['order']['gen']['status']['off'], [PG, QG, MU_PMAX, MU_PMIN]) ] = 0
+
+    if len(results['order']['branch']['status']['off']) > 0:
+        results['branch'][ ix_(results['order']['branch']['status']['off'], [PF, QF, PT, QT, MU_SF, MU_ST, MU_ANGMIN, MU_ANGMAX]) ] = 0
+
+    ## constraints in external branch indexing
+    results['scopf'] = {'cont': on[cont].reshape(-1, 2),
+                        'mu': {'l': mu_l, 'u': mu_u},
+                        'it': it,
+                        'islands': on[islands]}
+
+    ##-----  finish preparing output  -----
+    results['et'] = time() - t0
+    results['success'] = success
+    results['raw'] = raw
+
+    return results
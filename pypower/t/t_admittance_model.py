@@ -0,0 +1,78 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Tests for C{admittance_model}.
+"""
+
+from pypower.case30 import case30
+from pypower.loadcase import loadcase
+from pypower.ext2int import ext2int
+from pypower.makeYbus import makeYbus
+from pypower.admittance_model import admittance_model
+
+from pypower.idx_bus import GS, BS
+from pypower.idx_brch import BR_STATUS, BR_R, BR_X, BR_B, TAP, SHIFT
+
+from pypower.t.t_begin import t_begin
+from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
+from pypower.t.t_end import t_end
+
+
+def t_admittance_model(quiet=False):
+    """Tests for C{admittance_model}.
+    """
+    t_begin(18, quiet)
+
+    ppc = ext2int(loadcase(case30()))
+    baseMVA, bus, branch = ppc['baseMVA'], ppc['bus'], ppc['branch']
+
+    am = admittance_model(baseMVA, bus, branch)
+    Ybus0 = am.Ybus
+    nnz0 = Ybus0.nnz
+
+    def check(t):
+        Ybus, Yf, Yt = makeYbus(baseMVA, bus, branch)
+        t_is(am.Ybus.todense(), Ybus.todense(), 12, [t, 'Ybus'])
+        t_is(am.Yf.todense(), Yf.todense(), 12, [t, 'Yf'])
+        t_is(am.Yt.todense(), Yt.todense(), 12, [t, 'Yt'])
+
+    check('initial : ')
+
+    t = 'branch status : '
+    branch[[4, 9], BR_STATUS] = 0
+    am.update_branch([4, 9], status=0)
+    check(t)
+
+    t = 'tap and shift : '
+    branch[[10, 11], TAP] = [1.05, 0.97]
+    branch[11, SHIFT] = -3
+    am.update_branch([10, 11], tap=[1.05, 0.97], shift=[0, -3])
+    check(t)
+
+    t = 'impedance : '
+    branch[[0, 4], BR_R] = [0.03, 0.01]
+    branch[[0, 4], BR_X] = [0.07, 0.05]
+    branch[[0, 4], BR_B] = [0.02, 0.01]
+    branch[4, BR_STATUS] = 1
+    am.update_branch([0, 4], status=1, r=[0.03, 0.01], x=[0.07, 0.05],
+                     b=[0.02, 0.01])
+    check(t)
+
+    t = 'bus shunt : '
+    bus[[2, 7], GS] = [5, 0]
+    bus[[2, 7], BS] = [10, -20]
+    am.update_bus([2, 7], gs=[5, 0], bs=[10, -20])
+    check(t)
+
+    t = 'structure : '
+    t_ok(am.Ybus is Ybus0, [t, 'Ybus updated in place'])
+    t_is(am.Ybus.nnz, nnz0, 12, [t, 'nnz unchanged'])
+    t_ok(am.Ybus.has_sorted_indices, [t, 'sorted indices'])
+
+    t_end()
+
+
+if __name__ == '__main__':
+    t_admittance_model(quiet=False)
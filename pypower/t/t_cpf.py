@@ -0,0 +1,96 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Tests for continuation power flow.
+"""
+
+from pypower.case9 import case9
+from pypower.ppoption import ppoption
+from pypower.runpf import runpf
+from pypower.runcpf import runcpf
+
+from pypower.idx_bus import PD, QD, VM
+from pypower.idx_gen import PG
+
+from pypower.t.t_begin import t_begin
+from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
+from pypower.t.t_end import t_end
+
+
+def t_cpf(quiet=False):
+    """Tests for continuation power flow.
+    """
+    t_begin(15, quiet)
+
+    ppopt = ppoption(VERBOSE=0, OUT_ALL=0)
+
+    def scaled(k):
+        """case9 with loads and generation scaled by C{k}.
+        """
+        ppc = case9()
+        ppc['bus'] = ppc['bus'].astype(float)
+        ppc['gen'] = ppc['gen'].astype(float)
+        ppc['bus'][:, [PD, QD]] *= k
+        ppc['gen'][:, PG] *= k
+        return ppc
+
+    ## trace to the nose, target at 2.5 x base
+    t = 'runcpf (pseudo arc length) : '
+    r, success = runcpf(case9(), scaled(2.5), ppopt)
+    c = r['cpf']
+    lam = c['max_lam']
+    t_ok(success, [t, 'success'])
+    t_ok(lam > 0.98 and lam < 1, [t, 'nose before target'])
+    t_ok(c['lam'][-1] == lam, [t, 'stops at nose'])
+
+    ## nose is the loading limit
+    _, s1 = runpf(scaled(1 + 1.5 * (lam - 0.005)), ppopt)
+    _, s2 = runpf(scaled(1 + 1.5 * (lam + 0.005)), ppopt)
+    t_ok(s1 and not s2, [t, 'power flow limit'])
+    t_is(r['bus'][:, PD], scaled(1 + 1.5 * lam)['bus'][:, PD], 8,
+         [t, 'loads at nose'])
+
+    ## points on the curve are power flow solutions
+    k = 10
+    rk, _ = runpf(scaled(1 + 1.5 * c['lam'][k]), ppopt)
+    t_is(abs(c['V'][:, k]), rk['bus'][:, VM], 6, [t, 'point on curve'])
+    t_is(r['bus'][:, VM], abs(c['V_max']), 12, [t, 'voltages at nose'])
+
+    ## other parameterizations
+    for p, name in [(1, 'natural'), (2, 'arc length')]:
+        t = 'runcpf (%s) : ' % name
+        r, success = runcpf(case9(), scaled(2.5),
+                            ppoption(ppopt, CPF_PARAMETERIZATION=p))
+        t_ok(success, [t, 'success'])
+        t_is(r['cpf']['max_lam'], lam, 3, [t, 'max lambda'])
+
+    ## corrector failure away from the nose
+    t = 'runcpf (natural) : '
+    r, success = runcpf(case9(), scaled(2.5), ppoption(ppopt,
+            CPF_PARAMETERIZATION=1, CPF_STEP=0.5, CPF_STEP_MIN=0.5))
+    t_ok(not success and r['cpf']['max_lam'] == 0.5,
+         [t, 'failure away from the nose'])
+
+    ## stop at target, which is below the nose
+    t = 'runcpf (stop at target) : '
+    r, success = runcpf(case9(), scaled(2), ppoption(ppopt,
+                                                     CPF_STOP_AT='TARGET'))
+    rt, _ = runpf(scaled(2), ppopt)
+    t_ok(success and r['cpf']['lam'][-1] == 1, [t, 'lambda = 1'])
+    t_is(r['bus'][:, VM], rt['bus'][:, VM], 6, [t, 'target solution'])
+
+    ## full curve
+    t = 'runcpf (full curve) : '
+    r, success = runcpf(case9(), scaled(2.5), ppoption(ppopt,
+                                                       CPF_STOP_AT='FULL'))
+    lams = r['cpf']['lam']
+    t_ok(success and lams[-1] < lams[-2] < 0.1 and min(lams) >= 0,
+         [t, 'back to lambda = 0'])
+
+    t_end()
+
+
+if __name__ == '__main__':
+    t_cpf(quiet=False)
@@ -0,0 +1,166 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Tests for C{dc_factors} and C{dcscreen}.
+"""
+
+from numpy import array, arange, ones, isnan, errstate, lexsort, setdiff1d, c_
+from numpy import flatnonzero as find
+
+from pypower.case30 import case30
+from pypower.ppoption import ppoption
+from pypower.rundcpf import rundcpf
+from pypower.ext2int import ext2int1
+from pypower.makePTDF import makePTDF
+from pypower.makeLODF import makeLODF
+from pypower.dc_factors import dc_factors, get_dc_factors
+from pypower.dcscreen import dcscreen
+
+from pypower.idx_brch import BR_STATUS, BR_X, PF, RATE_A
+
+from pypower.t.t_begin import t_begin
+from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
+from pypower.t.t_end import t_end
+
+
+def t_dc_factors(quiet=False):
+    """Tests for C{dc_factors} and C{dcscreen}.
+    """
+    t_begin(27, quiet)
+
+    ppopt = ppoption(VERBOSE=0, OUT_ALL=0)
+    ppc = case30()
+    r, _ = rundcpf(ppc, ppopt)
+    baseMVA = r['baseMVA']
+    _, bus, gen, branch = ext2int1(r['bus'], r['gen'], r['branch'])
+    nl = branch.shape[0]
+    Pf = branch[:, PF]
+
+    ## full LODF for comparison
+    H = makePTDF(baseMVA, bus, branch)
+    with errstate(divide='ignore', invalid='ignore'):
+        LODF = makeLODF(branch, H)
+    islands = [12, 15, 33]
+    ok = setdiff1d(arange(nl), islands)
+
+    t = 'dc_factors.lodf : '
+    dcf = dc_factors(baseMVA, bus, branch)
+    L = dcf.lodf(arange(nl))
+    t_is(L[:, ok].ravel(), LODF[:, ok].ravel(), 10, [t, 'all columns'])
+    t_is(find(isnan(L[0])), islands, 12, [t, 'islanding outages'])
+    t_is(dcf.lodf([7, 3]).ravel(), LODF[:, [7, 3]].ravel(), 10,
+         [t, 'subset of columns'])
+
+    ## tiles
+    Lt = L * 0
+    ntiles = 0
+    for rows, cols, Lb in dcf.lodf_blocks(16):
+        Lt[rows[:, None], cols] = Lb
+        ntiles += 1
+    t_ok(ntiles == 9, [t, 'number of tiles'])
+    t_is(Lt[:, ok].ravel(), L[:, ok].ravel(), 12, [t, 'tiles'])
+    t_ok(isnan(Lt[:, islands]).all(), [t, 'tiles, islanding outages'])
+
+    ## PTDF rows and columns
+    t = 'dc_factors.ptdf : '
+    H = makePTDF(baseMVA, bus, branch)
+    nb = bus.shape[0]
+    t_is(dcf.ptdf().ravel(), H.ravel(), 10, [t, 'full'])
+    t_is(dcf.ptdf(branches=[4, 2]).ravel(), H[[4, 2], :].ravel(), 10,
+         [t, 'rows'])
+    t_is(dcf.ptdf(buses=[6, 0, 9]).ravel(), H[:, [6, 0, 9]].ravel(), 10,
+         [t, 'columns'])
+    t_is(dcf.ptdf([4, 2], arange(10)).ravel(), H[[4, 2], :10].ravel(), 10,
+         [t, 'rows x columns, by rows'])
+    t_is(dcf.ptdf(arange(20), [3, 7]).ravel(), H[:20][:, [3, 7]].ravel(), 10,
+         [t, 'rows x columns, by columns'])
+    Hs = dcf.ptdf(buses=[6, 9], threshold=0.05)
+    Hd = H[:, [6, 9]] * (abs(H[:, [6, 9]]) >= 0.05)
+    t_ok(Hs.nnz == (Hd != 0).sum(), [t, 'sparsified, nnz'])
+    t_is(Hs.toarray().ravel(), Hd.ravel(), 10, [t, 'sparsified'])
+
+    ## distributed slack
+    Heq = makePTDF(baseMVA, bus, branch, ones(nb))
+    dcq = dc_factors(baseMVA, bus, branch, ones(nb))
+    t_is(dcq.ptdf([1, 8]).ravel(), Heq[[1, 8], :].ravel(), 10,
+         [t, 'distributed slack, rows'])
+    t_is(dcq.ptdf(buses=[2, 5]).ravel(), Heq[:, [2, 5]].ravel(), 10,
+         [t, 'distributed slack, columns'])
+
+    ## transfers
+    t = 'dc_factors.tdf : '
+    t_is(dcq.tdf([[3, 7], [9, 2]]).ravel(),
+         c_[H[:, 3] - H[:, 7], H[:, 9] - H[:, 2]].ravel(), 10,
+         [t, 'transfers'])
+
+    ## cache
+    t = 'get_dc_factors : '
+    dcf = get_dc_factors(baseMVA, bus, branch)
+    t_ok(get_dc_factors(baseMVA, bus, branch.copy()) is dcf,
+         [t, 'same network'])
+    branch2 = branch.copy()
+    branch2[3, BR_X] = 2 * branch2[3, BR_X]
+    t_ok(get_dc_factors(baseMVA, bus, branch2) is not dcf,
+         [t, 'changed reactance'])
+
+    ## post-contingency flow of an outage
+    t = 'dc_factors.lodf : '
+    ppc['branch'][5, BR_STATUS] = 0
+    r5, _ = rundcpf(ppc, ppopt)
+    t_is(Pf + dcf.lodf(5)[:, 0] * Pf[5], r5['branch'][:, PF], 8,
+         [t, 'flows after outage of branch 5'])
+
+    ## double outages
+    t = 'dc_factors.lodf2 : '
+    ppc['branch'][[5, 8], BR_STATUS] = 0
+    r58, _ = rundcpf(ppc, ppopt)
+    Lk, Lm = dcf.lodf2([[5, 8], [0, 1], [12, 3]])
+    t_is(Pf + Lk[:, 0] * Pf[5] + Lm[:, 0] * Pf[8], r58['branch'][:, PF], 8,
+         [t, 'flows after outage of branches 5 and 8'])
+    t_ok(isnan(Lk[:, 1:]).all() and isnan(Lm[:, 1:]).all(),
+         [t, 'islanding outages'])
+    ppc['branch'][[5, 8], BR_STATUS] = 1
+
+    ## screening, with ratings lowered to get some overloads
+    t = 'dcscreen : '
+    rate = 0.7 * branch[:, RATE_A]
+    Ppost = Pf[:, None] + L[:, ok] * Pf[ok]
+    loading = 100 * abs(Ppost) / rate[:, None]
+    i, c = (loading > 100).nonzero()
+    expected = c_[ok[c], i, Ppost[i, c], loading[i, c]]
+    expected = expected[lexsort((expected[:, 1], expected[:, 0]))]
+
+    ovl, isl = dcscreen(baseMVA, bus, branch, Pf, rate=rate)
+    t_ok(all(ovl[1:, 3] <= ovl[:-1, 3]), [t, 'sorted by loading'])
+    ovl = ovl[lexsort((ovl[:, 1], ovl[:, 0]))]
+    t_is(ovl.ravel(), expected.ravel(), 8, [t, 'overloads'])
+    t_is(isl, islands, 12, [t, 'islanding outages'])
+
+    ovl2, _ = dcscreen(baseMVA, bus, branch, Pf, rate=rate, chunk=5)
+    ovl2 = ovl2[lexsort((ovl2[:, 1], ovl2[:, 0]))]
+    t_is(ovl2.ravel(), ovl.ravel(), 12, [t, 'in chunks of 5 outages'])
+
+    t = 'dcscreen : double outages : '
+    pairs = array([[k, m] for k in ok for m in ok if k < m])
+    Lk, Lm = dcf.lodf2(pairs)
+    keep = ~isnan(Lk[0])
+    k, m = pairs[keep, 0], pairs[keep, 1]
+    Ppost = Pf[:, None] + Lk[:, keep] * Pf[k] + Lm[:, keep] * Pf[m]
+    loading = 100 * abs(Ppost) / rate[:, None]
+    i, c = (loading > 100).nonzero()
+    expected = c_[k[c], m[c], i, Ppost[i, c], loading[i, c]]
+    expected = expected[lexsort((expected[:, 2], expected[:, 1],
+                                 expected[:, 0]))]
+
+    ovl, isl = dcscreen(baseMVA, bus, branch, Pf, pairs, rate=rate, chunk=100)
+    ovl = ovl[lexsort((ovl[:, 2], ovl[:, 1], ovl[:, 0]))]
+    t_is(ovl.ravel(), expected.ravel(), 8, [t, 'overloads'])
+    t_is(isl.ravel(), pairs[~keep].ravel(), 12, [t, 'islanding outages'])
+
+    t_end()
+
+
+if __name__ == '__main__':
+    t_dc_factors(quiet=False)
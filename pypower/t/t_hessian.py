@@ -5,13 +5,13 @@
 """Numerical tests of 2nd derivative code.
 """
 
-from numpy import pi, random, ones, zeros, exp
-from scipy.sparse import csr_matrix as sparse
+from numpy import pi, random, ones, zeros, exp, r_, array_equal
+from scipy.sparse import bmat, csr_matrix as sparse
 
 from pypower.case30 import case30
 from pypower.ppoption import ppoption
 from pypower.runpf import runpf
-from pypower.ext2int import ext2int1
+from pypower.ext2int import ext2int, ext2int1
 from pypower.makeYbus import makeYbus
 from pypower.dSbus_dV import dSbus_dV
 from pypower.d2Sbus_dV2 import d2Sbus_dV2
@@ -22,12 +22,15 @@ from pypower.d2Ibr_dV2 import d2Ibr_dV2
 from pypower.dAbr_dV import dAbr_dV
 from pypower.d2ASbr_dV2 import d2ASbr_dV2
 from pypower.d2AIbr_dV2 import d2AIbr_dV2
+from pypower.opf_setup import opf_setup
+from pypower.opf_hessfcn import opf_hessfcn
 
 from pypower.idx_bus import VM, VA
 from pypower.idx_brch import T_BUS, F_BUS
 
 from pypower.t.t_begin import t_begin
 from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
 from pypower.t.t_end import t_end
 
 
@@ -36,7 +39,7 @@ def t_hessian(quiet=False):
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
-    t_begin(44, quiet)
+    t_begin(48, quiet)
 
     ## run powerflow to get solved case
     ppopt = ppoption(VERBOSE=0, OUT_ALL=0)
@@ -324,6 +327,49 @@ def t_hessian(quiet=False):
     t_is(Gtva.todense(), num_Gtva, 3, ['Gtva', t])
     t_is(Gtvv.todense(), num_Gtvv, 2, ['Gtvv', t])
 
+    ##-----  check opf_hessfcn assembly  -----
+    t = ' - opf_hessfcn (fixed structure)'
+    lamP = 10 * random.rand(nb)
+    lamQ = 10 * random.rand(nb)
+    muF = 10 * random.rand(nl)
+    muT = 10 * random.rand(nl)
+    lmbda = {'eqnonlin': r_[lamP, lamQ], 'ineqnonlin': r_[muF, muT]}
+    Gpaa, Gpav, Gpva, Gpvv = d2Sbus_dV2(Ybus, V, lamP)
+    Gqaa, Gqav, Gqva, Gqvv = d2Sbus_dV2(Ybus, V, lamQ)
+    for lim in [0, 1, 2]:
+        ppopt = ppoption(ppopt, OPF_FLOW_LIM=lim)
+        om = opf_setup(ext2int(case30()), ppopt)
+        om.build_cost_params()
+        vv, _, _, _ = om.get_idx()
+        x = om.getv()[0]
+        x[vv['i1']['Va']:vv['iN']['Va']] = Va
+        x[vv['i1']['Vm']:vv['iN']['Vm']] = Vm
+        Lxx = opf_hessfcn(x, lmbda, om, Ybus, Yf, Yt, ppopt)
+
+        if lim == 2:
+            dIf_dVa, dIf_dVm, dIt_dVa, dIt_dVm, If, It = \
+                dIbr_dV(branch, Yf, Yt, V)
+            Hf = d2AIbr_dV2(dIf_dVa, dIf_dVm, If, Yf, V, muF)
+            Ht = d2AIbr_dV2(dIt_dVa, dIt_dVm, It, Yt, V, muT)
+        else:
+            dSf_dVa, dSf_dVm, dSt_dVa, dSt_dVm, Sf, St = \
+                dSbr_dV(branch, Yf, Yt, V)
+            if lim == 1:
+                dSf_dVa, dSf_dVm, Sf = dSf_dVa.real, dSf_dVm.real, Sf.real
+                dSt_dVa, dSt_dVm, St = dSt_dVa.real, dSt_dVm.real, St.real
+            Hf = d2ASbr_dV2(dSf_dVa, dSf_dVm, Sf, Cf, Yf, V, muF)
+            Ht = d2ASbr_dV2(dSt_dVa, dSt_dVm, St, Ct, Yt, V, muT)
+        Hvv = bmat([[Gpaa.real + Gqaa.imag + Hf[0] + Ht[0],
+                     Gpav.real + Gqav.imag + Hf[1] + Ht[1]],
+                    [Gpva.real + Gqva.imag + Hf[2] + Ht[2],
+                     Gpvv.real + Gqvv.imag + Hf[3] + Ht[3]]])
+        t_is(Lxx[:2 * nb, :2 * nb].toarray().ravel(), Hvv.toarray().ravel(),
+             8, ['OPF_FLOW_LIM = %d' % lim, t])
+
+    Lxx2 = opf_hessfcn(x * 1.01, lmbda, om, Ybus, Yf, Yt, ppopt)
+    t_ok(array_equal(Lxx.indptr, Lxx2.indptr) and
+         array_equal(Lxx.indices, Lxx2.indices), ['same structure', t])
+
     t_end()
 
 
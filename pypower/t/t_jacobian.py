@@ -5,18 +5,24 @@
 """Numerical tests of partial derivative code.
 """
 
-from numpy import ones, conj, eye, exp, pi, array
+from numpy import ones, conj, eye, exp, pi, array, array_equal, r_
+
+from scipy.sparse import hstack, vstack
 
 from pypower.case30 import case30
 from pypower.ppoption import ppoption
 from pypower.loadcase import loadcase
-from pypower.ext2int import ext2int1
+from pypower.ext2int import ext2int, ext2int1
 from pypower.runpf import runpf
 from pypower.makeYbus import makeYbus
+from pypower.bustypes import bustypes
 from pypower.dSbus_dV import dSbus_dV
+from pypower.pf_jacobian import pf_jacobian
 from pypower.dSbr_dV import dSbr_dV
 from pypower.dAbr_dV import dAbr_dV
 from pypower.dIbr_dV import dIbr_dV
+from pypower.opf_setup import opf_setup
+from pypower.opf_consfcn import opf_consfcn
 
 from pypower.idx_bus import VM, VA
 from pypower.idx_brch import F_BUS, T_BUS
@@ -24,6 +30,7 @@ from pypower.idx_brch import F_BUS, T_BUS
 from pypower.t.t_begin import t_begin
 from pypower.t.t_end import t_end
 from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
 
 
 def t_jacobian(quiet=False):
@@ -31,7 +38,7 @@ def t_jacobian(quiet=False):
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
-    t_begin(28, quiet)
+    t_begin(38, quiet)
 
     ## run powerflow to get solved case
     ppopt = ppoption(VERBOSE=0, OUT_ALL=0)
@@ -79,6 +86,31 @@ def t_jacobian(quiet=False):
     t_is(dSbus_dVa_sp, num_dSbus_dVa, 5, 'dSbus_dVa (sparse)')
     t_is(dSbus_dVm_full, num_dSbus_dVm, 5, 'dSbus_dVm (full)')
     t_is(dSbus_dVa_full, num_dSbus_dVa, 5, 'dSbus_dVa (full)')
+    t_ok(all([(dS.indptr == Ybus.indptr).all() and
+              (dS.indices == Ybus.indices).all()
+              for dS in (dSbus_dVm, dSbus_dVa)]),
+         'dSbus_dV (sparse), structure of Ybus')
+
+    ##-----  check pf_jacobian code  -----
+    _, pv, pq = bustypes(bus, gen)
+    pvpq = r_[pv, pq]
+    J = vstack([
+            hstack([dSbus_dVa[array([pvpq]).T, pvpq].real,
+                    dSbus_dVm[array([pvpq]).T, pq].real]),
+            hstack([dSbus_dVa[array([pq]).T, pvpq].imag,
+                    dSbus_dVm[array([pq]).T, pq].imag])
+        ], format="csr")
+    jac = pf_jacobian(Ybus, pv, pq)
+    t_is(jac.update(V).todense(), J.todense(), 12, 'pf_jacobian')
+    V2 = 0.98 * V * exp(0.01j)
+    dSbus_dVm2, dSbus_dVa2 = dSbus_dV(Ybus, V2)
+    J2 = vstack([
+            hstack([dSbus_dVa2[array([pvpq]).T, pvpq].real,
+                    dSbus_dVm2[array([pvpq]).T, pq].real]),
+            hstack([dSbus_dVa2[array([pq]).T, pvpq].imag,
+                    dSbus_dVm2[array([pq]).T, pq].imag])
+        ], format="csr")
+    t_is(jac.update(V2).todense(), J2.todense(), 12, 'pf_jacobian (refill)')
 
     ##-----  check dSbr_dV code  -----
     ## full matrices
@@ -172,6 +204,43 @@ def t_jacobian(quiet=False):
     t_is(dIt_dVm_full, num_dIt_dVm, 5, 'dIt_dVm (full)')
     t_is(dIt_dVa_full, num_dIt_dVa, 5, 'dIt_dVa (full)')
 
+    ##-----  check opf_consfcn assembly  -----
+    t = ' - opf_consfcn (fixed structure)'
+    dSbus_dVm, dSbus_dVa = dSbus_dV(Ybus, V)
+    dg_dV = vstack([hstack([dSbus_dVa.real, dSbus_dVm.real]),
+                    hstack([dSbus_dVa.imag, dSbus_dVm.imag])])
+    for lim in [0, 1, 2]:
+        ppopt = ppoption(ppopt, OPF_FLOW_LIM=lim)
+        om = opf_setup(ext2int(case30()), ppopt)
+        vv, _, _, _ = om.get_idx()
+        x = om.getv()[0]
+        x[vv['i1']['Va']:vv['iN']['Va']] = Va.ravel()
+        x[vv['i1']['Vm']:vv['iN']['Vm']] = Vm.ravel()
+        _, _, dh, dg = opf_consfcn(x, om, Ybus, Yf, Yt, ppopt)
+
+        if lim == 2:
+            dFf_dVa, dFf_dVm, dFt_dVa, dFt_dVm, Ff, Ft = \
+                dIbr_dV(branch, Yf, Yt, V)
+        else:
+            dFf_dVa, dFf_dVm, dFt_dVa, dFt_dVm, Ff, Ft = \
+                dSbr_dV(branch, Yf, Yt, V)
+            if lim == 1:
+                dFf_dVa, dFf_dVm, Ff = dFf_dVa.real, dFf_dVm.real, Ff.real
+                dFt_dVa, dFt_dVm, Ft = dFt_dVa.real, dFt_dVm.real, Ft.real
+        df_dVa, df_dVm, dt_dVa, dt_dVm = \
+            dAbr_dV(dFf_dVa, dFf_dVm, dFt_dVa, dFt_dVm, Ff, Ft)
+        dh_dV = vstack([hstack([df_dVa, df_dVm]), hstack([dt_dVa, dt_dVm])])
+        t_is(dg[:2 * nb, :].T.toarray().ravel(), dg_dV.toarray().ravel(),
+             8, ['OPF_FLOW_LIM = %d : dg' % lim, t])
+        t_is(dh[:2 * nb, :].T.toarray().ravel(), dh_dV.toarray().ravel(),
+             8, ['OPF_FLOW_LIM = %d : dh' % lim, t])
+
+    _, _, dh2, dg2 = opf_consfcn(x * 1.01, om, Ybus, Yf, Yt, ppopt)
+    t_ok(array_equal(dh.indptr, dh2.indptr) and
+         array_equal(dh.indices, dh2.indices) and
+         array_equal(dg.indptr, dg2.indptr) and
+         array_equal(dg.indices, dg2.indices), ['same structure', t])
+
     t_end()
 
 
@@ -0,0 +1,100 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Tests for C{mpopf}.
+"""
+
+from numpy import array, arange, zeros, sin, diff, argmax
+
+from pypower.case30 import case30
+from pypower.ppoption import ppoption
+from pypower.runopf import runopf
+from pypower.mpopf import mpopf
+
+from pypower.idx_bus import PD, QD, LAM_P
+from pypower.idx_gen import PG
+
+from pypower.t.t_begin import t_begin
+from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
+from pypower.t.t_end import t_end
+
+
+def t_mpopf(quiet=False):
+    """Tests for C{mpopf}.
+    """
+    t_begin(26, quiet)
+
+    ppc = case30()
+    ng = ppc['gen'].shape[0]
+
+    ## 4 periods of load scaling
+    nt = 4
+    scale = 1 - 0.1 * sin(arange(nt))**2
+    pd = scale[:, None] * ppc['bus'][:, PD]
+    qd = scale[:, None] * ppc['bus'][:, QD]
+
+    for dc, name in [(True, 'DC'), (False, 'AC')]:
+        t = 'mpopf (%s) : ' % name
+        ppopt = ppoption(OPF_VIOLATION=1e-6, PDIPM_GRADTOL=1e-8,
+                         PDIPM_COMPTOL=1e-8, PDIPM_COSTTOL=1e-9)
+        ppopt = ppoption(ppopt, VERBOSE=0, OUT_ALL=0, PF_DC=dc)
+
+        ## reference solutions from runopf
+        ref = []
+        for k in range(nt):
+            c = case30()
+            c['bus'][:, PD] = pd[k]
+            c['bus'][:, QD] = qd[k]
+            ref.append(runopf(c, ppopt))
+        pg_ref = array([r['gen'][:, PG] for r in ref])
+
+        ## without ramp limits, same as the separate OPFs
+        r = mpopf(case30(), pd, qd, ppopt=ppopt)
+        pg = array([p['gen'][:, PG] for p in r['periods']])
+        t_ok(r['success'], [t, 'success'])
+        t_is(r['f'], sum([rr['f'] for rr in ref]), 4, [t, 'f'])
+        t_is(array([p['f'] for p in r['periods']]),
+             array([rr['f'] for rr in ref]), 4, [t, 'period f'])
+        t_is(pg.ravel(), pg_ref.ravel(), 3, [t, 'Pg'])
+        t_is(array([p['bus'][:, LAM_P] for p in r['periods']]).ravel(),
+             array([rr['bus'][:, LAM_P] for rr in ref]).ravel(), 3,
+             [t, 'lambda'])
+        t_is(r['ramp']['mu']['u'].ravel(), zeros(ng * (nt - 1)), 6,
+             [t, 'no ramp mu'])
+
+        ## limit the ramps of the gen with the largest change
+        d = abs(diff(pg_ref, axis=0)).max(0)
+        ramp = d + 100
+        g = argmax(d)
+        ramp[g] = d[g] / 2
+        t = 'mpopf (%s) w/ramp limits : ' % name
+        r = mpopf(case30(), pd, qd, ramp=ramp, ppopt=ppopt)
+        pg = array([p['gen'][:, PG] for p in r['periods']])
+        dr = diff(pg, axis=0)
+        mu = r['ramp']['mu']['u'] + r['ramp']['mu']['l']
+        t_ok(r['success'], [t, 'success'])
+        t_ok(r['f'] > sum([rr['f'] for rr in ref]), [t, 'f'])
+        t_is(abs(dr).max(0)[g], ramp[g], 4, [t, 'ramp limit'])
+        t_ok(all(abs(dr).max(0) <= ramp + 1e-4), [t, 'ramps'])
+        t_ok(all(mu[g][abs(abs(dr[:, g]) - ramp[g]) < 1e-3] > 0),
+             [t, 'binding mu'])
+        t_is(mu[arange(ng) != g].ravel(), zeros((ng - 1) * (nt - 1)), 4,
+             [t, 'non-binding mu'])
+
+    ## LDL' factorization of the KKT system, also ordered by period
+    t = 'mpopf (DC, ldl) : '
+    ppopt = ppoption(VERBOSE=0, OUT_ALL=0, PF_DC=True,
+                     PDIPM_LIN_SOLVER='ldl')
+    rl = mpopf(case30(), pd, qd, ramp=ramp, ppopt=ppopt)
+    t_ok(rl['success'], [t, 'success'])
+    t_is(rl['f'], mpopf(case30(), pd, qd, ramp=ramp,
+                        ppopt=ppoption(ppopt, PDIPM_LIN_SOLVER='splu'))['f'],
+         6, [t, 'f'])
+
+    t_end()
+
+
+if __name__ == '__main__':
+    t_mpopf(quiet=False)
@@ -0,0 +1,90 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Tests for C{newtonpf_batch}.
+"""
+
+from warnings import catch_warnings, simplefilter
+
+from numpy import exp, pi, c_, zeros, errstate
+
+from pypower.case30 import case30
+from pypower.ppoption import ppoption
+from pypower.loadcase import loadcase
+from pypower.ext2int import ext2int
+from pypower.bustypes import bustypes
+from pypower.makeYbus import makeYbus
+from pypower.makeSbus import makeSbus
+from pypower.newtonpf import newtonpf
+from pypower.newtonpf_batch import newtonpf_batch
+
+from pypower.idx_bus import VM, VA, PD, QD
+from pypower.idx_gen import GEN_BUS, GEN_STATUS, VG
+
+from pypower.t.t_begin import t_begin
+from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
+from pypower.t.t_end import t_end
+
+
+def t_newtonpf_batch(quiet=False):
+    """Tests for C{newtonpf_batch}.
+    """
+    t_begin(16, quiet)
+
+    ppopt = ppoption(VERBOSE=0, OUT_ALL=0)
+    ppc = ext2int(loadcase(case30()))
+    baseMVA, bus, gen, branch = \
+        ppc['baseMVA'], ppc['bus'], ppc['gen'], ppc['branch']
+
+    ref, pv, pq = bustypes(bus, gen)
+    on = gen[:, GEN_STATUS] > 0
+    gbus = gen[on, GEN_BUS].astype(int)
+    V0 = bus[:, VM] * exp(1j * pi / 180 * bus[:, VA])
+    V0[gbus] = gen[on, VG] / abs(V0[gbus]) * V0[gbus]
+
+    Ybus, _, _ = makeYbus(baseMVA, bus, branch)
+
+    ## scenarios with scaled loads, the last one infeasible
+    scales = [0.5, 1.0, 1.3, 1.6, 20.0]
+    ns = len(scales)
+    Sbus = zeros((bus.shape[0], ns), complex)
+    for k, s in enumerate(scales):
+        b = bus.copy()
+        b[:, [PD, QD]] = s * b[:, [PD, QD]]
+        Sbus[:, k] = makeSbus(baseMVA, b, gen)
+
+    t = 'newtonpf_batch : '
+    V, converged, its = newtonpf_batch(Ybus, Sbus, V0, ref, pv, pq, ppopt)
+    t_is(V.shape, [bus.shape[0], ns], 12, [t, 'size of V'])
+    t_ok(converged[:-1].all(), [t, 'feasible scenarios converged'])
+    t_ok(not converged[-1], [t, 'infeasible scenario not converged'])
+    t_ok(its[-1] == ppopt['PF_MAX_IT'], [t, 'iterations of infeasible'])
+
+    for k in range(ns - 1):
+        Vk, success, ik = newtonpf(Ybus, Sbus[:, k], V0.copy(), ref, pv, pq,
+                                   ppopt)
+        t_is(c_[V[:, k]], c_[Vk], 8, [t, 'V, scenario %d' % k])
+        t_ok(its[k] == ik, [t, 'iterations, scenario %d' % k])
+
+    ## per-scenario initial voltages and converged starting point
+    V2, converged2, its2 = newtonpf_batch(Ybus, Sbus[:, :2],
+            c_[V[:, 0], V0], ref, pv, pq, ppopt)
+    t_ok(converged2.all() and its2[0] == 0, [t, 'warm-started column'])
+
+    ## singular Jacobian (zero voltages) in one scenario only
+    with errstate(divide='ignore', invalid='ignore'), catch_warnings():
+        simplefilter('ignore')      ## singular matrix
+        V3, converged3, its3 = newtonpf_batch(Ybus, Sbus[:, 1],
+                c_[V0, zeros(bus.shape[0]), V0], ref, pv, pq, ppopt)
+    t_ok(converged3[[0, 2]].all() and not converged3[1],
+         [t, 'mixed batch, singular scenario failed'])
+    t_is(its3[[0, 2]], [3, 3], 12, [t, 'mixed batch, iterations'])
+    t_is(V3[:, [0, 2]], c_[V[:, 1], V[:, 1]], 8, [t, 'mixed batch, V'])
+
+    t_end()
+
+
+if __name__ == '__main__':
+    t_newtonpf_batch(quiet=False)
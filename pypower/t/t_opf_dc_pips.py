@@ -36,7 +36,7 @@ def t_opf_dc_pips(quiet=False):
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
-    num_tests = 23
+    num_tests = 36
 
     t_begin(num_tests, quiet)
 
@@ -88,6 +88,21 @@ def t_opf_dc_pips(quiet=False):
     t_is(branch[:, ibr_flow  ], branch_soln[:, ibr_flow  ],  3, [t, 'branch flow'])
     t_is(branch[:, ibr_mu    ], branch_soln[:, ibr_mu    ],  2, [t, 'branch mu'])
 
+    ## PTDF formulation
+    t = ''.join([t0, 'PTDF formulation : '])
+    r = rundcopf(casefile, ppoption(ppopt, OPF_DC_FORM='ptdf'))
+    bus, gen, branch, f, success = \
+            r['bus'], r['gen'], r['branch'], r['f'], r['success']
+    t_ok(success, [t, 'success'])
+    t_ok('Va' not in r['var']['val'], [t, 'no Va vars'])
+    t_is(f, f_soln, 3, [t, 'f'])
+    t_is(   bus[:, ib_voltage],    bus_soln[:, ib_voltage],  3, [t, 'bus voltage'])
+    t_is(   bus[:, ib_lam    ],    bus_soln[:, ib_lam    ],  3, [t, 'bus lambda'])
+    t_is(   gen[:, ig_disp   ],    gen_soln[:, ig_disp   ],  3, [t, 'gen dispatch'])
+    t_is(   gen[:, ig_mu     ],    gen_soln[:, ig_mu     ],  3, [t, 'gen mu'])
+    t_is(branch[:, ibr_flow  ], branch_soln[:, ibr_flow  ],  3, [t, 'branch flow'])
+    t_is(branch[:, ibr_mu    ], branch_soln[:, ibr_mu    ],  2, [t, 'branch mu'])
+
     ##-----  run OPF with extra linear user constraints & costs  -----
     ## two new z variables
     ##      0 <= z1, P2 - P1 <= z1
@@ -114,6 +129,13 @@ def t_opf_dc_pips(quiet=False):
     t_is(r['var']['val']['z'], [0, 0.3348], 4, [t, 'user vars'])
     t_is(r['cost']['usr'], 0.3348, 3, [t, 'user costs'])
 
+    t = ''.join([t0, 'w/extra constraints & costs 1, PTDF formulation : '])
+    r = rundcopf(ppc, ppoption(ppopt, OPF_DC_FORM='ptdf'))
+    t_ok(r['success'], [t, 'success'])
+    t_is(r['gen'][0, PG], 116.15974, 4, [t, 'Pg1 = 116.15974'])
+    t_is(r['gen'][1, PG], 116.15974, 4, [t, 'Pg2 = 116.15974'])
+    t_is(r['var']['val']['z'], [0, 0.3348], 4, [t, 'user vars'])
+
     ## with A and N sized for AC opf
     ppc = loadcase(casefile)
     row = [0, 0, 0, 1, 1, 1]
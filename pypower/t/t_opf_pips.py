@@ -16,9 +16,10 @@ from pypower.ppoption import ppoption
 from pypower.runopf import runopf
 from pypower.loadcase import loadcase
 from pypower.opf import opf
+from pypower.case30 import case30
 
 from pypower.idx_bus import \
-    BUS_AREA, BASE_KV, VMIN, VM, VA, LAM_P, LAM_Q, MU_VMIN, MU_VMAX
+    BUS_AREA, BASE_KV, VMIN, VM, VA, LAM_P, LAM_Q, MU_VMIN, MU_VMAX, PD, QD
 
 from pypower.idx_gen import \
     GEN_BUS, QMAX, QMIN, MBASE, APF, PG, QG, VG, MU_PMAX, MU_QMIN, \
@@ -40,7 +41,7 @@ def t_opf_pips(quiet=False):
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
-    num_tests = 101
+    num_tests = 107
 
     t_begin(num_tests, quiet)
 
@@ -327,6 +328,22 @@ def t_opf_pips(quiet=False):
     t_is(branch[:, ibr_flow  ], branch_soln[:, ibr_flow  ],  3, [t, 'branch flow'])
     t_is(branch[:, ibr_mu    ], branch_soln[:, ibr_mu    ],  2, [t, 'branch mu'])
 
+    ##-----  test warm started OPF after a small load change  -----
+    t = ''.join([t0, 'warm start : '])
+    r = runopf(case30(), ppopt)
+    ppc = case30()
+    ppc['bus'][:, [PD, QD]] *= 1.005
+    rc = runopf(ppc, ppopt)
+    ppc['warm'] = r['raw']['warm']
+    rw = runopf(ppc, ppopt)
+    t_ok(rw['success'], [t, 'success'])
+    t_is(rw['f'], rc['f'], 4, [t, 'f'])
+    t_is(rw['bus'][:, ib_voltage], rc['bus'][:, ib_voltage], 5, [t, 'bus voltage'])
+    t_is(rw['bus'][:, ib_lam], rc['bus'][:, ib_lam], 4, [t, 'bus lambda'])
+    t_ok(2 * rw['raw']['output']['iterations'] <=
+         rc['raw']['output']['iterations'], [t, 'iterations'])
+    t_ok('warm' not in rw, [t, 'no warm field in results'])
+
     t_end()
 
 
@@ -7,17 +7,18 @@
 
 from os.path import dirname, join
 
-from numpy import array, r_
+from numpy import array, arange, cos, pi, r_
 
 from scipy.io import loadmat
 
 from pypower.ppoption import ppoption
 from pypower.loadcase import loadcase
+from pypower.case300 import case300
 from pypower.runpf import runpf
 from pypower.rundcpf import rundcpf
 
 from pypower.idx_bus import \
-    BUS_I, VA
+    BUS_I, VM, VA
 
 from pypower.idx_gen import \
     GEN_BUS, QMAX, QMIN, PG, QG, PMIN, PMAX
@@ -36,7 +37,7 @@ def t_pf(quiet=False):
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
-    t_begin(33, quiet)
+    t_begin(87, quiet)
 
     tdir = dirname(__file__)
     casefile = join(tdir, 't_case9_pf')
@@ -61,6 +62,78 @@ def t_pf(quiet=False):
     t_is(gen, gen_soln, 6, [t, 'gen'])
     t_is(branch, branch_soln, 6, [t, 'branch'])
 
+    ## run Newton PF with each linear solver
+    for solver in ['splu', 'gmres', 'bicgstab']:
+        t = 'Newton PF (%s) : ' % solver
+        ppopt = ppoption(ppopt, PF_ALG=1, PF_LIN_SOLVER=solver)
+        results, success = runpf(casefile, ppopt)
+        bus, gen, branch = results['bus'], results['gen'], results['branch']
+        t_ok(success, [t, 'success'])
+        t_is(bus, bus_soln, 6, [t, 'bus'])
+        t_is(gen, gen_soln, 6, [t, 'gen'])
+        t_is(branch, branch_soln, 6, [t, 'branch'])
+    ppopt = ppoption(ppopt, PF_LIN_SOLVER='spsolve')
+
+    ## run Newton PF reusing Jacobian factors
+    for reuse in [1, 2]:
+        t = 'Newton PF (PF_JAC_REUSE = %d) : ' % reuse
+        ppopt = ppoption(ppopt, PF_ALG=1, PF_JAC_REUSE=reuse)
+        results, success = runpf(casefile, ppopt)
+        bus, gen, branch = results['bus'], results['gen'], results['branch']
+        t_ok(success, [t, 'success'])
+        t_is(bus, bus_soln, 6, [t, 'bus'])
+        t_is(gen, gen_soln, 6, [t, 'gen'])
+        t_is(branch, branch_soln, 6, [t, 'branch'])
+
+    ## case300 rejects the first step with old factors, which must not
+    ## be repeated with a ratio of 1
+    t = 'Newton PF (PF_JAC_REUSE_RATIO = 1) : '
+    r0, _ = runpf(case300(), ppoption(ppopt, PF_JAC_REUSE=0))
+    r1, success = runpf(case300(), ppoption(ppopt, PF_JAC_REUSE=1,
+                                            PF_JAC_REUSE_RATIO=1))
+    t_ok(success, [t, 'success'])
+    t_is(r1['bus'][:, [VM, VA]], r0['bus'][:, [VM, VA]], 6, [t, 'V'])
+    ppopt = ppoption(ppopt, PF_JAC_REUSE=0)
+
+    ## run Newton PF with step length control
+    for step in [1, 2]:
+        t = 'Newton PF (PF_NR_STEP = %d) : ' % step
+        ppopt = ppoption(ppopt, PF_ALG=1, PF_NR_STEP=step)
+        results, success = runpf(casefile, ppopt)
+        bus, gen, branch = results['bus'], results['gen'], results['branch']
+        t_ok(success, [t, 'success'])
+        t_is(bus, bus_soln, 6, [t, 'bus'])
+        t_is(gen, gen_soln, 6, [t, 'gen'])
+        t_is(branch, branch_soln, 6, [t, 'branch'])
+
+    ## poor initial voltages, the full Newton step diverges
+    ppc = loadcase(casefile)
+    ppc['bus'] = ppc['bus'].astype(float)
+    ppc['bus'][:, VM] = 0.8
+    ppc['bus'][:, VA] = 0.3 * cos(2 * arange(9)) * 180 / pi
+    ppc['bus'][0, VA] = 0
+    t = 'Newton PF (poor initial point) : '
+    ppopt = ppoption(ppopt, PF_ALG=1, PF_NR_STEP=0, VERBOSE=0)
+    results, success = runpf(ppc, ppopt)
+    t_ok(not success, [t, 'full step fails'])
+    for step in [1, 2]:
+        t = 'Newton PF (poor initial point, PF_NR_STEP = %d) : ' % step
+        ppopt = ppoption(ppopt, PF_NR_STEP=step)
+        results, success = runpf(ppc, ppopt)
+        t_ok(success, [t, 'success'])
+        t_is(results['bus'], bus_soln, 6, [t, 'bus'])
+    ppopt = ppoption(ppopt, PF_NR_STEP=0, VERBOSE=verbose)
+
+    ## run Newton PF, current injection formulation
+    t = 'Newton PF (current injection, cartesian) : ';
+    ppopt = ppoption(ppopt, PF_ALG=5)
+    results, success = runpf(casefile, ppopt)
+    bus, gen, branch = results['bus'], results['gen'], results['branch']
+    t_ok(success, [t, 'success'])
+    t_is(bus, bus_soln, 6, [t, 'bus'])
+    t_is(gen, gen_soln, 6, [t, 'gen'])
+    t_is(branch, branch_soln, 6, [t, 'branch'])
+
     ## run fast-decoupled PF (XB version)
     t = 'Fast Decoupled (XB) PF : ';
     ppopt = ppoption(ppopt, PF_ALG=2)
@@ -91,6 +164,18 @@ def t_pf(quiet=False):
     t_is(gen, gen_soln, 5, [t, 'gen'])
     t_is(branch, branch_soln, 5, [t, 'branch'])
 
+    ## run SOR and Jacobi variants of Gauss-Seidel PF
+    for gs_alg in ['sor', 'jacobi']:
+        t = 'Gauss-Seidel PF (%s) : ' % gs_alg
+        ppopt = ppoption(ppopt, PF_ALG=4, PF_GS_ALG=gs_alg)
+        results, success = runpf(casefile, ppopt)
+        bus, gen, branch = results['bus'], results['gen'], results['branch']
+        t_ok(success, [t, 'success'])
+        t_is(bus, bus_soln, 5, [t, 'bus'])
+        t_is(gen, gen_soln, 5, [t, 'gen'])
+        t_is(branch, branch_soln, 5, [t, 'branch'])
+    ppopt = ppoption(ppopt, PF_GS_ALG='gs')
+
     ## get solved AC power flow case from MAT-file
     ## defines bus_soln, gen_soln, branch_soln
     soln9_dcpf = loadmat(join(tdir, 'soln9_dcpf.mat'), struct_as_record=False)
@@ -141,6 +226,21 @@ def t_pf(quiet=False):
     bus, gen, branch = results['bus'], results['gen'], results['branch']
     t_is(gen[0:2, QG], [-50 + 8.02, 50 + 16.05], 2, [t, '2 gens, proportional'])
 
+    ## enforce Q limits inside the solver
+    ppc = loadcase(casefile)
+    ppc['gen'][2, QMIN] = 0
+    Vm = {}
+    for alg in [1, 2]:
+        t = 'Q limits in solver (PF_ALG = %d) : ' % alg
+        ppopt = ppoption(ppopt, PF_ALG=alg, ENFORCE_Q_LIMS=3)
+        results, success = runpf(ppc, ppopt)
+        t_ok(success, [t, 'success'])
+        t_ok(results['qlim_switches'] == 1, [t, 'qlim_switches'])
+        t_is(results['gen'][2, QG], 0, 6, [t, 'Qg at limit'])
+        Vm[alg] = results['bus'][:, VM]
+    t_is(Vm[1], Vm[2], 6, 'Q limits in solver : Newton vs fast-decoupled Vm')
+    ppopt = ppoption(ppopt, PF_ALG=1, ENFORCE_Q_LIMS=0)
+
     ## network with islands
     t = 'network w/islands : DC PF : '
     ppc0 = loadcase(casefile)
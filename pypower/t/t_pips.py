@@ -180,7 +180,7 @@ def t_pips(quiet=False):
 
     @author: Ray Zimmerman (PSERC Cornell)
     """
-    t_begin(60, quiet)
+    t_begin(71, quiet)
 
     t = 'unconstrained banana function : '
     ## from MATLAB Optimization Toolbox's bandem.m
@@ -352,6 +352,40 @@ def t_pips(quiet=False):
     t_is(lam['lower'], [1.08787121024, 0, 0, 0], 5, [t, 'lam[\'lower\']'])
     t_is(lam['upper'], zeros(x.shape), 7, [t, 'lam[\'upper\']'])
 
+    ## other KKT solvers
+    for ls in ['spsolve', 'ldl']:
+        t = 'constrained 4-d nonlinear (linsolver = \'%s\') : ' % ls
+        solution = pips(f_fcn, x0, xmin=xmin, xmax=xmax, gh_fcn=gh_fcn,
+                        hess_fcn=hess_fcn, opt={'linsolver': ls})
+        x, f, s = solution["x"], solution["f"], solution["eflag"]
+        t_is(s, 1, 13, [t, 'success'])
+        t_is(x, [1, 4.7429994, 3.8211503, 1.3794082], 6, [t, 'x'])
+        t_is(f, 17.0140173, 6, [t, 'f'])
+
+    hist = solution["output"]["hist"]
+    t_ok(all(h['t_factor'] >= 0 and h['t_solve'] >= 0 and
+             h['t_assemble'] >= 0 for h in hist) and
+         hist[-1]['t_factor'] > 0, [t, 'KKT timings in hist'])
+
+    ## step control, constraint values only in the step-size reductions
+    t = 'constrained 4-d nonlinear (step control) : '
+    calls = {'gh': 0, 'values': 0}
+    def gh_count(x, values_only=False):
+        calls['values' if values_only else 'gh'] += 1
+        h, g, dh, dg = gh_fcn(x)
+        return (h, g, None, None) if values_only else (h, g, dh, dg)
+    solution = pips(f_fcn, x0, xmin=xmin, xmax=xmax, gh_fcn=gh_count,
+                    hess_fcn=hess_fcn,
+                    opt={'step_control': True, 'values_only': True})
+    x, f, s = solution["x"], solution["f"], solution["eflag"]
+    it = solution["output"]["iterations"]
+    t_is(s, 1, 13, [t, 'success'])
+    t_is(x, [1, 4.7429994, 3.8211503, 1.3794082], 6, [t, 'x'])
+    t_is(f, 17.0140173, 6, [t, 'f'])
+    ## uncached, the trial point and the new iterate are both evaluated
+    t_ok(calls['gh'] < 2 * it + 1 and calls['values'] > 0,
+         [t, 'cached evaluations'])
+
     t_end()
 
 
@@ -0,0 +1,98 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Tests for C{runcont}.
+"""
+
+from numpy import array, maximum, flatnonzero as find
+
+from pypower.case30 import case30
+from pypower.ppoption import ppoption
+from pypower.runpf import runpf
+from pypower.runcont import runcont
+
+from pypower.idx_bus import VM, VMAX, VMIN
+from pypower.idx_brch import BR_STATUS, PF, QF, PT, QT, RATE_A
+from pypower.idx_gen import GEN_STATUS
+
+from pypower.t.t_begin import t_begin
+from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
+from pypower.t.t_end import t_end
+
+
+def t_runcont(quiet=False):
+    """Tests for C{runcont}.
+    """
+    t_begin(13, quiet)
+
+    ppopt = ppoption(VERBOSE=0, OUT_ALL=0)
+
+    def violations(ppc):
+        """Overloaded branches and buses out of voltage limits from runpf.
+        """
+        r, success = runpf(ppc, ppopt)
+        br = r['branch']
+        S = maximum(abs(br[:, PF] + 1j * br[:, QF]),
+                    abs(br[:, PT] + 1j * br[:, QT]))
+        ovl = find((br[:, RATE_A] > 0) & (S > br[:, RATE_A]))
+        Vm = r['bus'][:, VM]
+        vv = find((Vm > r['bus'][:, VMAX]) | (Vm < r['bus'][:, VMIN]))
+        return success, ovl, S[ovl], vv, Vm[vv]
+
+    ## N-1 branch outages, serial
+    t = 'runcont : N-1 : '
+    res = runcont(case30(), ppopt=ppopt, processes=1)
+    t_ok(res['base'], [t, 'base case'])
+    t_is(res['islanded'], [12, 15, 33], 12, [t, 'islanded'])
+    t_ok(len(res['nonconverged']) == 0, [t, 'nonconverged'])
+
+    for k in [6, 9]:
+        ppc = case30()
+        ppc['branch'][k, BR_STATUS] = 0
+        success, ovl, S, vv, Vm = violations(ppc)
+        i = res['overloads'][:, 0] == k
+        j = res['voltages'][:, 0] == k
+        t_is(res['overloads'][i, 1:3].ravel(), array([ovl, S]).T.ravel(), 6,
+             [t, 'overloads, branch %d out' % k])
+        t_is(res['voltages'][j, 1:].ravel(), array([vv, Vm]).T.ravel(), 6,
+             [t, 'voltages, branch %d out' % k])
+
+    ## same in parallel
+    t = 'runcont : N-1 : 2 processes : '
+    res2 = runcont(case30(), ppopt=ppopt, processes=2)
+    t_is(res2['overloads'].ravel(), res['overloads'].ravel(), 8,
+         [t, 'overloads'])
+    t_is(res2['voltages'].ravel(), res['voltages'].ravel(), 8,
+         [t, 'voltages'])
+    t_is(res2['islanded'], res['islanded'], 12, [t, 'islanded'])
+
+    ## gen and multiple outages
+    t = 'runcont : gen outage : '
+    res = runcont(case30(), [('gen', 1), [('gen', 2), ('branch', 0)]],
+                  ppopt=ppopt, processes=1)
+    ppc = case30()
+    ppc['gen'][1, GEN_STATUS] = 0
+    success, ovl, S, vv, Vm = violations(ppc)
+    i = res['overloads'][:, 0] == 0
+    t_is(res['overloads'][i, 1:3].ravel(), array([ovl, S]).T.ravel(), 6,
+         [t, 'overloads'])
+
+    t = 'runcont : gen and branch outage : '
+    ppc = case30()
+    ppc['gen'][2, GEN_STATUS] = 0
+    ppc['branch'][0, BR_STATUS] = 0
+    success, ovl, S, vv, Vm = violations(ppc)
+    i = res['overloads'][:, 0] == 1
+    j = res['voltages'][:, 0] == 1
+    t_is(res['overloads'][i, 1:3].ravel(), array([ovl, S]).T.ravel(), 6,
+         [t, 'overloads'])
+    t_is(res['voltages'][j, 1:].ravel(), array([vv, Vm]).T.ravel(), 6,
+         [t, 'voltages'])
+
+    t_end()
+
+
+if __name__ == '__main__':
+    t_runcont(quiet=False)
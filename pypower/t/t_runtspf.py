@@ -0,0 +1,88 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Tests for C{runtspf}.
+"""
+
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from numpy import array, load
+
+from pypower.case9 import case9
+from pypower.ppoption import ppoption
+from pypower.runpf import runpf
+from pypower.runtspf import runtspf
+
+from pypower.idx_bus import PD, QD, VM, VA
+from pypower.idx_brch import PF, QF, QT
+from pypower.idx_gen import PG
+
+from pypower.t.t_begin import t_begin
+from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
+from pypower.t.t_end import t_end
+
+
+def t_runtspf(quiet=False):
+    """Tests for C{runtspf}.
+    """
+    t_begin(19, quiet)
+
+    ppopt = ppoption(VERBOSE=0, OUT_ALL=0)
+    ppc = case9()
+    nb = ppc['bus'].shape[0]
+
+    ## 3 steps of load scaling and redispatch of gen 2
+    scale = array([0.8, 1.0, 1.2])
+    pd = scale[:, None] * ppc['bus'][:, PD]
+    qd = scale[:, None] * ppc['bus'][:, QD]
+    pg = ppc['gen'][:, PG] * array([[1, 0.8, 1], [1, 1, 1], [1, 1.2, 1]])
+
+    ## reference solutions from runpf
+    ref = []
+    for k in range(len(scale)):
+        c = case9()
+        c['gen'] = c['gen'].astype(float)
+        c['bus'][:, PD] = pd[k]
+        c['bus'][:, QD] = qd[k]
+        c['gen'][:, PG] = pg[k]
+        r, _ = runpf(c, ppopt)
+        ref.append(r)
+
+    for alg, name in [(1, 'Newton'), (2, 'fast-decoupled'), (4, 'Gauss-Seidel')]:
+        t = 'runtspf (%s) : ' % name
+        out = runtspf(case9(), pd, qd, pg,
+                      ppoption(ppopt, PF_ALG=alg, PF_TOL=1e-10))
+        t_ok(out['success'].all(), [t, 'success'])
+        t_is(out['Vm'].ravel(), array([r['bus'][:, VM] for r in ref]).ravel(), 6, [t, 'Vm'])
+        t_is(out['Va'].ravel(), array([r['bus'][:, VA] for r in ref]).ravel(), 5, [t, 'Va'])
+        t_is(out['Pf'].ravel(), array([r['branch'][:, PF] for r in ref]).ravel(), 4, [t, 'Pf'])
+        t_is(out['Qt'].ravel(), array([r['branch'][:, QT] for r in ref]).ravel(), 4, [t, 'Qt'])
+
+    ## warm start
+    t = 'runtspf : warm start : '
+    out = runtspf(case9(), pd[[1, 1]], ppopt=ppopt)
+    t_ok(out['iterations'][1] < out['iterations'][0], [t, 'fewer iterations'])
+
+    ## memory-mapped output, only load profile given
+    t = 'runtspf : memory-mapped output : '
+    tmp = mkdtemp()
+    try:
+        out = runtspf(case9(), pd=pd, ppopt=ppopt, out=tmp)
+        del out
+        Qf = load(join(tmp, 'Qf.npy'))
+        Vm = load(join(tmp, 'Vm.npy'))
+        t_ok(Vm.shape == (3, nb), [t, 'shape'])
+        t_is(Qf[1], ref[1]['branch'][:, QF], 4, [t, 'Qf'])
+        t_is(Vm[1], ref[1]['bus'][:, VM], 6, [t, 'Vm'])
+    finally:
+        rmtree(tmp)
+
+    t_end()
+
+
+if __name__ == '__main__':
+    t_runtspf(quiet=False)
@@ -0,0 +1,123 @@
+# Copyright (c) 1996-2015 PSERC. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+
+"""Tests for C{scdcopf}.
+"""
+
+from numpy import arange, zeros, maximum, isnan, r_
+from numpy import flatnonzero as find
+from scipy.sparse import hstack, vstack, csr_matrix as sparse
+
+from pypower.case30 import case30
+from pypower.case118 import case118
+from pypower.ppoption import ppoption
+from pypower.rundcopf import rundcopf
+from pypower.ext2int import ext2int1
+from pypower.makeBdc import makeBdc
+from pypower.dc_factors import dc_factors
+from pypower.dcscreen import dcscreen
+from pypower.scdcopf import scdcopf
+
+from pypower.idx_bus import LAM_P
+from pypower.idx_gen import PG
+from pypower.idx_brch import PF, RATE_A
+
+from pypower.t.t_begin import t_begin
+from pypower.t.t_is import t_is
+from pypower.t.t_ok import t_ok
+from pypower.t.t_end import t_end
+
+
+def t_scdcopf(quiet=False):
+    """Tests for C{scdcopf}.
+    """
+    t_begin(20, quiet)
+
+    ppopt = ppoption(OPF_VIOLATION=1e-6, PDIPM_GRADTOL=1e-8,
+                     PDIPM_COMPTOL=1e-8, PDIPM_COSTTOL=1e-9)
+    ppopt = ppoption(ppopt, VERBOSE=0, OUT_ALL=0)
+
+    ##-----  case30, compared to all N-1 constraints at once  -----
+    t = 'scdcopf - case30 : '
+    base = rundcopf(case30(), ppopt)
+    r = scdcopf(case30(), ppopt)
+    t_ok(r['success'], [t, 'success'])
+    t_ok(r['f'] > base['f'], [t, 'f > base case f'])
+    t_ok(len(_violations(r)) == 0, [t, 'no post-contingency violations'])
+
+    ## explicit formulation, as user constraints on [Va, Pg]
+    ppc = case30()
+    baseMVA, bus, branch = ppc['baseMVA'], ppc['bus'], ppc['branch']
+    _, bus, gen, branch = ext2int1(bus, ppc['gen'], branch)
+    ng = gen.shape[0]
+    _, Bf, _, Pfinj = makeBdc(baseMVA, bus, branch)
+    L = dc_factors(baseMVA, bus, branch).lodf(arange(branch.shape[0]))
+    rate = branch[:, RATE_A]
+    A, l, u = [], [], []
+    for k in find(~isnan(L[0])):
+        m = find((rate > 0) & (arange(len(rate)) != k))
+        D = sparse((L[m, k], (arange(len(m)), zeros(len(m), int))), (len(m), 1))
+        A.append(Bf[m, :] + D * Bf[k, :])
+        l.append(-rate[m] / baseMVA - Pfinj[m] - L[m, k] * Pfinj[k])
+        u.append(rate[m] / baseMVA - Pfinj[m] - L[m, k] * Pfinj[k])
+    A = vstack(A)
+    ppc['A'] = hstack([A, sparse((A.shape[0], ng))]).tocsr()
+    ppc['l'], ppc['u'] = r_[tuple(l)], r_[tuple(u)]
+    ref = rundcopf(ppc, ppopt)
+    t_ok(ref['success'], [t, 'all N-1 constraints, success'])
+    t_is(r['f'], ref['f'], 4, [t, 'f'])
+    t_is(r['gen'][:, PG], ref['gen'][:, PG], 3, [t, 'Pg'])
+    t_is(r['bus'][:, LAM_P], ref['bus'][:, LAM_P], 3, [t, 'lambda'])
+    nc = r['scopf']['cont'].shape[0]
+    t_ok(0 < nc < A.shape[0] / 100, [t, '# of constraints'])
+    mu = r['scopf']['mu']['l'] + r['scopf']['mu']['u']
+    t_ok(all(mu >= 0) and any(mu > 0), [t, 'mu'])
+
+    ## no monitored branches
+    r = scdcopf(case30(), ppopt, monitored=[])
+    t_is(r['f'], base['f'], 6, [t, 'no monitored branches, f'])
+    t_ok(r['scopf']['cont'].shape[0] == 0 and r['scopf']['it'] == 1,
+         [t, 'no monitored branches, no constraints'])
+
+    ##-----  case118 with tight ratings, several iterations  -----
+    t = 'scdcopf - case118 : '
+    ppopt = ppoption(VERBOSE=0, OUT_ALL=0)
+    ppc = case118()
+    base = rundcopf(ppc, ppopt)
+    ppc['branch'][:, RATE_A] = maximum(1.6 * abs(base['branch'][:, PF]), 150)
+    base = rundcopf(ppc, ppopt)
+    t_ok(len(_violations(base)) > 0, [t, 'base case violations'])
+    r = scdcopf(ppc, ppopt)
+    t_ok(r['success'], [t, 'success'])
+    t_ok(r['scopf']['it'] > 2, [t, 'iterations'])
+    t_ok(r['f'] > base['f'], [t, 'f > base case f'])
+    t_ok(len(_violations(r)) == 0, [t, 'no post-contingency violations'])
+
+    ## PTDF formulation
+    rp = scdcopf(ppc, ppoption(ppopt, OPF_DC_FORM='ptdf'))
+    t_ok(rp['success'], [t, 'PTDF formulation, success'])
+    t_is(rp['f'], r['f'], 3, [t, 'PTDF formulation, f'])
+    t_is(rp['bus'][:, LAM_P], r['bus'][:, LAM_P], 4,
+         [t, 'PTDF formulation, lambda'])
+
+    ## limit not reached in max_it solutions
+    r = scdcopf(ppc, ppopt, max_it=1)
+    t_ok(not r['success'] and r['scopf']['it'] == 1, [t, 'max_it'])
+
+    t_end()
+
+
+def _violations(r):
+    """Post-contingency overloads of the results C{r}, beyond the solver
+    tolerance.
+    """
+    _, bus, _, branch = ext2int1(r['bus'], r['gen'], r['branch'])
+    ovl, _ = dcscreen(r['baseMVA'], bus, branch, branch[:, PF],
+                      rate=branch[:, RATE_A] * (1 + 1e-5))
+
+    return ovl
+
+
+if __name__ == '__main__':
+    t_scdcopf(quiet=False)
@@ -23,7 +23,15 @@ def test_pypower(verbose=False):
     tests.append('t_loadcase')
     # tests.append('t_ext2int2ext')
     tests.append('t_jacobian')
+    tests.append('t_newtonpf_batch')
+    tests.append('t_admittance_model')
+    tests.append('t_runtspf')
+    tests.append('t_runcont')
+    tests.append('t_cpf')
+    tests.append('t_dc_factors')
     tests.append('t_hessian')
+    tests.append('t_mpopf')
+    tests.append('t_scdcopf')
     tests.append('t_totcost')
     tests.append('t_modcost')
     tests.append('t_hasPQcap')
@@ -73,6 +81,11 @@ def test_pf(verbose=False):
     tests.append('t_ext2int2ext')
     tests.append('t_jacobian')
     tests.append('t_pf')
+    tests.append('t_newtonpf_batch')
+    tests.append('t_admittance_model')
+    tests.append('t_runtspf')
+    tests.append('t_runcont')
+    tests.append('t_cpf')
 
     return t_run_tests(tests, verbose)
 
@@ -108,9 +121,12 @@ def test_opf(verbose=False, *others):
         tests.append('t_opf_dc_mosek')
 
     tests.append('t_runopf_w_res')
+    tests.append('t_mpopf')
+    tests.append('t_scdcopf')
 
     tests.append('t_makePTDF')
     tests.append('t_makeLODF')
+    tests.append('t_dc_factors')
     tests.append('t_total_load')
     tests.append('t_scale_load')
 